@@ -0,0 +1,284 @@
+"""
+Offline all-pairs scoring: the predicted rating of every user for every restaurant on one
+date, precomputed for serving (home-page recommendations, /v1/ratings/top).
+
+User chunks × restaurants are turned into "review" rows, featurized with
+`engineer_merged_features` exactly as in training, and scored by the trained pipeline in a
+process pool. Each run writes a new generation directory under --output-dir:
+
+- scores.f16          float16 (users, restaurants), row-major, no header (np.memmap it)
+- user_ids.npy        int64 user id of every row
+- restaurant_ids.npy  int64 restaurant id of every column
+- manifest.json       shape, date, model version and per-user / per-restaurant row hashes
+
+and then atomically points `CURRENT` at it, so readers never see a half-written matrix.
+There is no review at serving time, so every pair is scored with a zero embedding.
+
+With --incremental, a run against the same model, date and trends only rescores users
+and restaurants whose source rows changed (or were added, or are listed in --users /
+--restaurants); every other score is copied from the previous generation.
+
+    python score_matrix.py --date 2025-11-18 --workers 8
+    python score_matrix.py --incremental --users 10001 10002
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_DIR, TASK_DIR
+from src.data_utils import load_data
+from src.features import engineer_merged_features
+
+MODEL_FILENAME = "best_restaurant_rating_model_xgboost.pkl"
+LAYOUT_VERSION = 1
+SCORES_FILE = "scores.f16"
+KEEP_GENERATIONS = 2
+
+_WORKER: Dict[str, object] = {}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Precompute the user x restaurant score matrix")
+    parser.add_argument(
+        "--date", help="Scoring date (YYYY-MM-DD); defaults to the latest trend date"
+    )
+    parser.add_argument("--model", default=os.path.join(TASK_DIR, MODEL_FILENAME))
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--output-dir", default=os.path.join(TASK_DIR, "score_matrix"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-users", type=int, default=64, help="Users per scoring block")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reuse the previous generation and only rescore changed users/restaurants",
+    )
+    parser.add_argument("--users", type=int, nargs="*", default=[], help="Force-rescore users")
+    parser.add_argument(
+        "--restaurants", type=int, nargs="*", default=[], help="Force-rescore restaurants"
+    )
+    return parser.parse_args()
+
+
+def _digest(payload: str, size: int = 8) -> str:
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=size).hexdigest()
+
+
+def _row_hashes(df: pd.DataFrame, id_col: str) -> Dict[str, str]:
+    """Content hash of every source row, keyed by its id (as a JSON-friendly string)."""
+    return {
+        str(int(record[id_col])): _digest(json.dumps(record, sort_keys=True, default=str))
+        for record in df.to_dict(orient="records")
+    }
+
+
+def model_version(model_path: str) -> str:
+    """Same `stem@blake2b` string the backend reports, so it can match matrix to model."""
+    with open(model_path, "rb") as handle:
+        digest = hashlib.blake2b(handle.read(), digest_size=6).hexdigest()
+    return f"{os.path.splitext(os.path.basename(model_path))[0]}@{digest}"
+
+
+def _init_worker(model_path: str, frames: Tuple[pd.DataFrame, ...], date: str) -> None:
+    import joblib
+
+    pipeline = joblib.load(model_path)
+    # Parallelism comes from the process pool; one thread each avoids oversubscription.
+    pipeline.named_steps["regressor"].set_params(n_jobs=1)
+    transformers = pipeline.named_steps["preprocessor"].transformers
+    embed = next((entry for entry in transformers if entry[0] == "embed"), None)
+    _WORKER.update(
+        pipeline=pipeline,
+        frames=frames,
+        date=date,
+        embedding_cols=list(embed[2]) if embed else [],
+    )
+
+
+def _score_block(user_ids: Sequence[int], restaurant_ids: Sequence[int]) -> np.ndarray:
+    """Predicted ratings for user_ids × restaurant_ids as a float32 (users, restaurants) block."""
+    df_restaurants, df_users, df_trends = _WORKER["frames"]
+    pairs = pd.DataFrame(
+        {
+            "user_id": np.repeat(np.asarray(user_ids, dtype=np.int64), len(restaurant_ids)),
+            "restaurant_id": np.tile(np.asarray(restaurant_ids, dtype=np.int64), len(user_ids)),
+            "date": _WORKER["date"],
+            "helpful_count": 0,
+            "review_text": "",
+        }
+    )
+    df = engineer_merged_features(df_restaurants, pairs, df_users, df_trends)
+    if len(df) != len(pairs):
+        raise ValueError(f"Feature merge produced {len(df)} rows for {len(pairs)} pairs")
+    embedding_cols = _WORKER["embedding_cols"]
+    if embedding_cols:
+        zeros = pd.DataFrame(0.0, index=df.index, columns=embedding_cols)
+        df = pd.concat([df, zeros], axis=1)
+    preds = np.clip(_WORKER["pipeline"].predict(df), 1.0, 5.0)
+    return preds.astype(np.float32).reshape(len(user_ids), len(restaurant_ids))
+
+
+def _read_generation(output_dir: str) -> Optional[Tuple[dict, np.memmap, np.ndarray, np.ndarray]]:
+    pointer = os.path.join(output_dir, "CURRENT")
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer) as handle:
+        gen_dir = os.path.join(output_dir, handle.read().strip())
+    with open(os.path.join(gen_dir, "manifest.json")) as handle:
+        manifest = json.load(handle)
+    scores = np.memmap(
+        os.path.join(gen_dir, SCORES_FILE), dtype="<f2", mode="r", shape=tuple(manifest["shape"])
+    )
+    return (
+        manifest,
+        scores,
+        np.load(os.path.join(gen_dir, "user_ids.npy")),
+        np.load(os.path.join(gen_dir, "restaurant_ids.npy")),
+    )
+
+
+def _plan(
+    args, manifest: dict, user_ids: np.ndarray, restaurant_ids: np.ndarray, scores: np.memmap
+) -> List[Tuple[List[int], List[int]]]:
+    """Fill `scores` from the previous generation where possible; return blocks to score."""
+    previous = _read_generation(args.output_dir) if args.incremental else None
+    reusable = previous is not None and all(
+        previous[0].get(key) == manifest[key]
+        for key in ("layout_version", "date", "model_version", "trends_hash", "embedding")
+    )
+    chunk = max(1, args.chunk_users)
+    if not reusable:
+        if args.incremental:
+            print("[SCORE] No compatible previous generation; rescoring everything")
+        users = user_ids.tolist()
+        return [(users[i:i + chunk], restaurant_ids.tolist()) for i in range(0, len(users), chunk)]
+
+    old_manifest, old_scores, old_users, old_restaurants = previous
+    forced_users, forced_restaurants = set(args.users), set(args.restaurants)
+    old_user_pos = {int(u): i for i, u in enumerate(old_users)}
+    old_rest_pos = {int(r): i for i, r in enumerate(old_restaurants)}
+
+    def stale(ids, hashes, old_hashes, old_pos, forced):
+        return np.array(
+            [
+                int(i) in forced
+                or int(i) not in old_pos
+                or old_hashes.get(str(int(i))) != hashes[str(int(i))]
+                for i in ids
+            ],
+            dtype=bool,
+        )
+
+    stale_users = stale(
+        user_ids, manifest["user_hashes"], old_manifest["user_hashes"], old_user_pos, forced_users
+    )
+    stale_rest = stale(
+        restaurant_ids,
+        manifest["restaurant_hashes"],
+        old_manifest["restaurant_hashes"],
+        old_rest_pos,
+        forced_restaurants,
+    )
+    keep_u, keep_r = np.flatnonzero(~stale_users), np.flatnonzero(~stale_rest)
+    if len(keep_u) and len(keep_r):
+        old_u = [old_user_pos[int(u)] for u in user_ids[keep_u]]
+        old_r = [old_rest_pos[int(r)] for r in restaurant_ids[keep_r]]
+        scores[np.ix_(keep_u, keep_r)] = old_scores[np.ix_(old_u, old_r)]
+    print(
+        f"[SCORE] Incremental: {int(stale_users.sum())} users and "
+        f"{int(stale_rest.sum())} restaurants to rescore"
+    )
+
+    blocks = []
+    users = user_ids[stale_users].tolist()
+    blocks += [(users[i:i + chunk], restaurant_ids.tolist()) for i in range(0, len(users), chunk)]
+    if stale_rest.any():
+        users = user_ids[keep_u].tolist()
+        changed = restaurant_ids[stale_rest].tolist()
+        blocks += [(users[i:i + chunk], changed) for i in range(0, len(users), chunk)]
+    return blocks
+
+
+def _publish(output_dir: str, gen_name: str) -> None:
+    """Atomically repoint CURRENT, then drop generations older than KEEP_GENERATIONS."""
+    tmp_pointer = os.path.join(output_dir, f".CURRENT.{os.getpid()}")
+    with open(tmp_pointer, "w") as handle:
+        handle.write(gen_name)
+    os.replace(tmp_pointer, os.path.join(output_dir, "CURRENT"))
+    generations = sorted(d for d in os.listdir(output_dir) if d.startswith("gen-"))
+    for old in generations[:-KEEP_GENERATIONS]:
+        # Readers that still map an old generation keep their (unlinked) inode on POSIX.
+        shutil.rmtree(os.path.join(output_dir, old), ignore_errors=True)
+
+
+def main(args):
+    start = time.time()
+    df_restaurants, _, df_users, df_trends = load_data(args.data_dir)
+    date = args.date or str(pd.to_datetime(df_trends["date"]).max().date())
+    user_ids = df_users["user_id"].to_numpy(np.int64)
+    restaurant_ids = df_restaurants["id"].to_numpy(np.int64)
+
+    manifest = {
+        "layout_version": LAYOUT_VERSION,
+        "dtype": "float16",
+        "shape": [len(user_ids), len(restaurant_ids)],
+        "date": date,
+        "model_version": model_version(args.model),
+        "embedding": "zeros",
+        "trends_hash": _digest(df_trends.to_csv(index=False), size=16),
+        "user_hashes": _row_hashes(df_users, "user_id"),
+        "restaurant_hashes": _row_hashes(df_restaurants, "id"),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    gen_name = f"gen-{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}"
+    gen_dir = os.path.join(args.output_dir, gen_name)
+    os.makedirs(gen_dir)
+    scores = np.memmap(
+        os.path.join(gen_dir, SCORES_FILE), dtype="<f2", mode="w+", shape=tuple(manifest["shape"])
+    )
+    blocks = _plan(args, manifest, user_ids, restaurant_ids, scores)
+
+    user_pos = {int(u): i for i, u in enumerate(user_ids)}
+    rest_pos = {int(r): i for i, r in enumerate(restaurant_ids)}
+    pairs = sum(len(u) * len(r) for u, r in blocks)
+    print(f"[SCORE] {pairs} pairs in {len(blocks)} blocks on {args.workers} workers for {date}")
+    if blocks:
+        frames = (df_restaurants, df_users, df_trends)
+        with ProcessPoolExecutor(
+            max_workers=max(1, args.workers),
+            initializer=_init_worker,
+            initargs=(args.model, frames, date),
+        ) as pool:
+            futures = [
+                (users, rests, pool.submit(_score_block, users, rests)) for users, rests in blocks
+            ]
+            for done, (users, rests, future) in enumerate(futures, start=1):
+                rows = [user_pos[u] for u in users]
+                cols = [rest_pos[r] for r in rests]
+                scores[np.ix_(rows, cols)] = future.result().astype(np.float16)
+                if done % 10 == 0 or done == len(futures):
+                    print(f"[SCORE] {done}/{len(futures)} blocks")
+    scores.flush()
+    del scores
+
+    np.save(os.path.join(gen_dir, "user_ids.npy"), user_ids)
+    np.save(os.path.join(gen_dir, "restaurant_ids.npy"), restaurant_ids)
+    with open(os.path.join(gen_dir, "manifest.json"), "w") as handle:
+        json.dump(manifest, handle)
+    _publish(args.output_dir, gen_name)
+    print(f"[SAVE] {gen_dir} ({pairs} pairs scored in {time.time() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    main(arguments)
@@ -1,23 +1,19 @@
 """
-Utility helpers for reading raw CSV/JSON data plus a few shared feature transforms.
-These stay separate from feature engineering so they can be unit-tested in isolation.
+Utility helpers for reading raw CSV/JSON data and tokenizing list-like text columns.
+The price transforms moved to `transforms.py` and are re-exported here.
 """
 import json
 import os
-import re
 from typing import List, Tuple
 
 import pandas as pd
 
 from config import DATA_DIR
-
-# Quick lookup table for user preference alignment, values used in user_data csv file
-PRICE_BUCKET_MAP = {
-    "AED 50 - 100": "Low",
-    "AED 100 - 150": "Medium",
-    "AED 150 - 200": "High",
-    "AED 200 - 300+": "Luxury",
-}
+from .transforms import (  # noqa: F401
+    PRICE_BUCKET_MAP,
+    map_restaurant_price_bucket,
+    parse_price_range_to_avg,
+)
 
 
 def load_data(
@@ -41,30 +37,6 @@ def load_data(
     return df_restaurants, df_reviews, df_users, df_trends
 
 
-def parse_price_range_to_avg(price_str: str) -> float:
-    """
-    Convert free-form ranges like 'AED 120 - 200' into a single numeric midpoint.
-    This allows tree-based models to compare restaurants by effective spend.
-    """
-    if pd.isna(price_str):
-        return float("nan")
-    cleaned = re.sub(r"[^\d\-]", " ", str(price_str))
-    match = re.search(r"(\d+)\s*-\s*(\d+)", cleaned)
-    if match:
-        low, high = float(match.group(1)), float(match.group(2))
-        return (low + high) / 2.0
-    return float("nan")
-
-
-def map_restaurant_price_bucket(price_str: str) -> str:
-    """
-    Map the textual price bucket to a smaller vocabulary the user-preference logic can work with.
-    """
-    if pd.isna(price_str):
-        return "Unknown"
-    return PRICE_BUCKET_MAP.get(str(price_str), "Unknown")
-
-
 def tokenizer_splitter(text: str) -> List[str]:
     """
     Helper for scikit-learn's CountVectorizer. Splits comma-separated amenities/attributes
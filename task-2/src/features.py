@@ -3,37 +3,17 @@ Feature engineering helpers for Task 2.
 """
 import pandas as pd
 
-from .data_utils import (
+from .transforms import (
+    engineer_trend_features,
+    favorite_cuisine_set,
+    is_local_resident,
     map_restaurant_price_bucket,
     parse_price_range_to_avg,
+    price_alignment,
+    user_cuisine_match,
 )
 
 
-def engineer_trend_features(df_trends: pd.DataFrame) -> pd.DataFrame:
-    """
-    Produce rolling averages and lagged popularity signals for each cuisine.
-    These capture momentum (7-day) and seasonality (30-day) that impact ratings.
-    """
-    df_trends = df_trends.copy()
-    df_trends["date"] = pd.to_datetime(df_trends["date"])
-    df_trends = df_trends.sort_values(["cuisine_type", "date"]).reset_index(drop=True)
-
-    grouped_pop = df_trends.groupby("cuisine_type")["popularity_score"]
-    grouped_price = df_trends.groupby("cuisine_type")["avg_price"]
-
-    df_trends["popularity_lag_1"] = grouped_pop.shift(1)
-    df_trends["popularity_7_day_avg"] = grouped_pop.shift(1).rolling(7, min_periods=1).mean()
-    df_trends["popularity_30_day_avg"] = grouped_pop.shift(1).rolling(30, min_periods=1).mean()
-    df_trends["avg_price_7_day_avg"] = grouped_price.shift(1).rolling(7, min_periods=1).mean()
-
-    prev_7 = grouped_pop.shift(7)
-    growth = (df_trends["popularity_lag_1"] - prev_7) / prev_7.replace(0, pd.NA)
-    growth = growth.replace([pd.NA, pd.NaT, float("inf"), float("-inf")], 0).fillna(0)
-    df_trends["popularity_7_day_growth"] = growth
-
-    return df_trends
-
-
 def engineer_merged_features(
     df_restaurants: pd.DataFrame,
     df_reviews: pd.DataFrame,
@@ -62,28 +42,19 @@ def engineer_merged_features(
     df["price_avg"] = df["resto_price_range"].apply(parse_price_range_to_avg)
     df["resto_price_bucket"] = df["resto_price_range"].apply(map_restaurant_price_bucket)
 
-    # User preference matching.
+    # User preference matching (shared with the serving feature store via .transforms).
     df["favorite_cuisines"] = df["favorite_cuisines"].fillna("").astype(str)
-    df["favorite_cuisines_list"] = (
-        df["favorite_cuisines"].str.lower()
-        .apply(lambda s: [c.strip() for c in s.split(",") if c.strip()])
-    )
-    df["resto_cuisine_lower"] = df["resto_cuisine"].str.lower()
-    df["user_cuisine_match"] = df.apply(
-        lambda row: int(row["resto_cuisine_lower"] in row["favorite_cuisines_list"]),
-        axis=1,
-    )
-
-    def price_alignment(row):
-        user_pref = str(row["preferred_price_range"]).strip().lower()
-        resto_bucket = str(row["resto_price_bucket"]).strip().lower()
-        if user_pref in ["", "nan"] or resto_bucket == "unknown":
-            return 0
-        return int(user_pref == resto_bucket)
-
-    df["price_alignment_score"] = df.apply(price_alignment, axis=1)
-
-    df["is_local_resident"] = (df["home_location"] == df["resto_location"]).astype(int)
+    favorites = df["favorite_cuisines"].apply(favorite_cuisine_set)
+    df["user_cuisine_match"] = [
+        user_cuisine_match(cuisine, favs) for cuisine, favs in zip(df["resto_cuisine"], favorites)
+    ]
+    df["price_alignment_score"] = [
+        price_alignment(pref, bucket)
+        for pref, bucket in zip(df["preferred_price_range"], df["resto_price_bucket"])
+    ]
+    df["is_local_resident"] = [
+        is_local_resident(home, loc) for home, loc in zip(df["home_location"], df["resto_location"])
+    ]
 
     # Calendar signals to capture seasonality and weekend effects.
     df["review_month"] = df["date"].dt.month.astype("int8")
@@ -0,0 +1,94 @@
+"""
+Pure feature transforms shared by training and serving.
+
+Nothing here imports `config` (which seeds the RNGs, creates the cache directory and
+loads torch) or any model library, so the Task 3 backend can reuse the exact training
+logic without paying for the training stack.
+"""
+import re
+from typing import Any, FrozenSet
+
+import pandas as pd
+
+# Quick lookup table for user preference alignment, values used in user_data csv file
+PRICE_BUCKET_MAP = {
+    "AED 50 - 100": "Low",
+    "AED 100 - 150": "Medium",
+    "AED 150 - 200": "High",
+    "AED 200 - 300+": "Luxury",
+}
+
+
+def parse_price_range_to_avg(price_str: str) -> float:
+    """
+    Convert free-form ranges like 'AED 120 - 200' into a single numeric midpoint.
+    This allows tree-based models to compare restaurants by effective spend.
+    """
+    if pd.isna(price_str):
+        return float("nan")
+    cleaned = re.sub(r"[^\d\-]", " ", str(price_str))
+    match = re.search(r"(\d+)\s*-\s*(\d+)", cleaned)
+    if match:
+        low, high = float(match.group(1)), float(match.group(2))
+        return (low + high) / 2.0
+    return float("nan")
+
+
+def map_restaurant_price_bucket(price_str: str) -> str:
+    """
+    Map the textual price bucket to a smaller vocabulary the user-preference logic can work with.
+    """
+    if pd.isna(price_str):
+        return "Unknown"
+    return PRICE_BUCKET_MAP.get(str(price_str), "Unknown")
+
+
+def favorite_cuisine_set(favorite_cuisines: Any) -> FrozenSet[str]:
+    """Lower-cased cuisines from the comma-separated `favorite_cuisines` column."""
+    if pd.isna(favorite_cuisines):
+        return frozenset()
+    return frozenset(c.strip() for c in str(favorite_cuisines).lower().split(",") if c.strip())
+
+
+def user_cuisine_match(cuisine: Any, favorites: FrozenSet[str]) -> int:
+    """1 when the restaurant's cuisine is one of the user's favourites."""
+    return int(isinstance(cuisine, str) and cuisine.lower() in favorites)
+
+
+def price_alignment(preferred_price_range: Any, price_bucket: Any) -> int:
+    """1 when the user's preferred price bucket matches the restaurant's."""
+    user_pref = str(preferred_price_range).strip().lower()
+    resto_bucket = str(price_bucket).strip().lower()
+    if user_pref in ["", "nan"] or resto_bucket == "unknown":
+        return 0
+    return int(user_pref == resto_bucket)
+
+
+def is_local_resident(home_location: Any, resto_location: Any) -> int:
+    """1 when the user lives where the restaurant is (missing values never match)."""
+    return int(isinstance(home_location, str) and home_location == resto_location)
+
+
+def engineer_trend_features(df_trends: pd.DataFrame) -> pd.DataFrame:
+    """
+    Produce rolling averages and lagged popularity signals for each cuisine.
+    These capture momentum (7-day) and seasonality (30-day) that impact ratings.
+    """
+    df_trends = df_trends.copy()
+    df_trends["date"] = pd.to_datetime(df_trends["date"])
+    df_trends = df_trends.sort_values(["cuisine_type", "date"]).reset_index(drop=True)
+
+    grouped_pop = df_trends.groupby("cuisine_type")["popularity_score"]
+    grouped_price = df_trends.groupby("cuisine_type")["avg_price"]
+
+    df_trends["popularity_lag_1"] = grouped_pop.shift(1)
+    df_trends["popularity_7_day_avg"] = grouped_pop.shift(1).rolling(7, min_periods=1).mean()
+    df_trends["popularity_30_day_avg"] = grouped_pop.shift(1).rolling(30, min_periods=1).mean()
+    df_trends["avg_price_7_day_avg"] = grouped_price.shift(1).rolling(7, min_periods=1).mean()
+
+    prev_7 = grouped_pop.shift(7)
+    growth = (df_trends["popularity_lag_1"] - prev_7) / prev_7.replace(0, pd.NA)
+    growth = growth.replace([pd.NA, pd.NaT, float("inf"), float("-inf")], 0).fillna(0)
+    df_trends["popularity_7_day_growth"] = growth
+
+    return df_trends
@@ -0,0 +1,342 @@
+"""
+Versioned offline model bundle.
+
+Without a bundle the backend resolves its models from scattered places: the embedding
+model through the Hugging Face hub cache (or the network), the rating pickle from
+`task-2/`, the Chroma collection from `task-1/db`. `build` snapshots all of them into one
+directory, named by a version, with a manifest listing every file's size and sha256:
+
+    <root>/<version>/
+        manifest.json
+        embedding/      SentenceTransformer.save() of RATING_EMBED_MODEL
+        rating/         the joblib pipeline
+        chroma/         sqlite (copied through the backup API) + HNSW segment folders
+        vectors/        Task 2 review_embeddings as a plain .npy, memory-mappable
+        score_matrix/   the live score matrix generation, if it was scored by this model
+
+`MODEL_BUNDLE_DIR=<root>/<version>` makes `get_settings` point every path into the bundle
+and switches the Hugging Face libraries to offline mode, so startup never touches the
+network and always loads the same bytes. The score matrix is memory-mapped as before and
+the review vectors are stored so they can be (`np.load(..., mmap_mode="r")`); the pickle,
+the weights and the HNSW index are still loaded into memory by their libraries. Chroma
+writes to its sqlite file even when only querying, so each process opens a scratch copy
+of `chroma/` (MODEL_BUNDLE_SCRATCH_DIR, default the system temp dir) and the bundle
+itself is never modified; it can be mounted read-only.
+
+    cd task-3/backend
+    python -m app.bundle build --output bundles
+    python -m app.bundle verify bundles/20261019-101500-1a2b3c4d
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import BACKEND_DIR, Settings
+
+logger = logging.getLogger(__name__)
+
+LAYOUT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+CHROMA_SQLITE = "chroma.sqlite3"
+REVIEW_EMBEDDINGS = "review_embeddings.npy"
+OFFLINE_ENV_VARS = ("HF_HUB_OFFLINE", "TRANSFORMERS_OFFLINE", "HF_DATASETS_OFFLINE")
+
+
+class BundleError(ValueError):
+    """The bundle is missing, of an unknown layout, or does not match its manifest."""
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    root: Path
+    version: str
+    manifest: Dict[str, Any]
+
+    def component(self, name: str) -> Optional[Path]:
+        """Directory of a bundled component, or None when the bundle has no such part."""
+        entry = self.manifest["components"].get(name)
+        return self.root / entry["path"] if entry else None
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _file_entries(component_dir: Path) -> Dict[str, Dict[str, Any]]:
+    return {
+        path.relative_to(component_dir).as_posix(): {
+            "bytes": path.stat().st_size,
+            "sha256": _sha256(path),
+        }
+        for path in sorted(component_dir.rglob("*"))
+        if path.is_file()
+    }
+
+
+# --------------------------------------------------------------------------- build
+
+
+def _snapshot_embedding(settings: Settings, target: Path) -> Dict[str, Any]:
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(settings.rating_embedding_model, device="cpu")
+    model.save(str(target))
+    return {
+        "source": settings.rating_embedding_model,
+        "dimension": model.get_sentence_embedding_dimension(),
+    }
+
+
+def _snapshot_rating_model(settings: Settings, target: Path) -> Dict[str, Any]:
+    source = settings.rating_model_dir / settings.rating_model_filename
+    target.mkdir(parents=True)
+    raw = source.read_bytes()
+    (target / source.name).write_bytes(raw)
+    # Same identifier load_local_model derives, so score matrices stay matched.
+    digest = hashlib.blake2b(raw, digest_size=6).hexdigest()
+    return {"filename": source.name, "model_version": f"{source.stem}@{digest}"}
+
+
+def _snapshot_chroma(settings: Settings, target: Path) -> Dict[str, Any]:
+    source = settings.chroma_db_dir
+    # The HNSW segment folders are only rewritten by ingestion; the sqlite file goes
+    # through the backup API so a concurrent writer cannot leave a torn copy.
+    shutil.copytree(source, target, ignore=shutil.ignore_patterns(f"{CHROMA_SQLITE}*"))
+    src = sqlite3.connect(f"file:{source / CHROMA_SQLITE}?mode=ro", uri=True)
+    dst = sqlite3.connect(target / CHROMA_SQLITE)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+    return {"source": str(source)}
+
+
+def _snapshot_review_embeddings(source: Path, target: Path) -> Optional[Dict[str, Any]]:
+    import numpy as np
+
+    if not source.exists():
+        logger.info("No review embedding cache at %s; skipping", source)
+        return None
+    target.mkdir(parents=True)
+    with np.load(source, allow_pickle=False) as cache:
+        embeddings = np.ascontiguousarray(cache["embeddings"])
+        text_hash = str(cache["text_hash"].item())
+    # .npz members cannot be memory-mapped; a bare .npy can.
+    np.save(target / REVIEW_EMBEDDINGS, embeddings)
+    return {
+        "text_hash": text_hash,
+        "shape": list(embeddings.shape),
+        "dtype": str(embeddings.dtype),
+    }
+
+
+def _snapshot_score_matrix(
+    settings: Settings, target: Path, model_version: str
+) -> Optional[Dict[str, Any]]:
+    pointer = settings.score_matrix_dir / "CURRENT"
+    if not pointer.exists():
+        return None
+    name = pointer.read_text().strip()
+    generation = settings.score_matrix_dir / name
+    manifest = json.loads((generation / "manifest.json").read_text())
+    if manifest.get("model_version") != model_version:
+        logger.info(
+            "Score matrix %s was built by %s, not %s; skipping",
+            name,
+            manifest.get("model_version"),
+            model_version,
+        )
+        return None
+    shutil.copytree(generation, target / name)
+    (target / "CURRENT").write_text(name)
+    return {"generation": name, "date": manifest.get("date")}
+
+
+def build_bundle(
+    settings: Settings,
+    output_root: Path,
+    version: Optional[str] = None,
+    review_embeddings: Optional[Path] = None,
+    skip: Optional[List[str]] = None,
+) -> Path:
+    """Snapshot every component into `output_root/<version>`; returns the bundle path."""
+    skip = skip or []
+    output_root.mkdir(parents=True, exist_ok=True)
+    staging = output_root / f".staging-{uuid.uuid4().hex[:8]}"
+    staging.mkdir()
+    components: Dict[str, Dict[str, Any]] = {}
+
+    def add(name: str, snapshot) -> Optional[Dict[str, Any]]:
+        if name in skip:
+            return None
+        start = time.perf_counter()
+        meta = snapshot(staging / name)
+        if meta is None:
+            return None
+        meta = {"path": name, **meta, "files": _file_entries(staging / name)}
+        components[name] = meta
+        logger.info("Bundled %s in %.1fs", name, time.perf_counter() - start)
+        return meta
+
+    try:
+        add("embedding", lambda target: _snapshot_embedding(settings, target))
+        rating = add("rating", lambda target: _snapshot_rating_model(settings, target))
+        add("chroma", lambda target: _snapshot_chroma(settings, target))
+        if review_embeddings is not None:
+            add("vectors", lambda target: _snapshot_review_embeddings(review_embeddings, target))
+        if rating is not None:
+            add(
+                "score_matrix",
+                lambda target: _snapshot_score_matrix(settings, target, rating["model_version"]),
+            )
+
+        content = hashlib.blake2b(digest_size=4)
+        for name in sorted(components):
+            for rel, entry in components[name]["files"].items():
+                content.update(f"{name}/{rel}:{entry['sha256']}\n".encode("utf-8"))
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+        version = version or f"{stamp}-{content.hexdigest()}"
+        manifest = {
+            "layout_version": LAYOUT_VERSION,
+            "version": version,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "content_digest": content.hexdigest(),
+            "components": components,
+        }
+        (staging / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+        final = output_root / version
+        if final.exists():
+            raise FileExistsError(f"Bundle {final} already exists")
+        staging.rename(final)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return final
+
+
+# --------------------------------------------------------------------------- load
+
+
+def open_bundle(root: Path, verify: bool = False) -> ModelBundle:
+    """
+    Read and check a bundle: every listed file must exist with its recorded size, and
+    with `verify` its sha256 too (reads every byte, so it is off by default).
+    """
+    manifest_path = root / MANIFEST_NAME
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError) as exc:
+        raise BundleError(f"Cannot read bundle manifest {manifest_path}: {exc}") from exc
+    if manifest.get("layout_version") != LAYOUT_VERSION:
+        raise BundleError(f"Unsupported bundle layout {manifest.get('layout_version')}")
+    for name, component in manifest["components"].items():
+        for rel, entry in component["files"].items():
+            path = root / component["path"] / rel
+            try:
+                size = path.stat().st_size
+            except OSError as exc:
+                raise BundleError(f"Bundle file {name}/{rel} is missing") from exc
+            if size != entry["bytes"]:
+                raise BundleError(
+                    f"Bundle file {name}/{rel} has {size} bytes, expected {entry['bytes']}"
+                )
+            if verify and _sha256(path) != entry["sha256"]:
+                raise BundleError(f"Bundle file {name}/{rel} does not match its checksum")
+    return ModelBundle(root=root, version=manifest["version"], manifest=manifest)
+
+
+def _scratch_copy(source: Path, version: str, scratch_root: Optional[Path]) -> Path:
+    """Private, writable copy of a bundled directory, removed when the process exits."""
+    if scratch_root is not None:
+        scratch_root.mkdir(parents=True, exist_ok=True)
+    workdir = Path(tempfile.mkdtemp(prefix=f"bundle-{version}-", dir=scratch_root))
+    target = workdir / source.name
+    shutil.copytree(source, target)
+    atexit.register(shutil.rmtree, workdir, True)
+    return target
+
+
+def apply_bundle(
+    settings: Settings, bundle: ModelBundle, scratch_root: Optional[Path] = None
+) -> None:
+    """Point the settings at the bundled components and keep the HF libraries offline."""
+    embedding = bundle.component("embedding")
+    if embedding is not None:
+        settings.rating_embedding_model = str(embedding)
+    rating = bundle.component("rating")
+    if rating is not None:
+        settings.rating_model_dir = rating
+        settings.rating_model_filename = bundle.manifest["components"]["rating"]["filename"]
+    chroma = bundle.component("chroma")
+    if chroma is not None:
+        # Chroma updates its sqlite file on open, which would fail the size check on
+        # the next start; it gets a copy and the bundle stays as built.
+        settings.chroma_db_dir = _scratch_copy(chroma, bundle.version, scratch_root)
+    score_matrix = bundle.component("score_matrix")
+    if score_matrix is not None:
+        settings.score_matrix_dir = score_matrix
+    for name in OFFLINE_ENV_VARS:
+        os.environ.setdefault(name, "1")
+    logger.info("Using model bundle %s from %s", bundle.version, bundle.root)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from .config import TASK2_DIR, get_settings
+
+    parser = argparse.ArgumentParser(description="Build or verify an offline model bundle")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Snapshot the current models into a bundle")
+    build.add_argument("--output", type=Path, default=BACKEND_DIR / "bundles")
+    build.add_argument("--version", help="Bundle name (default: UTC timestamp + content hash)")
+    build.add_argument(
+        "--review-embeddings",
+        type=Path,
+        default=Path(os.environ.get("RATING_CACHE_DIR", str(TASK2_DIR / "cache")))
+        / "review_embeddings.npz",
+    )
+    build.add_argument(
+        "--skip",
+        action="append",
+        default=[],
+        choices=["embedding", "rating", "chroma", "vectors", "score_matrix"],
+    )
+    verify = commands.add_parser("verify", help="Re-hash every file against the manifest")
+    verify.add_argument("bundle", type=Path)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "verify":
+        bundle = open_bundle(args.bundle, verify=True)
+        files = sum(len(c["files"]) for c in bundle.manifest["components"].values())
+        print(f"{bundle.version}: {files} files OK")
+        return
+    path = build_bundle(
+        get_settings(),
+        args.output,
+        version=args.version,
+        review_embeddings=args.review_embeddings,
+        skip=args.skip,
+    )
+    print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ object. Keeping this module tiny makes it easy to swap env vars when deploying.
 import os
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -18,6 +18,11 @@ from pydantic import BaseModel, Field
 BASE_DIR = Path(__file__).resolve().parents[3]
 TASK1_DIR = BASE_DIR / "task-1"
 TASK2_DIR = BASE_DIR / "task-2"
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def _env_flag(name: str, default: str = "false") -> bool:
+    return os.environ.get(name, default).strip().lower() in {"1", "true", "yes", "on"}
 
 
 class Settings(BaseModel):
@@ -26,24 +31,180 @@ class Settings(BaseModel):
     api_version: str = "v1"
     api_name: str = "Restaurant Intelligence API"
     default_rate_limit_per_minute: int = 60
+    # /healthz serves a cached snapshot refreshed by a background task on this interval.
+    health_refresh_seconds: float = float(os.environ.get("HEALTH_REFRESH_SECONDS", "15"))
     rate_limit_window_seconds: int = 60
+    # memory:// keeps per-process GCRA state; redis://… shares one budget across workers.
+    rate_limit_url: str = os.environ.get("RATE_LIMIT_URL", "memory://")
+    # Units charged per request (matched by path suffix, default 1). LLM searches cost
+    # more than a predict; probes are free so they never eat into a caller's quota.
+    rate_limit_route_costs: Dict[str, float] = Field(
+        default_factory=lambda: {
+            "/restaurants/search": float(os.environ.get("RATE_LIMIT_SEARCH_COST", "5")),
+            "/ratings/predict": 1.0,
+            "/ratings/predict-by-id": 1.0,
+            "/ratings/top": 1.0,
+            "/healthz": 0.0,
+            "/readyz": 0.0,
+            "/metrics": 0.0,
+        }
+    )
+    # Used when the caller sends no `x-request-timeout-ms`; a header can only shorten the
+    # per-route cap below (matched by path suffix like the rate-limit costs).
+    request_timeout_seconds: float = float(os.environ.get("REQUEST_TIMEOUT_SECONDS", "30"))
+    request_timeout_caps: Dict[str, float] = Field(
+        default_factory=lambda: {
+            "/restaurants/search": float(os.environ.get("SEARCH_TIMEOUT_SECONDS", "30")),
+            "/ratings/predict": float(os.environ.get("PREDICT_TIMEOUT_SECONDS", "5")),
+            "/ratings/predict-by-id": float(os.environ.get("PREDICT_TIMEOUT_SECONDS", "5")),
+            "/ratings/top": float(os.environ.get("PREDICT_TIMEOUT_SECONDS", "5")),
+        }
+    )
+    # Adaptive concurrency limits per route class (path suffix -> max in-flight). Each
+    # class is shed only by its own limit; the listing order (highest priority first)
+    # decides which queued request gets the next worker thread. Unlisted routes (probes,
+    # metrics) bypass the limiter.
+    concurrency_limit_enabled: bool = _env_flag("CONCURRENCY_LIMIT_ENABLED", "true")
+    concurrency_route_limits: Dict[str, int] = Field(
+        default_factory=lambda: {
+            "/ratings/predict": int(os.environ.get("PREDICT_MAX_CONCURRENCY", "64")),
+            "/ratings/predict-by-id": int(os.environ.get("PREDICT_MAX_CONCURRENCY", "64")),
+            "/ratings/top": int(os.environ.get("PREDICT_MAX_CONCURRENCY", "64")),
+            "/restaurants/search": int(os.environ.get("SEARCH_MAX_CONCURRENCY", "16")),
+        }
+    )
+    concurrency_initial_limit: int = int(os.environ.get("CONCURRENCY_INITIAL_LIMIT", "8"))
+    concurrency_min_limit: int = int(os.environ.get("CONCURRENCY_MIN_LIMIT", "2"))
+    # Per-process thread budget (app/cpu_budget.py): detected cores are split between the
+    # WEB_CONCURRENCY worker processes. 0 means "derive from the budget".
+    cpu_budget_enabled: bool = _env_flag("CPU_BUDGET_ENABLED", "true")
+    cpu_cores: int = int(os.environ.get("CPU_CORES", "0"))
+    web_workers: int = int(os.environ.get("WEB_CONCURRENCY", "1"))
+    xgboost_threads: int = int(os.environ.get("XGBOOST_NTHREAD", "0"))
+    torch_intra_op_threads: int = int(os.environ.get("TORCH_INTRA_OP_THREADS", "0"))
+    torch_inter_op_threads: int = int(os.environ.get("TORCH_INTER_OP_THREADS", "0"))
+    blas_threads: int = int(os.environ.get("BLAS_THREADS", "0"))
+    worker_threadpool_size: int = int(os.environ.get("WORKER_THREADPOOL_SIZE", "0"))
     langgraph_cache_size: int = Field(1, description="How many compiled graphs to cache")
+    # Stateless /restaurants/search answers, keyed on normalized question + catalog
+    # version. A TTL of 0 disables both the cache and in-flight deduplication.
+    search_cache_ttl_seconds: float = float(os.environ.get("SEARCH_CACHE_TTL_SECONDS", "120"))
+    search_cache_size: int = int(os.environ.get("SEARCH_CACHE_SIZE", "512"))
     task1_dir: Path = TASK1_DIR
     task2_dir: Path = TASK2_DIR
+    # Where the Chroma collection and the rating pickle are read from. Task 1 / Task 2
+    # folders by default; a model bundle (MODEL_BUNDLE_DIR) points both into itself.
+    chroma_db_dir: Path = Path(os.environ.get("CHROMA_DB_DIR", str(TASK1_DIR / "db")))
+    rating_model_dir: Path = Path(os.environ.get("RATING_MODEL_DIR", str(TASK2_DIR)))
+    # Versioned offline bundle from `python -m app.bundle build` (see app/bundle.py).
+    # Verification re-hashes every file at startup; sizes are always checked.
+    model_bundle_dir: Optional[Path] = (
+        Path(os.environ["MODEL_BUNDLE_DIR"]) if os.environ.get("MODEL_BUNDLE_DIR") else None
+    )
+    model_bundle_verify: bool = _env_flag("MODEL_BUNDLE_VERIFY")
+    # Where each process copies the bundled Chroma collection (default: the temp dir).
+    model_bundle_scratch_dir: Optional[Path] = (
+        Path(os.environ["MODEL_BUNDLE_SCRATCH_DIR"])
+        if os.environ.get("MODEL_BUNDLE_SCRATCH_DIR")
+        else None
+    )
+    # Profiles + trends behind /ratings/predict-by-id and /ratings/top; source files are re-checked on
+    # this interval and the store rebuilt in the background when they change.
+    enable_feature_store: bool = _env_flag("ENABLE_FEATURE_STORE", "true")
+    feature_data_dir: Path = Path(
+        os.environ.get("FEATURE_DATA_DIR", str(BASE_DIR / "engagetest" / "data"))
+    )
+    feature_store_check_seconds: float = float(
+        os.environ.get("FEATURE_STORE_CHECK_SECONDS", "5")
+    )
+    # Precomputed user x restaurant scores from task-2/score_matrix.py, memory-mapped and
+    # used by /ratings/top when they match the request date and the active model.
+    enable_score_matrix: bool = _env_flag("ENABLE_SCORE_MATRIX", "true")
+    score_matrix_dir: Path = Path(
+        os.environ.get("SCORE_MATRIX_DIR", str(TASK2_DIR / "score_matrix"))
+    )
+    # Path of the model sidecar's Unix socket (app/services/sidecar.py). When set, workers
+    # embed and score through the sidecar instead of loading the models themselves.
+    sidecar_socket: Optional[str] = os.environ.get("SIDECAR_SOCKET") or None
+    sidecar_timeout_seconds: float = float(os.environ.get("SIDECAR_TIMEOUT_SECONDS", "10"))
+    # How long the sidecar waits to merge SCORE batches from concurrent workers.
+    sidecar_score_window_ms: float = float(os.environ.get("SIDECAR_SCORE_WINDOW_MS", "2"))
     rating_model_filename: str = "best_restaurant_rating_model_xgboost.pkl"
-    enable_local_model: bool = True
-    sagemaker_endpoint_name: Optional[str] = None
+    enable_local_model: bool = _env_flag("ENABLE_LOCAL_MODEL", "true")
+    # Poll the local artifact and hot-swap a retrained model (0 disables; SIGHUP still works).
+    model_reload_interval_seconds: float = float(
+        os.environ.get("MODEL_RELOAD_INTERVAL_SECONDS", "30")
+    )
+    # Load + exercise every service at startup; /readyz stays 503 until the required
+    # steps have loaded.
+    enable_warmup: bool = _env_flag("ENABLE_WARMUP", "true")
+    # A failed warm-up step (Chroma hiccup, sidecar not up yet, ...) is retried in the
+    # background with exponential backoff between these bounds.
+    warmup_retry_initial_seconds: float = float(
+        os.environ.get("WARMUP_RETRY_INITIAL_SECONDS", "1")
+    )
+    warmup_retry_max_seconds: float = float(os.environ.get("WARMUP_RETRY_MAX_SECONDS", "30"))
+    # Steps /readyz does not wait for: until they load the instance is ready but
+    # degraded (e.g. /restaurants/search without GOOGLE_API_KEY), and they stop
+    # retrying after WARMUP_OPTIONAL_MAX_ATTEMPTS. Required steps retry until they load.
+    warmup_optional_steps: List[str] = Field(
+        default_factory=lambda: [
+            name.strip()
+            for name in os.environ.get(
+                "WARMUP_OPTIONAL_STEPS", "rag_graph,feature_store"
+            ).split(",")
+            if name.strip()
+        ]
+    )
+    warmup_optional_max_attempts: int = int(os.environ.get("WARMUP_OPTIONAL_MAX_ATTEMPTS", "5"))
+    sagemaker_endpoint_name: Optional[str] = os.environ.get("SAGEMAKER_ENDPOINT_NAME")
+    # "json" sends the request model as before; "npz" uses the binary batch layout in
+    # app/services/feature_codec.py (the endpoint must support application/x-npz).
+    sagemaker_wire_format: str = os.environ.get("SAGEMAKER_WIRE_FORMAT", "json")
     aws_region: str = os.environ.get("AWS_REGION", "us-east-1")
     aws_profile: Optional[str] = os.environ.get("AWS_PROFILE")
     aws_endpoint_url: Optional[str] = os.environ.get("AWS_ENDPOINT_URL")
+    # LRU of raw predictions keyed on the canonical feature row + model fingerprint.
+    prediction_cache_size: int = int(os.environ.get("PREDICTION_CACHE_SIZE", "4096"))
+    # A SageMaker endpoint can be redeployed under the same name without the fingerprint
+    # changing, so memoized remote scores expire after this long (0 keeps them forever).
+    remote_prediction_cache_ttl_seconds: float = float(
+        os.environ.get("REMOTE_PREDICTION_CACHE_TTL_SECONDS", "300")
+    )
     sagemaker_timeout_seconds: int = Field(10, ge=1, le=60)
     redis_url: str = os.environ.get("CHAT_CACHE_URL", "memory://")
+    chat_history_ttl_seconds: int = int(os.environ.get("CHAT_HISTORY_TTL_SECONDS", "86400"))
+    chat_store_max_connections: int = int(os.environ.get("CHAT_STORE_MAX_CONNECTIONS", "20"))
+    # In-memory store only: lock stripes and total history budget before LRU eviction.
+    chat_store_shards: int = int(os.environ.get("CHAT_STORE_SHARDS", "16"))
+    chat_store_max_bytes: int = int(os.environ.get("CHAT_STORE_MAX_BYTES", str(64 * 1024 * 1024)))
+    # Requests sending `x-profile: <key>` are profiled; unset disables profiling entirely.
+    profiling_admin_key: Optional[str] = os.environ.get("PROFILING_ADMIN_KEY")
+    profiling_max_per_minute: int = int(os.environ.get("PROFILING_MAX_PER_MINUTE", "6"))
+    profiling_store_size: int = int(os.environ.get("PROFILING_STORE_SIZE", "32"))
+    profiling_dir: Optional[Path] = (
+        Path(os.environ["PROFILING_DIR"]) if os.environ.get("PROFILING_DIR") else None
+    )
     google_api_key: Optional[str] = os.environ.get("GOOGLE_API_KEY")
     # Default to a compact, widely available SBERT model. Can be overridden in env.
     rating_embedding_model: str = os.environ.get(
         "RATING_EMBED_MODEL", "all-MiniLM-L6-v2"
     )
     rating_embedding_device: str = os.environ.get("RATING_EMBED_DEVICE", "cpu")
+    rating_embedding_batch_size: int = int(os.environ.get("RATING_EMBED_BATCH_SIZE", "32"))
+    # How long the first embed call waits for more callers before encoding; only spent
+    # when other callers are already queued, so a lone request never sleeps.
+    # 0 disables coalescing and encodes every request on its own.
+    rating_embedding_coalesce_ms: float = float(
+        os.environ.get("RATING_EMBED_COALESCE_MS", "2")
+    )
+    # "torch" runs SentenceTransformer directly; "onnx" serves a cached ONNX export
+    # through ONNX Runtime (see app/services/onnx_embedding.py).
+    rating_embedding_backend: str = os.environ.get("RATING_EMBED_BACKEND", "torch")
+    rating_embedding_onnx_dir: Path = Path(
+        os.environ.get("RATING_EMBED_ONNX_DIR", str(BACKEND_DIR / ".onnx_cache"))
+    )
+    rating_embedding_onnx_quantize: bool = _env_flag("RATING_EMBED_ONNX_QUANTIZE")
 
 
 @lru_cache(maxsize=1)
@@ -51,5 +212,11 @@ def get_settings() -> Settings:
     """
     Cached accessor so every dependency import does not rebuild the Settings object.
     """
-    return Settings()
+    settings = Settings()
+    if settings.model_bundle_dir is not None:
+        from .bundle import apply_bundle, open_bundle
+
+        bundle = open_bundle(settings.model_bundle_dir, verify=settings.model_bundle_verify)
+        apply_bundle(settings, bundle, scratch_root=settings.model_bundle_scratch_dir)
+    return settings
 
@@ -0,0 +1,141 @@
+"""
+CPU thread budget for one server worker process.
+
+Left alone, every native library sizes its thread team to all cores: XGBoost's saved
+`n_jobs=-1`, torch intra-op parallelism, OpenMP and BLAS. Under concurrent requests each
+of those teams is spawned per call, so N requests on C cores run N x C threads and thrash.
+The budget divides the detected cores (affinity mask and cgroup quota) between the
+`WEB_CONCURRENCY` worker processes and hands each library a fixed share:
+
+- BLAS/OpenMP pools: exported as `OMP_NUM_THREADS` & co. before numpy/torch load;
+- torch / ONNX Runtime intra-op threads: the worker's share, because the embedding
+  coalescer already funnels concurrent requests into one encode at a time;
+- XGBoost: 1 thread by default, since predictions are a handful of rows and request-level
+  parallelism comes from the worker threadpool.
+
+Explicit environment variables always win over the computed values.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from .config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+BLAS_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+)
+
+
+@dataclass(frozen=True)
+class CpuBudget:
+    cores: int
+    workers: int
+    per_worker: int
+    xgboost_threads: int
+    torch_intra_op_threads: int
+    torch_inter_op_threads: int
+    blas_threads: int
+    # anyio worker threads per process; None keeps the library default (40).
+    threadpool_size: Optional[int]
+
+    def as_dict(self) -> Dict[str, Optional[int]]:
+        return dict(self.__dict__)
+
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """CPU quota in cores from cgroup v2 `cpu.max` or v1 `cfs_quota_us`, if limited."""
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text())
+        period = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    return quota / period if quota > 0 and period > 0 else None
+
+
+def detect_cores() -> int:
+    """Cores this process may actually use: affinity mask capped by the cgroup quota."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS / Windows
+        cores = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cores = min(cores, max(1, int(limit)))
+    return max(1, cores)
+
+
+def plan_cpu_budget(settings: Optional[Settings] = None) -> CpuBudget:
+    settings = settings or get_settings()
+    cores = settings.cpu_cores or detect_cores()
+    workers = max(1, settings.web_workers)
+    per_worker = max(1, cores // workers)
+    return CpuBudget(
+        cores=cores,
+        workers=workers,
+        per_worker=per_worker,
+        xgboost_threads=settings.xgboost_threads or 1,
+        torch_intra_op_threads=settings.torch_intra_op_threads or per_worker,
+        torch_inter_op_threads=settings.torch_inter_op_threads or 1,
+        blas_threads=settings.blas_threads or per_worker,
+        threadpool_size=settings.worker_threadpool_size or None,
+    )
+
+
+def cpu_budget() -> Optional[CpuBudget]:
+    """The active budget, or None when CPU_BUDGET_ENABLED=false (library defaults)."""
+    settings = get_settings()
+    return plan_cpu_budget(settings) if settings.cpu_budget_enabled else None
+
+
+def apply_process_limits() -> Optional[CpuBudget]:
+    """
+    Export the BLAS/OpenMP limits. Only libraries loaded afterwards pick them up; torch,
+    xgboost and ONNX Runtime are imported lazily, so `create_app` and the preload
+    launcher call this before any model is built.
+    """
+    budget = cpu_budget()
+    if budget is None:
+        return None
+    for name in BLAS_ENV_VARS:
+        os.environ.setdefault(name, str(budget.blas_threads))
+    return budget
+
+
+def apply_torch_threads(budget: Optional[CpuBudget]) -> None:
+    """Size torch's pools; call right after importing torch, before any inference."""
+    if budget is None:
+        return
+    import torch
+
+    torch.set_num_threads(budget.torch_intra_op_threads)
+    try:
+        torch.set_num_interop_threads(budget.torch_inter_op_threads)
+    except RuntimeError:
+        # Can only be set once, before the first inter-op parallel work in the process.
+        logger.debug("torch inter-op threads already fixed at %d", torch.get_num_interop_threads())
+
+
+def apply_threadpool_size(budget: Optional[CpuBudget]) -> None:
+    """Resize the anyio pool that run_in_threadpool / to_thread share (event loop only)."""
+    if budget is None or not budget.threadpool_size:
+        return
+    import anyio.to_thread
+
+    anyio.to_thread.current_default_thread_limiter().total_tokens = budget.threadpool_size
@@ -0,0 +1,179 @@
+"""
+Per-request deadlines and cooperative cancellation.
+
+The deadline middleware attaches a `Deadline` to every request (from the
+`x-request-timeout-ms` header, capped per route) and binds it to a context variable.
+Starlette copies the context into worker threads, so blocking code deep in the services
+can call `check_deadline(stage)` between expensive steps (LangGraph nodes, embedding
+batches, SageMaker invocations) without threading the object through every signature.
+
+Python threads cannot be interrupted, so cancellation is cooperative: routes await the
+worker via `run_with_deadline`, which returns a structured error as soon as the deadline
+passes or the client disconnects, and flags the deadline so the worker stops at its next
+checkpoint instead of making further LLM or model calls nobody will read.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from fastapi import Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+
+from .metrics import CANCELLED_WORK
+
+# nginx's convention for "client closed request"; nobody reads the body, but logs do.
+CLIENT_CLOSED_REQUEST = 499
+
+_CURRENT: contextvars.ContextVar[Optional["Deadline"]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+
+class DeadlineExceeded(Exception):
+    """Raised at a checkpoint once the request's deadline passed or it was cancelled."""
+
+    def __init__(self, stage: str, reason: str = "deadline") -> None:
+        super().__init__(f"Request {reason} during {stage}")
+        self.stage = stage
+        self.reason = reason
+
+
+class Deadline:
+    """Absolute monotonic expiry plus a cancellation flag, shared across threads."""
+
+    def __init__(self, timeout_seconds: float) -> None:
+        self.timeout_seconds = timeout_seconds
+        self.expires_at = time.monotonic() + timeout_seconds
+        self.reason: Optional[str] = None
+        self._cancelled = threading.Event()
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set() or self.expired
+
+    def cancel(self, reason: str) -> None:
+        if not self._cancelled.is_set():
+            self.reason = reason
+            self._cancelled.set()
+
+    def check(self, stage: str) -> None:
+        """Raise DeadlineExceeded (and count the abandoned stage) if we should stop."""
+        if self.cancelled:
+            reason = self.reason or "deadline"
+            CANCELLED_WORK.inc(stage, reason)
+            raise DeadlineExceeded(stage, reason)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _CURRENT.get()
+
+
+def bind_deadline(deadline: Optional[Deadline]) -> contextvars.Token:
+    return _CURRENT.set(deadline)
+
+
+def reset_deadline(token: contextvars.Token) -> None:
+    _CURRENT.reset(token)
+
+
+def check_deadline(stage: str) -> None:
+    """Checkpoint for service code; a no-op outside a request (scripts, warm-up)."""
+    deadline = _CURRENT.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+def _discard_result(task: "asyncio.Future") -> None:
+    # The abandoned worker usually ends in DeadlineExceeded; retrieve it so asyncio does
+    # not log "exception was never retrieved".
+    if not task.cancelled():
+        task.exception()
+
+
+async def run_with_deadline(
+    request: Request, fn: Callable[..., Any], *args: Any, poll_seconds: float = 0.1
+) -> Any:
+    """
+    `run_in_threadpool(fn, *args)` that gives up when the request's deadline passes or
+    the client disconnects, cancelling the worker cooperatively.
+    """
+    deadline: Optional[Deadline] = getattr(request.state, "deadline", None)
+    # Set by the concurrency-limit middleware: worker threads go to higher priority first.
+    gate = getattr(request.state, "pool_gate", None)
+    if gate is not None:
+        try:
+            await gate.acquire(
+                getattr(request.state, "priority", 0),
+                deadline.remaining() if deadline is not None else None,
+            )
+        except asyncio.TimeoutError:
+            deadline.cancel("deadline")
+            CANCELLED_WORK.inc("threadpool_wait", "deadline")
+            raise DeadlineExceeded("threadpool_wait") from None
+    if deadline is None:
+        try:
+            return await run_in_threadpool(fn, *args)
+        finally:
+            if gate is not None:
+                gate.release()
+
+    task = asyncio.ensure_future(run_in_threadpool(fn, *args))
+    if gate is not None:
+        # Released when the thread is done, not when the request stops waiting for it.
+        task.add_done_callback(lambda _: gate.release())
+    try:
+        while True:
+            timeout = min(poll_seconds, deadline.remaining())
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if done:
+                return task.result()
+            if deadline.expired:
+                reason = "deadline"
+            elif await request.is_disconnected():
+                reason = "disconnect"
+            else:
+                continue
+            deadline.cancel(reason)
+            CANCELLED_WORK.inc("request", reason)
+            task.add_done_callback(_discard_result)
+            raise DeadlineExceeded("request", reason)
+    except asyncio.CancelledError:
+        # Server shutdown or the ASGI server cancelled the request task.
+        deadline.cancel("disconnect")
+        task.add_done_callback(_discard_result)
+        raise
+
+
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded) -> JSONResponse:
+    """Structured timeout error in the same shape as the HTTPException details."""
+    deadline: Optional[Deadline] = getattr(request.state, "deadline", None)
+    if exc.reason == "disconnect":
+        status_code = CLIENT_CLOSED_REQUEST
+        code, message = "CLIENT_DISCONNECTED", "Client disconnected; work was cancelled."
+    else:
+        status_code = status.HTTP_504_GATEWAY_TIMEOUT
+        budget = f" of {deadline.timeout_seconds:g}s" if deadline else ""
+        code, message = "DEADLINE_EXCEEDED", f"Request exceeded its deadline{budget}."
+    return JSONResponse(
+        status_code=status_code,
+        content={
+            "detail": {
+                "code": code,
+                "message": message,
+                "stage": exc.stage,
+                "trace_id": str(getattr(request.state, "trace_id", "")),
+            }
+        },
+    )
@@ -1,25 +1,40 @@
 from __future__ import annotations
 
 from functools import lru_cache
+from typing import Optional
 
 from .config import get_settings
-from .services.chat_store import ChatStore, InMemoryChatStore
+from .cpu_budget import cpu_budget
+from .services.chat_store import ChatStore, InMemoryChatStore, RedisChatStore
 from .services.embedding import EmbeddingService
+from .services.feature_store import FeatureStore
 from .services.model import RatingModelService
 from .services.rag import RAGService
+from .services.ranking import RestaurantRanker
+from .services.score_matrix import ScoreMatrix
+from .services.sidecar import SidecarClient
 
 
 @lru_cache(maxsize=1)
 def _chat_store() -> ChatStore:
     """
-    Factory for the conversational memory layer. Defaults to an in-process deque, but this
-    is the single place to swap in Redis or Dynamo without touching routers.
+    Factory for the conversational memory layer. Defaults to an in-process deque;
+    CHAT_CACHE_URL=redis://… shares history across workers and instances.
     """
     settings = get_settings()
     if settings.redis_url == "memory://":
-        return InMemoryChatStore()
-    # Placeholder for Redis/Dynamo integration.
-    return InMemoryChatStore()
+        return InMemoryChatStore(
+            num_shards=settings.chat_store_shards,
+            ttl_seconds=settings.chat_history_ttl_seconds,
+            max_bytes=settings.chat_store_max_bytes,
+        )
+    if settings.redis_url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisChatStore(
+            settings.redis_url,
+            ttl_seconds=settings.chat_history_ttl_seconds,
+            max_connections=settings.chat_store_max_connections,
+        )
+    raise ValueError(f"Unsupported CHAT_CACHE_URL scheme: {settings.redis_url}")
 
 
 @lru_cache(maxsize=1)
@@ -28,13 +43,30 @@ def _rag_service() -> RAGService:
     return RAGService(settings=get_settings(), chat_store=_chat_store())
 
 
+@lru_cache(maxsize=1)
+def _sidecar_client() -> Optional[SidecarClient]:
+    """Connection to the model sidecar, or None when this process owns the models."""
+    settings = get_settings()
+    if not settings.sidecar_socket:
+        return None
+    return SidecarClient(settings.sidecar_socket, settings.sidecar_timeout_seconds)
+
+
 @lru_cache(maxsize=1)
 def _embedding_service() -> EmbeddingService:
     """SentenceTransformer wrapper shared by both training and inference paths."""
     settings = get_settings()
+    sidecar = _sidecar_client()
     return EmbeddingService(
         model_name=settings.rating_embedding_model,
         device=settings.rating_embedding_device,
+        batch_size=settings.rating_embedding_batch_size,
+        coalesce_window_ms=settings.rating_embedding_coalesce_ms,
+        backend="sidecar" if sidecar else settings.rating_embedding_backend,
+        onnx_cache_dir=settings.rating_embedding_onnx_dir,
+        onnx_quantize=settings.rating_embedding_onnx_quantize,
+        cpu_budget=cpu_budget(),
+        sidecar=sidecar,
     )
 
 
@@ -44,6 +76,36 @@ def _rating_service() -> RatingModelService:
     return RatingModelService(
         settings=get_settings(),
         embedding_service=_embedding_service(),
+        sidecar=_sidecar_client(),
+    )
+
+
+@lru_cache(maxsize=1)
+def _feature_store() -> FeatureStore:
+    """Build the id -> feature row indexes once; FeatureStoreRefresher keeps them current."""
+    settings = get_settings()
+    return FeatureStore(data_dir=settings.feature_data_dir, task2_dir=settings.task2_dir)
+
+
+@lru_cache(maxsize=1)
+def _score_matrix() -> Optional[ScoreMatrix]:
+    """Memory-map the offline score matrix (None when disabled)."""
+    settings = get_settings()
+    if not settings.enable_score_matrix:
+        return None
+    return ScoreMatrix(
+        root=settings.score_matrix_dir,
+        check_interval_seconds=settings.feature_store_check_seconds,
+    )
+
+
+@lru_cache(maxsize=1)
+def _restaurant_ranker() -> RestaurantRanker:
+    """Catalog ranking over the feature store and the active rating model."""
+    return RestaurantRanker(
+        feature_store=_feature_store(),
+        model_service=_rating_service(),
+        score_matrix=_score_matrix(),
     )
 
 
@@ -63,3 +125,39 @@ def get_rating_service() -> RatingModelService:
 def get_embedding_service() -> EmbeddingService:
     return _embedding_service()
 
+
+def get_feature_store() -> FeatureStore:
+    return _feature_store()
+
+
+def get_score_matrix() -> Optional[ScoreMatrix]:
+    return _score_matrix()
+
+
+def get_restaurant_ranker() -> RestaurantRanker:
+    return _restaurant_ranker()
+
+
+def loaded_rag_service() -> Optional[RAGService]:
+    """Return the RAG service only if something already built it (never constructs)."""
+    return _rag_service() if _rag_service.cache_info().currsize else None
+
+
+def loaded_rating_service() -> Optional[RatingModelService]:
+    """Return the rating service only if something already built it (never constructs)."""
+    return _rating_service() if _rating_service.cache_info().currsize else None
+
+
+def loaded_embedding_service() -> Optional[EmbeddingService]:
+    """Return the embedding service only if something already built it (never constructs)."""
+    return _embedding_service() if _embedding_service.cache_info().currsize else None
+
+
+def loaded_feature_store() -> Optional[FeatureStore]:
+    """Return the feature store only if something already built it (never constructs)."""
+    return _feature_store() if _feature_store.cache_info().currsize else None
+
+
+def loaded_chat_store() -> Optional[ChatStore]:
+    """Return the chat store only if something already built it (never constructs)."""
+    return _chat_store() if _chat_store.cache_info().currsize else None
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
@@ -7,8 +10,79 @@ from fastapi.responses import RedirectResponse
 from fastapi.staticfiles import StaticFiles
 
 from .config import get_settings
-from .middleware import make_rate_limit_middleware
+from .cpu_budget import apply_process_limits, apply_threadpool_size, cpu_budget
+from .dependencies import loaded_feature_store, loaded_rag_service, loaded_rating_service
+from .deadline import DeadlineExceeded, deadline_exceeded_handler
+from .middleware import (
+    make_concurrency_limit_middleware,
+    make_deadline_middleware,
+    make_metrics_middleware,
+    make_rate_limit_middleware,
+)
+from .profiling import ProfileBudget, ProfileStore, make_profiling_middleware
 from .routers import api_router
+from .routers.metrics import install_gauges
+from .routers.metrics import router as metrics_router
+from .services.feature_store_refresher import FeatureStoreRefresher
+from .services.health_monitor import HealthMonitor
+from .services.model_reloader import ModelReloader
+from .warmup import WarmupState, warm_up_services
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start warming services in the background so the server can answer liveness probes
+    right away while /readyz holds traffic back until every model is loaded. Also owns
+    the background HealthMonitor whose cached snapshot /healthz serves, the
+    ModelReloader that hot-swaps a retrained rating model and the FeatureStoreRefresher
+    that rebuilds the feature store when its data files change.
+    """
+    settings = get_settings()
+    budget = cpu_budget()
+    apply_threadpool_size(budget)
+    if budget is not None:
+        logger.info("CPU budget: %s", budget.as_dict())
+    state = WarmupState()
+    app.state.warmup = state
+    task = None
+    if settings.enable_warmup:
+        task = asyncio.create_task(asyncio.to_thread(warm_up_services, state))
+    else:
+        state.finished = True
+
+    monitor = HealthMonitor(
+        rag_getter=loaded_rag_service,
+        rating_getter=loaded_rating_service,
+        interval_seconds=settings.health_refresh_seconds,
+    )
+    app.state.health_monitor = monitor
+    monitor.start()
+
+    reloader = ModelReloader(
+        rating_getter=loaded_rating_service,
+        interval_seconds=settings.model_reload_interval_seconds,
+    )
+    app.state.model_reloader = reloader
+    reloader.start()
+
+    refresher = FeatureStoreRefresher(
+        store_getter=loaded_feature_store,
+        interval_seconds=settings.feature_store_check_seconds,
+    )
+    app.state.feature_store_refresher = refresher
+    refresher.start()
+    yield
+    await refresher.stop()
+    await reloader.stop()
+    await monitor.stop()
+    # The warm-up runs on a worker thread that cancel() cannot interrupt; this ends
+    # any retry backoff so the thread exits with the process.
+    state.stopped.set()
+    if task and not task.done():
+        task.cancel()
 
 
 def create_app() -> FastAPI:
@@ -17,14 +91,36 @@ def create_app() -> FastAPI:
     Called both by uvicorn and tests, so keep side-effects here.
     """
     settings = get_settings()
+    apply_process_limits()
     app = FastAPI(
         title=settings.api_name,
         version=settings.api_version,
         docs_url="/docs",
         redoc_url="/redoc",
+        lifespan=lifespan,
+    )
+    app.add_exception_handler(DeadlineExceeded, deadline_exceeded_handler)
+    app.middleware("http")(make_deadline_middleware())
+    app.state.profile_store = ProfileStore(
+        max_profiles=settings.profiling_store_size, directory=settings.profiling_dir
+    )
+    # Inside both limiters, so it sees the trace id and never profiles a rejected request.
+    app.middleware("http")(
+        make_profiling_middleware(
+            settings.profiling_admin_key,
+            app.state.profile_store,
+            ProfileBudget(settings.profiling_max_per_minute),
+        )
     )
+    # Inside the rate limiter so 429s never hold a concurrency slot.
+    if settings.concurrency_limit_enabled:
+        app.middleware("http")(make_concurrency_limit_middleware())
     app.middleware("http")(make_rate_limit_middleware())
+    # Registered last so it wraps the limiter and also times 429 responses.
+    app.middleware("http")(make_metrics_middleware())
     app.include_router(api_router, prefix=f"/{settings.api_version}")
+    app.include_router(metrics_router)
+    install_gauges()
 
     static_dir = Path(__file__).resolve().parent.parent / "static"
     if static_dir.exists():
@@ -0,0 +1,234 @@
+"""
+Minimal Prometheus-compatible metrics (text exposition format 0.0.4).
+
+Recording is a dict lookup plus a bisect and a few integer adds under a per-metric lock,
+cheap enough for the embedding/predict hot loop. Gauges are callbacks evaluated only at
+scrape time, so cache sizes and queue depth cost nothing between scrapes. We avoid the
+prometheus_client dependency because this is all the API needs.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; spans sub-millisecond cache hits up to multi-second LLM calls.
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for values, total in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, values)} {_fmt(total)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        doc: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._bounds = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        idx = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = ([0] * (len(self._bounds) + 1), [0.0])
+                self._series[labelvalues] = series
+            series[0][idx] += 1
+            series[1][0] += value
+
+    @contextmanager
+    def time(self, *labelvalues: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [
+                (values, list(counts), total[0])
+                for values, (counts, total) in self._series.items()
+            ]
+        for values, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self._bounds + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_fmt(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {cumulative}")
+        return lines
+
+
+class GaugeCallback:
+    """Gauge whose samples are produced on scrape: fn() -> {label values: value}."""
+
+    def __init__(
+        self,
+        name: str,
+        doc: str,
+        fn: Callable[[], Dict[LabelValues, float]],
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._fn = fn
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} gauge"]
+        try:
+            samples = self._fn()
+        except Exception:  # pragma: no cover - a broken gauge must not break the scrape
+            return lines
+        for values, value in samples.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, values)} {_fmt(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUESTS_TOTAL = REGISTRY.register(
+    Counter(
+        "engage_http_requests_total",
+        "HTTP requests by route and status.",
+        ("method", "route", "status"),
+    )
+)
+REQUEST_LATENCY = REGISTRY.register(
+    Histogram(
+        "engage_http_request_duration_seconds",
+        "HTTP request latency.",
+        ("method", "route", "status"),
+    )
+)
+STAGE_LATENCY = REGISTRY.register(
+    Histogram(
+        "engage_stage_duration_seconds",
+        "Latency of internal stages (embedding_encode, xgboost_predict, sagemaker_invoke, "
+        "rag_extract_query, rag_retrieve, rag_generate).",
+        ("stage",),
+    )
+)
+RATE_LIMIT_REJECTIONS = REGISTRY.register(
+    Counter("engage_rate_limit_rejections_total", "Requests rejected with 429.", ("route",))
+)
+LOAD_SHED = REGISTRY.register(
+    Counter(
+        "engage_load_shed_total",
+        "Requests rejected with 503 by the adaptive concurrency limiter.",
+        ("route",),
+    )
+)
+CANCELLED_WORK = REGISTRY.register(
+    Counter(
+        "engage_cancelled_work_total",
+        "Work abandoned because the request deadline passed or the client disconnected.",
+        ("stage", "reason"),
+    )
+)
+# Mutated only from the event loop thread by the metrics middleware.
+IN_FLIGHT = {"requests": 0}
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    STAGE_LATENCY.observe(seconds, stage)
+
+
+def stage_timer(stage: str):
+    """`with stage_timer("xgboost_predict"): ...`"""
+    return STAGE_LATENCY.time(stage)
+
+
+def register_gauge(
+    name: str,
+    doc: str,
+    fn: Callable[[], Dict[LabelValues, float]],
+    labelnames: Sequence[str] = (),
+) -> GaugeCallback:
+    return REGISTRY.register(GaugeCallback(name, doc, fn, labelnames))
+
+
+def render_latest(registry: Optional[Registry] = None) -> str:
+    return (registry or REGISTRY).render()
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
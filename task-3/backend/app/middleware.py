@@ -1,59 +1,207 @@
 from __future__ import annotations
 
+import asyncio
+import heapq
+import itertools
+import logging
+import math
 import time
 import uuid
-from collections import defaultdict, deque
-from typing import Callable, Deque, Dict
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
 
 from fastapi import Request
 from fastapi.responses import JSONResponse
 
 from .config import get_settings
+from .deadline import Deadline, bind_deadline, reset_deadline
+from .metrics import (
+    IN_FLIGHT,
+    LOAD_SHED,
+    RATE_LIMIT_REJECTIONS,
+    REQUEST_LATENCY,
+    REQUESTS_TOTAL,
+    register_gauge,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class RateLimiter:
-    """Sliding-window counter keyed by API key header."""
+    """
+    GCRA (generic cell rate algorithm) limiter keyed by API key header.
+
+    Each key stores a single float, its theoretical arrival time (TAT), instead of a deque
+    of timestamps, so memory is O(1) per key. A key whose TAT is in the past is
+    indistinguishable from a fresh key, which makes idle eviction trivial.
+    """
 
-    def __init__(self, limit_per_minute: int, window_seconds: int) -> None:
+    def __init__(
+        self,
+        limit_per_minute: int,
+        window_seconds: int,
+        sweep_interval_seconds: float = 60.0,
+    ) -> None:
         self.limit_per_minute = limit_per_minute
         self.window_seconds = window_seconds
-        self._bucket: Dict[str, Deque[float]] = defaultdict(deque)
+        # One unit of cost "refills" every emission interval; up to a full window of
+        # units may be spent as a burst.
+        self._emission_interval = window_seconds / max(1, limit_per_minute)
+        self._sweep_interval = sweep_interval_seconds
+        self._next_sweep = time.monotonic() + sweep_interval_seconds
+        self._tat: Dict[str, float] = {}
 
-    def check(self, key: str) -> bool:
+    def __len__(self) -> int:
+        return len(self._tat)
+
+    def _evict_idle(self, now: float) -> None:
+        self._tat = {key: tat for key, tat in self._tat.items() if tat > now}
+        self._next_sweep = now + self._sweep_interval
+
+    async def acquire(self, key: str, cost: float = 1.0) -> float:
         """
-        True → request allowed. False → caller exceeded quota and should be throttled.
+        Spend `cost` units for `key`. Returns 0 when allowed, otherwise the number of
+        seconds the caller should wait before retrying.
         """
-        now = time.time()
-        window_start = now - self.window_seconds
-        window = self._bucket[key]
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._evict_idle(now)
 
-        while window and window[0] < window_start:
-            window.popleft()
+        tat = max(self._tat.get(key, now), now)
+        new_tat = tat + self._emission_interval * cost
+        allow_at = new_tat - self.window_seconds
+        if allow_at > now:
+            return allow_at - now
+        self._tat[key] = new_tat
+        return 0.0
 
-        if len(window) >= self.limit_per_minute:
-            return False
 
-        window.append(now)
-        return True
+_GCRA_LUA = """
+local interval = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval * cost
+local allow_at = new_tat - window
+if allow_at > now then
+  return tostring(allow_at - now)
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return '0'
+"""
 
 
-def make_rate_limit_middleware():
+class RedisRateLimiter:
     """
-    Factory so we can inject Settings into the middleware stack during app creation.
+    Same GCRA as RateLimiter, evaluated atomically in Redis so every worker and instance
+    shares one budget per key. Keys carry a TTL equal to their remaining TAT, so idle
+    keys expire on their own. Works with any Redis-protocol server (redis, valkey,
+    fakeredis).
     """
-    settings = get_settings()
-    limiter = RateLimiter(
+
+    def __init__(
+        self,
+        url: str,
+        limit_per_minute: int,
+        window_seconds: int,
+        key_prefix: str = "ratelimit:",
+        client: Optional[object] = None,
+    ) -> None:
+        self.limit_per_minute = limit_per_minute
+        self.window_seconds = window_seconds
+        self._emission_interval = window_seconds / max(1, limit_per_minute)
+        self._key_prefix = key_prefix
+        if client is None:
+            from redis import asyncio as aioredis
+
+            client = aioredis.from_url(url)
+        self._client = client
+        self._script = self._client.register_script(_GCRA_LUA)
+
+    async def acquire(self, key: str, cost: float = 1.0) -> float:
+        try:
+            wait = await self._script(
+                keys=[self._key_prefix + key],
+                args=[self._emission_interval, self.window_seconds, cost],
+            )
+        except Exception as exc:
+            # Fail open: an unreachable limiter store should not take the API down.
+            logger.warning("Shared rate limiter unavailable, allowing request: %s", exc)
+            return 0.0
+        return float(wait)
+
+
+def route_class(
+    path: str, costs: Mapping[str, float], default: float = 1.0
+) -> Tuple[str, float]:
+    """
+    Match the configured route suffixes and return (suffix or "other", cost). The suffix
+    doubles as a low-cardinality route label for metrics.
+    """
+    for suffix, cost in costs.items():
+        if path.endswith(suffix):
+            return suffix, cost
+    return "other", default
+
+
+def check_route_costs(costs: Mapping[str, float], burst: int) -> None:
+    """
+    Reject costs a caller could never pay: GCRA admits at most `burst` units at once, so a
+    route costing more would answer 429 forever, even to an idle key.
+    """
+    burst = max(1, burst)
+    too_expensive = {suffix: cost for suffix, cost in costs.items() if cost > burst}
+    if too_expensive:
+        raise ValueError(
+            f"Rate-limit route costs {too_expensive} exceed the burst of {burst} units"
+        )
+
+
+def make_rate_limiter(settings=None):
+    """Pick the limiter backend from RATE_LIMIT_URL (memory:// or redis[s]://)."""
+    settings = settings or get_settings()
+    if settings.rate_limit_url == "memory://":
+        return RateLimiter(
+            limit_per_minute=settings.default_rate_limit_per_minute,
+            window_seconds=settings.rate_limit_window_seconds,
+        )
+    return RedisRateLimiter(
+        url=settings.rate_limit_url,
         limit_per_minute=settings.default_rate_limit_per_minute,
         window_seconds=settings.rate_limit_window_seconds,
     )
 
+
+def make_rate_limit_middleware(limiter: Optional[object] = None):
+    """
+    Factory so we can inject Settings into the middleware stack during app creation.
+    """
+    settings = get_settings()
+    if limiter is None:
+        limiter = make_rate_limiter(settings)
+    costs = settings.rate_limit_route_costs
+    check_route_costs(costs, limiter.limit_per_minute)
+    if isinstance(limiter, RateLimiter):
+        register_gauge(
+            "engage_rate_limiter_keys",
+            "API keys with live rate-limit state in this process.",
+            lambda: {(): len(limiter)},
+        )
+
     async def middleware(request: Request, call_next: Callable):
         trace_id = uuid.uuid4()
+        request.state.trace_id = trace_id
         start = time.perf_counter()
         api_key = request.headers.get("x-api-key", "public")
-        if not limiter.check(api_key):
+        route, cost = route_class(request.url.path, costs)
+        retry_after = await limiter.acquire(api_key, cost) if cost > 0 else 0.0
+        if retry_after > 0:
+            RATE_LIMIT_REJECTIONS.inc(route)
             return JSONResponse(
                 status_code=429,
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
                 content={
                     "code": "RATE_LIMIT_EXCEEDED",
                     "message": "Too many requests. Try again soon.",
@@ -68,3 +216,274 @@ def make_rate_limit_middleware():
 
     return middleware
 
+
+class _RouteLimit:
+    """Limit state for one route class; only touched from the event loop thread."""
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max(min_limit, max_limit)
+        self.limit = float(min(max(initial, min_limit), self.max_limit))
+        self.in_flight = 0
+        self.short_rtt = 0.0
+        self.long_rtt = 0.0
+
+    @property
+    def saturated(self) -> bool:
+        return self.in_flight >= int(self.limit)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Gradient-style adaptive concurrency limit per route class (after Netflix's
+    concurrency-limits "Gradient2").
+
+    Each class tracks a short and a long exponential average of its latency. While the
+    short average stays within `tolerance` of the long one the limit grows by about
+    sqrt(limit) per sample; once queueing inflates latency the limit shrinks by the
+    ratio, down to half per step. Errors and timeouts cut it multiplicatively. Requests
+    over their class's limit are rejected immediately rather than queued, so latency for
+    the admitted ones stays bounded. A class is only ever shed by its own limit; the
+    order of `route_limits` is a priority that `PriorityGate` uses to hand out worker
+    threads, so queued predicts start before queued LLM searches.
+    """
+
+    def __init__(
+        self,
+        route_limits: Mapping[str, int],
+        initial_limit: int = 8,
+        min_limit: int = 2,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2,
+        backoff: float = 0.9,
+    ) -> None:
+        self._routes: Dict[str, _RouteLimit] = {
+            suffix: _RouteLimit(initial_limit, min_limit, max_limit)
+            for suffix, max_limit in route_limits.items()
+        }
+        self._order = list(self._routes)
+        self._tolerance = tolerance
+        self._smoothing = smoothing
+        self._backoff = backoff
+
+    def classify(self, path: str) -> Optional[str]:
+        return next((suffix for suffix in self._order if path.endswith(suffix)), None)
+
+    def priority(self, route: str) -> int:
+        """0 for the first (most important) class."""
+        return self._order.index(route)
+
+    def try_acquire(self, route: str) -> bool:
+        state = self._routes[route]
+        if state.saturated:
+            return False
+        state.in_flight += 1
+        return True
+
+    def release(self, route: str, latency: float, failed: bool) -> None:
+        state = self._routes[route]
+        in_flight = state.in_flight
+        state.in_flight -= 1
+        if failed:
+            state.limit = max(state.min_limit, state.limit * self._backoff)
+            return
+
+        if not state.long_rtt:
+            state.short_rtt = state.long_rtt = latency
+        else:
+            state.short_rtt += 0.1 * (latency - state.short_rtt)
+            state.long_rtt += 0.01 * (latency - state.long_rtt)
+            # Let the baseline recover quickly after latency improves for good.
+            if state.long_rtt > 2 * state.short_rtt:
+                state.long_rtt *= 0.95
+        # Under light load latency says nothing about the limit; do not grow it.
+        if in_flight < state.limit / 2:
+            return
+
+        gradient = max(0.5, min(1.0, self._tolerance * state.long_rtt / state.short_rtt))
+        target = state.limit * gradient + math.sqrt(state.limit)
+        limit = state.limit * (1 - self._smoothing) + target * self._smoothing
+        state.limit = min(state.max_limit, max(state.min_limit, limit))
+
+    def retry_after(self, route: str) -> int:
+        """Roughly how long until a slot frees up: the recent latency of the class."""
+        return max(1, math.ceil(self._routes[route].short_rtt))
+
+    def limits(self) -> Dict[Tuple[str, ...], float]:
+        return {(route,): round(state.limit, 2) for route, state in self._routes.items()}
+
+    def in_flight(self) -> Dict[Tuple[str, ...], float]:
+        return {(route,): state.in_flight for route, state in self._routes.items()}
+
+
+class PriorityGate:
+    """
+    Hands out the worker threadpool's slots by priority (lower first, FIFO within one),
+    so when admitted requests outnumber threads the most important class runs first.
+    `run_with_deadline` takes a slot for each dispatch. Only used from the event loop.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = max(1, capacity)
+        self._busy = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, priority: int, timeout: Optional[float] = None) -> None:
+        """Wait for a slot; raises asyncio.TimeoutError after `timeout` seconds."""
+        if self._busy < self.capacity and not self.waiting:
+            self._busy += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        try:
+            await asyncio.wait_for(future, timeout)
+        except BaseException:
+            # A slot handed over just as we gave up must go to the next waiter.
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():  # cancelled waiters are skipped here
+                future.set_result(None)  # the slot passes on; _busy is unchanged
+                return
+        self._busy -= 1
+
+
+def make_concurrency_limit_middleware(limiter: Optional[AdaptiveConcurrencyLimiter] = None):
+    """
+    Shed requests beyond their class's adaptive limit with 503 + Retry-After, and tag
+    admitted ones with the class priority for the worker threadpool gate.
+    """
+    settings = get_settings()
+    if limiter is None:
+        limiter = AdaptiveConcurrencyLimiter(
+            settings.concurrency_route_limits,
+            initial_limit=settings.concurrency_initial_limit,
+            min_limit=settings.concurrency_min_limit,
+        )
+    gates: List[PriorityGate] = []
+    register_gauge(
+        "engage_concurrency_limit",
+        "Current adaptive concurrency limit per route class.",
+        limiter.limits,
+        ("route",),
+    )
+    register_gauge(
+        "engage_concurrency_in_flight",
+        "Admitted in-flight requests per route class.",
+        limiter.in_flight,
+        ("route",),
+    )
+
+    def gate() -> PriorityGate:
+        # Built on the first request: the pool size is only known on the running loop.
+        if not gates:
+            import anyio.to_thread
+
+            tokens = anyio.to_thread.current_default_thread_limiter().total_tokens
+            gates.append(PriorityGate(int(tokens)))
+        return gates[0]
+
+    async def middleware(request: Request, call_next: Callable):
+        route = limiter.classify(request.url.path)
+        if route is None:
+            return await call_next(request)
+        if not limiter.try_acquire(route):
+            LOAD_SHED.inc(route)
+            return JSONResponse(
+                status_code=503,
+                headers={"Retry-After": str(limiter.retry_after(route))},
+                content={
+                    "code": "OVERLOADED",
+                    "message": "Server is at capacity. Try again soon.",
+                    "trace_id": str(getattr(request.state, "trace_id", "")),
+                },
+            )
+        request.state.pool_gate = gate()
+        request.state.priority = limiter.priority(route)
+
+        start = time.perf_counter()
+        failed = True
+        try:
+            response = await call_next(request)
+            # 5xx and deadline (504) responses are the overload signal; 4xx are not.
+            failed = response.status_code >= 500
+            return response
+        finally:
+            limiter.release(route, time.perf_counter() - start, failed)
+
+    return middleware
+
+
+def request_timeout(
+    path: str, header_value: Optional[str], default: float, caps: Mapping[str, float]
+) -> float:
+    """Seconds allowed for a request: the header (ms) if valid, never above the route cap."""
+    cap = next((seconds for suffix, seconds in caps.items() if path.endswith(suffix)), default)
+    if header_value:
+        try:
+            requested = float(header_value) / 1000.0
+        except ValueError:
+            requested = 0.0
+        if requested > 0:
+            return min(requested, cap)
+    return min(default, cap)
+
+
+def make_deadline_middleware():
+    """
+    Attach a Deadline to every request and bind it for the worker threads the request
+    spawns; see app.deadline for how it is enforced.
+    """
+    settings = get_settings()
+
+    async def middleware(request: Request, call_next: Callable):
+        deadline = Deadline(
+            request_timeout(
+                request.url.path,
+                request.headers.get("x-request-timeout-ms"),
+                settings.request_timeout_seconds,
+                settings.request_timeout_caps,
+            )
+        )
+        request.state.deadline = deadline
+        token = bind_deadline(deadline)
+        try:
+            return await call_next(request)
+        finally:
+            reset_deadline(token)
+
+    return middleware
+
+
+def make_metrics_middleware():
+    """
+    Outermost middleware: counts and times every request (including 429s) by route
+    template, so path parameters and unknown URLs never explode label cardinality.
+    """
+
+    async def middleware(request: Request, call_next: Callable):
+        start = time.perf_counter()
+        IN_FLIGHT["requests"] += 1
+        status_code = "500"
+        try:
+            response = await call_next(request)
+            status_code = str(response.status_code)
+            return response
+        finally:
+            IN_FLIGHT["requests"] -= 1
+            route = request.scope.get("route")
+            route_label = getattr(route, "path", None) or "other"
+            elapsed = time.perf_counter() - start
+            REQUESTS_TOTAL.inc(request.method, route_label, status_code)
+            REQUEST_LATENCY.observe(elapsed, request.method, route_label, status_code)
+
+    return middleware
@@ -0,0 +1,259 @@
+"""
+Pre-fork launcher: load the models once, then fork the uvicorn workers.
+
+`uvicorn --workers N` spawns fresh interpreters, so every worker loads its own copy of the
+embedding weights, the rating pipeline and the Chroma index. Here the parent builds those
+services first and forks afterwards, so the workers start with them already in memory and
+share the pages copy-on-write:
+
+- embedding weights are moved into shared-memory segments (`nn.Module.share_memory`), so
+  they stay shared even if a page is touched;
+- the XGBoost trees, the HNSW index and the feature store arrays live in the parent's heap
+  and stay shared as long as nobody writes to them (inference only reads);
+- the score matrix is already a read-only file mapping;
+- `gc.freeze()` moves every preloaded object out of the collector's reach, so a worker's
+  GC pass does not dirty the pages holding them.
+
+Nothing runs inference in the parent. OpenMP, torch and ONNX Runtime thread pools do not
+survive fork(), so each worker sizes and starts its own on its first request (warm-up).
+A worker that hot-reloads a retrained model loads a private copy of it; restart the
+launcher to share the new generation again.
+
+    cd task-3/backend
+    WEB_CONCURRENCY=4 python -m app.preload --host 0.0.0.0 --port 8080
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .config import get_settings
+from .cpu_budget import apply_process_limits, apply_torch_threads, cpu_budget
+from .dependencies import (
+    get_embedding_service,
+    get_feature_store,
+    get_rag_service,
+    get_rating_service,
+    get_score_matrix,
+)
+
+logger = logging.getLogger(__name__)
+
+# A worker that dies this soon after being forked is crash-looping; slow its respawns down.
+MIN_WORKER_LIFETIME_SECONDS = 5.0
+
+# torch's intra-op thread count before the parent pinned it to 1, so workers without a
+# CPU budget get the library default back.
+_torch_threads_before_fork: Optional[int] = None
+
+
+def _preload_rating_model() -> None:
+    get_rating_service()
+
+
+def _preload_embedding_model() -> None:
+    service = get_embedding_service()
+    if service.backend != "torch":
+        # ONNX Runtime sessions own native thread pools that do not survive fork(), and a
+        # sidecar client holds sockets: both are created per worker instead.
+        logger.info("Embedding backend %s is loaded per worker", service.backend)
+        return
+    import torch
+
+    global _torch_threads_before_fork
+    model = service.load()
+    # Copying into shared memory must not start the OpenMP pool in the parent; workers
+    # set their real thread counts after the fork.
+    _torch_threads_before_fork = torch.get_num_threads()
+    torch.set_num_threads(1)
+    model.share_memory()
+
+
+def _preload_chroma() -> None:
+    service = get_rag_service()
+    # Chroma keeps one sqlite connection per thread: open it on a throwaway thread so no
+    # worker ever inherits a connection another process is also using.
+    worker = threading.Thread(target=service.warm_up, name="preload-chroma")
+    worker.start()
+    worker.join()
+
+
+def _preload_feature_store() -> None:
+    settings = get_settings()
+    if settings.enable_feature_store:
+        get_feature_store()
+    get_score_matrix()
+
+
+PRELOAD_STEPS: Dict[str, Callable[[], None]] = {
+    "rating_model": _preload_rating_model,
+    "embedding_model": _preload_embedding_model,
+    "rag_graph": _preload_chroma,
+    "feature_store": _preload_feature_store,
+}
+
+
+def preload(skip: Optional[List[str]] = None) -> Dict[str, int]:
+    """Build every preloadable service in this process; returns milliseconds per step."""
+    timings = {}
+    for name, step in PRELOAD_STEPS.items():
+        if name in (skip or []):
+            continue
+        start = time.perf_counter()
+        step()
+        timings[name] = int((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _bind(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _restore_torch_threads() -> None:
+    """Undo the parent's one-thread pin: the worker's budget, else torch's own default."""
+    budget = cpu_budget()
+    if budget is not None:
+        apply_torch_threads(budget)
+    elif _torch_threads_before_fork is not None:
+        import torch
+
+        torch.set_num_threads(_torch_threads_before_fork)
+
+
+def _run_worker(sock: socket.socket, args: argparse.Namespace) -> None:
+    """Child side of the fork: restore what the parent suspended, then serve."""
+    import uvicorn
+
+    from .main import app
+
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(signum, signal.SIG_DFL)
+    gc.enable()
+    _restore_torch_threads()
+    config = uvicorn.Config(
+        app,
+        log_level=args.log_level,
+        access_log=args.access_log,
+        timeout_keep_alive=args.timeout_keep_alive,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class _Supervisor:
+    """Forks `workers` children on one listening socket and replaces any that die."""
+
+    def __init__(self, sock: socket.socket, args: argparse.Namespace, workers: int) -> None:
+        self._sock = sock
+        self._args = args
+        self._workers = workers
+        self._children: Dict[int, float] = {}  # pid -> fork time
+        self._stopping = False
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(self._sock, self._args)
+            except SystemExit as exc:  # uvicorn exits this way when startup fails
+                code = exc.code if isinstance(exc.code, int) else 1
+            except BaseException:
+                logger.exception("Worker %d crashed", os.getpid())
+                code = 1
+            finally:
+                logging.shutdown()
+                os._exit(code)
+        self._children[pid] = time.monotonic()
+
+    def _forward(self, signum: int, _frame) -> None:
+        if signum in (signal.SIGTERM, signal.SIGINT):
+            self._stopping = True
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM if signum == signal.SIGINT else signum)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, self._forward)
+        for _ in range(self._workers):
+            self._spawn()
+        logger.info("Forked %d workers: %s", self._workers, sorted(self._children))
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self._children.pop(pid, None)
+            if started is None or self._stopping:
+                continue
+            logger.warning("Worker %d exited (status %d); replacing it", pid, status)
+            if time.monotonic() - started < MIN_WORKER_LIFETIME_SECONDS:
+                time.sleep(MIN_WORKER_LIFETIME_SECONDS)
+            if not self._stopping:
+                self._spawn()
+        return 0
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Preload models, then fork uvicorn workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8080")))
+    parser.add_argument(
+        "--skip",
+        action="append",
+        default=[],
+        choices=sorted(PRELOAD_STEPS),
+        help="Leave a component to per-worker lazy loading (repeatable)",
+    )
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-access-log", dest="access_log", action="store_false")
+    parser.add_argument("--timeout-keep-alive", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper())
+    # The worker count drives the CPU budget, which comes from WEB_CONCURRENCY; a
+    # separate flag could only disagree with it. Export its limits before preloading
+    # loads torch and xgboost, so the forked workers inherit them.
+    apply_process_limits()
+    workers = max(1, settings.web_workers)
+    # gRPC (the Gemini clients built with the RAG graph) only survives fork() with this.
+    os.environ.setdefault("GRPC_ENABLE_FORK_SUPPORT", "1")
+    os.environ.setdefault("GRPC_POLL_STRATEGY", "poll")
+
+    # Collection during loading would only move objects around between generations;
+    # freezing afterwards keeps every worker's GC off the preloaded pages.
+    gc.disable()
+    start = time.perf_counter()
+    timings = preload(args.skip)
+    gc.collect()
+    gc.freeze()
+    logger.info(
+        "Preloaded %s in %d ms; forking %d workers",
+        timings,
+        int((time.perf_counter() - start) * 1000),
+        workers,
+    )
+
+    sock = _bind(args.host, args.port)
+    sys.exit(_Supervisor(sock, args, workers).run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Opt-in per-request profiling for production diagnosis.
+
+A request carrying `x-profile: <PROFILING_ADMIN_KEY>` is wrapped in cProfile: the event
+loop part (validation, serialization) in the middleware and the blocking part (sklearn
+pipeline, LangGraph nodes) in the worker thread via `profiled`. The merged pstats are
+kept in a small in-memory LRU (and optionally on disk) keyed by the request's trace id,
+and can be fetched from `/v1/admin/profiles/{trace_id}`. A global budget caps how many
+requests may be profiled per minute, so the header cannot be used to slow the service.
+
+The loop-side profile also samples any other coroutine that runs while the request is
+awaiting; the worker-side profile is exact for the request. Only one request at a time
+owns the loop-side profiler (a second `enable()` on the same thread would silently steal
+the hook before Python 3.12); concurrent profiled requests get the worker side only.
+"""
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import functools
+import hmac
+import io
+import logging
+import marshal
+import pstats
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from fastapi import Request
+
+logger = logging.getLogger(__name__)
+
+# Set for the duration of a profiled request; holds every profiler it created.
+_ACTIVE: contextvars.ContextVar[Optional[List[cProfile.Profile]]] = contextvars.ContextVar(
+    "active_profilers", default=None
+)
+# Held by the request whose profiler is hooked into the event loop thread.
+_LOOP_PROFILER_LOCK = threading.Lock()
+
+
+def admin_key_matches(admin_key: Optional[str], presented: Optional[str]) -> bool:
+    """Constant-time check of a presented admin key; False when profiling is disabled."""
+    if not admin_key or presented is None:
+        return False
+    return hmac.compare_digest(admin_key.encode("utf-8"), presented.encode("utf-8"))
+
+
+class ProfileStore:
+    """Bounded trace_id -> marshalled pstats map, optionally mirrored to `directory`."""
+
+    def __init__(self, max_profiles: int = 32, directory: Optional[Path] = None) -> None:
+        self._max_profiles = max(1, max_profiles)
+        self._directory = directory
+        self._profiles: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, trace_id: str, profilers: List[cProfile.Profile]) -> None:
+        stats = pstats.Stats(profilers[0])
+        for extra in profilers[1:]:
+            stats.add(extra)
+        raw = marshal.dumps(stats.stats)
+        with self._lock:
+            self._profiles[trace_id] = raw
+            while len(self._profiles) > self._max_profiles:
+                self._profiles.popitem(last=False)
+        if self._directory is not None:
+            try:
+                self._directory.mkdir(parents=True, exist_ok=True)
+                (self._directory / f"{trace_id}.prof").write_bytes(raw)
+            except OSError as exc:
+                logger.warning("Could not write profile %s: %s", trace_id, exc)
+
+    def raw(self, trace_id: str) -> Optional[bytes]:
+        with self._lock:
+            return self._profiles.get(trace_id)
+
+    def text(self, trace_id: str, limit: int = 60, sort: str = "cumulative") -> Optional[str]:
+        raw = self.raw(trace_id)
+        if raw is None:
+            return None
+        stream = io.StringIO()
+        stats = pstats.Stats(stream=stream)
+        stats.stats = marshal.loads(raw)
+        stats.total_calls = sum(entry[1] for entry in stats.stats.values())
+        stats.prim_calls = sum(entry[0] for entry in stats.stats.values())
+        stats.total_tt = sum(entry[2] for entry in stats.stats.values())
+        stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+
+class ProfileBudget:
+    """Global token bucket: at most `per_minute` profiled requests across all callers."""
+
+    def __init__(self, per_minute: int) -> None:
+        self._capacity = float(max(0, per_minute))
+        self._tokens = self._capacity
+        self._refill_per_second = self._capacity / 60.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self._capacity, self._tokens + (now - self._updated) * self._refill_per_second
+            )
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+def profiled(fn: Callable) -> Callable:
+    """
+    Wrap a blocking callable so that, when the current request is being profiled, its
+    execution on the worker thread is profiled too. Free when profiling is off.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        active = _ACTIVE.get()
+        if active is None:
+            return fn(*args, **kwargs)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+ allows one profiler per interpreter (sys.monitoring).
+            return fn(*args, **kwargs)
+        active.append(profiler)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+
+    return wrapper
+
+
+def make_profiling_middleware(
+    admin_key: Optional[str], store: ProfileStore, budget: ProfileBudget
+):
+    """Profile requests that present the admin key, within the global budget."""
+
+    async def middleware(request: Request, call_next: Callable):
+        presented = request.headers.get("x-profile")
+        if not admin_key_matches(admin_key, presented) or not budget.take():
+            return await call_next(request)
+
+        trace_id = str(getattr(request.state, "trace_id", "")) or str(time.time_ns())
+        profilers: List[cProfile.Profile] = []
+        token = _ACTIVE.set(profilers)
+        loop_profiler: Optional[cProfile.Profile] = None
+        # Another profiled request may own the loop thread's hook; then this one only
+        # gets its worker-thread profile.
+        if _LOOP_PROFILER_LOCK.acquire(blocking=False):
+            loop_profiler = cProfile.Profile()
+            try:
+                loop_profiler.enable()
+                profilers.append(loop_profiler)
+            except ValueError:
+                # Python 3.12+: some other tool already holds the profiler slot.
+                loop_profiler = None
+                _LOOP_PROFILER_LOCK.release()
+        try:
+            response = await call_next(request)
+        finally:
+            if loop_profiler is not None:
+                loop_profiler.disable()
+                _LOOP_PROFILER_LOCK.release()
+            _ACTIVE.reset(token)
+        if profilers:
+            store.save(trace_id, profilers)
+        response.headers["x-profile-id"] = trace_id
+        return response
+
+    return middleware
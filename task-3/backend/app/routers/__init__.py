@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 
+from .admin import router as admin_router
 from .health import router as health_router
 from .ratings import router as rating_router
 from .restaurants import router as restaurant_router
@@ -9,6 +10,7 @@ api_router = APIRouter()
 api_router.include_router(restaurant_router, prefix="/restaurants", tags=["restaurants"])
 api_router.include_router(rating_router, prefix="/ratings", tags=["ratings"])
 api_router.include_router(health_router, tags=["health"])
+api_router.include_router(admin_router, prefix="/admin", tags=["admin"])
 
 __all__ = ["api_router"]
 
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, Response
+
+from ..config import get_settings
+from ..profiling import admin_key_matches
+
+router = APIRouter()
+
+
+@router.get("/profiles/{trace_id}", include_in_schema=False)
+async def get_profile(
+    trace_id: str,
+    request: Request,
+    format: str = Query("text", pattern="^(text|pstats)$"),
+    limit: int = Query(60, ge=1, le=500),
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|calls)$"),
+    x_profile: str = Header(""),
+):
+    """Fetch a captured profile; `format=pstats` returns a file for `pstats.Stats`/snakeviz."""
+    if not admin_key_matches(get_settings().profiling_admin_key, x_profile):
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "code": "FORBIDDEN",
+                "message": "Profiling is disabled or the admin key is wrong.",
+                "trace_id": str(getattr(request.state, "trace_id", "")),
+            },
+        )
+    store = request.app.state.profile_store
+    if format == "pstats":
+        body = store.raw(trace_id)
+    else:
+        body = store.text(trace_id, limit=limit, sort=sort)
+    if body is None:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "code": "PROFILE_NOT_FOUND",
+                "message": f"No profile stored for trace id {trace_id}.",
+                "trace_id": str(getattr(request.state, "trace_id", "")),
+            },
+        )
+    if format == "pstats":
+        return Response(
+            content=body,
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{trace_id}.prof"'},
+        )
+    return PlainTextResponse(body)
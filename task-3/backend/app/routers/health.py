@@ -1,77 +1,82 @@
-import sys
 import time
 import uuid
 
-import importlib.util
-import sys
-from pathlib import Path
-
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
 
 from ..config import get_settings
-from ..dependencies import get_rag_service, get_rating_service
-from ..schemas import DependencyStatus, HealthPayload, HealthResponse
-from ..services.model import RatingModelService
-from ..services.rag import RAGService
+from ..dependencies import loaded_rag_service, loaded_rating_service
+from ..schemas import (
+    ComponentReadiness,
+    HealthResponse,
+    ReadinessPayload,
+    ReadinessResponse,
+)
+from ..services.health_monitor import HealthMonitor
 
 router = APIRouter()
 
 
-def _load_task1_config(task1_dir: Path):
-    config_path = task1_dir / "config.py"
-    spec = importlib.util.spec_from_file_location(
-        f"task1_config_{hash(config_path)}", config_path
-    )
-    if not spec or not spec.loader:
-        raise ImportError(f"Cannot create spec for {config_path}")
-    module = importlib.util.module_from_spec(spec)
-    sys.modules[spec.name] = module
-    spec.loader.exec_module(module)
-    return module
-
-
-def _ping_chroma(task1_dir: Path) -> DependencyStatus:
-    task1_config = _load_task1_config(task1_dir)
-    client = task1_config.get_chroma_client()
-    ping_start = time.perf_counter()
-    client.heartbeat()
-    return DependencyStatus(
-        status="ok", latency_ms=int((time.perf_counter() - ping_start) * 1000)
-    )
-
-
 @router.get(
     "/healthz",
     response_model=HealthResponse,
     summary="Service health status",
 )
-async def healthz(
-    rag_service: RAGService = Depends(get_rag_service),
-    rating_service: RatingModelService = Depends(get_rating_service),
-) -> HealthResponse:
+async def healthz(request: Request) -> HealthResponse:
     """
-    Ping all major dependencies: Chroma (Task 1), LangGraph, and the rating model.
-    Returns a trace_id so callers can correlate with logs.
+    Report Chroma (Task 1), LangGraph and rating model health from the cached snapshot
+    kept fresh by the background HealthMonitor. Returns a trace_id so callers can
+    correlate with logs.
     """
     trace_id = uuid.uuid4()
     start = time.perf_counter()
 
-    chroma_status = DependencyStatus(status="unknown")
-    rag_status = DependencyStatus(status="ok")
-    rating_status = DependencyStatus(status="ok", detail=rating_service._model_version)
-
-    try:
-        settings = get_settings()
-        chroma_status = _ping_chroma(settings.task1_dir)
-    except Exception as exc:  # pragma: no cover
-        chroma_status = DependencyStatus(status="degraded", detail=str(exc))
+    monitor = getattr(request.app.state, "health_monitor", None)
+    if monitor is None:
+        # App was built without its lifespan (e.g. a bare TestClient); probe once inline.
+        monitor = HealthMonitor(
+            rag_getter=loaded_rag_service,
+            rating_getter=loaded_rating_service,
+            interval_seconds=get_settings().health_refresh_seconds,
+        )
+        request.app.state.health_monitor = monitor
+        await monitor.refresh()
 
-    payload = HealthPayload(
-        status="ok",
-        chroma=chroma_status,
-        rag_graph=rag_status,
-        rating_model=rating_status,
-    )
     latency_ms = int((time.perf_counter() - start) * 1000)
-    return HealthResponse(trace_id=trace_id, latency_ms=latency_ms, data=payload)
+    return HealthResponse(trace_id=trace_id, latency_ms=latency_ms, data=monitor.snapshot)
+
 
+@router.get(
+    "/readyz",
+    response_model=ReadinessResponse,
+    summary="Readiness probe (warm-up complete)",
+    responses={503: {"model": ReadinessResponse}},
+)
+async def readyz(request: Request):
+    """
+    Report whether startup warm-up loaded every required component (`degraded` flags
+    optional ones that did not). Unlike /healthz this never constructs services itself,
+    so it is cheap enough for load-balancer probes.
+    """
+    trace_id = uuid.uuid4()
+    start = time.perf_counter()
+    state = getattr(request.app.state, "warmup", None)
+    ready = bool(state and state.ready)
+    components = {}
+    if state:
+        components = {
+            name: ComponentReadiness(
+                status=c.status, latency_ms=c.latency_ms, detail=c.detail, required=c.required
+            )
+            for name, c in list(state.components.items())
+        }
+    body = ReadinessResponse(
+        trace_id=trace_id,
+        latency_ms=int((time.perf_counter() - start) * 1000),
+        data=ReadinessPayload(
+            ready=ready, degraded=bool(state and state.degraded), components=components
+        ),
+    )
+    if ready:
+        return body
+    return JSONResponse(status_code=503, content=body.model_dump(mode="json"))
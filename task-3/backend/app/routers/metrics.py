@@ -0,0 +1,94 @@
+from typing import Dict
+
+import anyio.to_thread
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..dependencies import (
+    loaded_chat_store,
+    loaded_embedding_service,
+    loaded_rag_service,
+    loaded_rating_service,
+)
+from ..metrics import CONTENT_TYPE, IN_FLIGHT, register_gauge, render_latest
+
+router = APIRouter()
+
+
+def _threadpool_gauge() -> Dict[tuple, float]:
+    # Runs inside the async /metrics handler, i.e. on the event loop anyio expects.
+    stats = anyio.to_thread.current_default_thread_limiter().statistics()
+    return {("busy",): stats.borrowed_tokens, ("waiting",): stats.tasks_waiting}
+
+
+def _cache_entries_gauge() -> Dict[tuple, float]:
+    samples: Dict[tuple, float] = {}
+    embedding = loaded_embedding_service()
+    if embedding is not None:
+        samples[("embedding",)] = embedding.stats()["cache_size"]
+    rag = loaded_rag_service()
+    if rag is not None:
+        samples[("search",)] = rag.cache_stats()["size"]
+    rating = loaded_rating_service()
+    if rating is not None:
+        samples[("prediction",)] = rating.prediction_cache_stats().get("size", 0)
+    chat = loaded_chat_store()
+    if chat is not None and hasattr(chat, "stats"):
+        samples[("chat_conversations",)] = chat.stats()["conversations"]
+    return samples
+
+
+def _cache_hit_rate_gauge() -> Dict[tuple, float]:
+    samples: Dict[tuple, float] = {}
+    rag = loaded_rag_service()
+    if rag is not None:
+        samples[("search",)] = rag.cache_stats()["hit_rate"]
+    rating = loaded_rating_service()
+    if rating is not None:
+        samples[("prediction",)] = rating.prediction_cache_stats().get("hit_rate", 0.0)
+    return samples
+
+
+def _queue_depth_gauge() -> Dict[tuple, float]:
+    embedding = loaded_embedding_service()
+    pending = embedding.stats()["coalesce_pending"] if embedding is not None else 0
+    return {("embedding_coalescer",): pending}
+
+
+def install_gauges() -> None:
+    """Register scrape-time gauges; idempotent because the registry is keyed by name."""
+    register_gauge(
+        "engage_in_flight_requests",
+        "Requests currently being handled.",
+        lambda: {(): IN_FLIGHT["requests"]},
+    )
+    register_gauge(
+        "engage_threadpool_tokens",
+        "Worker threadpool slots in use and tasks waiting for one.",
+        _threadpool_gauge,
+        ("state",),
+    )
+    register_gauge(
+        "engage_queue_depth",
+        "Work waiting in internal batching queues.",
+        _queue_depth_gauge,
+        ("queue",),
+    )
+    register_gauge(
+        "engage_cache_entries",
+        "Entries held by each in-process cache.",
+        _cache_entries_gauge,
+        ("cache",),
+    )
+    register_gauge(
+        "engage_cache_hit_ratio",
+        "Lifetime hit ratio of each response cache.",
+        _cache_hit_rate_gauge,
+        ("cache",),
+    )
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    """Prometheus text exposition of request, stage, cache and limiter metrics."""
+    return PlainTextResponse(render_latest(), media_type=CONTENT_TYPE)
@@ -1,14 +1,47 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 
-from ..dependencies import get_rating_service
-from ..schemas import RatingPredictionRequest, RatingPredictionResponse
-from ..services.model import RatingModelService
+from ..config import get_settings
+from ..deadline import DeadlineExceeded, run_with_deadline
+from ..dependencies import get_feature_store, get_rating_service, get_restaurant_ranker
+from ..profiling import profiled
+from ..schemas import (
+    RatingByIdRequest,
+    RatingPredictionRequest,
+    RatingPredictionResponse,
+    TopRatingsRequest,
+    TopRatingsResponse,
+)
+from ..services.feature_store import FeatureLookupError
+from ..services.model import RatingModelService, RatingResult
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+def _require_feature_store(request: Request, action: str) -> None:
+    if not get_settings().enable_feature_store:
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "code": "FEATURE_STORE_DISABLED",
+                "message": f"Set ENABLE_FEATURE_STORE=true to {action}.",
+                "trace_id": str(getattr(request.state, "trace_id", "")),
+            },
+        )
+
+
+def _features_not_found(request: Request, exc: FeatureLookupError) -> HTTPException:
+    return HTTPException(
+        status_code=404,
+        detail={
+            "code": "FEATURES_NOT_FOUND",
+            "message": str(exc),
+            "trace_id": str(getattr(request.state, "trace_id", "")),
+        },
+    )
+
+
 @router.post(
     "/predict",
     response_model=RatingPredictionResponse,
@@ -16,13 +49,16 @@ logger = logging.getLogger(__name__)
 )
 async def predict_rating(
     payload: RatingPredictionRequest,
+    request: Request,
     model_service: RatingModelService = Depends(get_rating_service),
 ) -> RatingPredictionResponse:
     """Proxy to the Task 2 XGBoost pipeline. Returns latency + trace metadata."""
     try:
-        result = model_service.predict(payload)
-    except HTTPException:
-        # Re-raise structured FastAPI errors from the service layer unchanged.
+        # Run on the worker pool so concurrent embeds can coalesce instead of
+        # serializing on the event loop; gives up at the request deadline.
+        result = await run_with_deadline(request, profiled(model_service.predict), payload)
+    except (HTTPException, DeadlineExceeded):
+        # Re-raise structured errors from the service layer unchanged.
         raise
     except Exception as exc:
         # Log full traceback plus a compact view of the request for CloudWatch debugging.
@@ -45,3 +81,79 @@ async def predict_rating(
         data=result.payload,
     )
 
+
+@router.post(
+    "/predict-by-id",
+    response_model=RatingPredictionResponse,
+    summary="Predict user rating from ids and a date",
+)
+async def predict_rating_by_id(
+    payload: RatingByIdRequest,
+    request: Request,
+    model_service: RatingModelService = Depends(get_rating_service),
+) -> RatingPredictionResponse:
+    """Resolve user, restaurant and as-of trend features server-side, then score."""
+    _require_feature_store(request, "predict by id")
+
+    def score() -> RatingResult:
+        row = get_feature_store().feature_row(
+            payload.user_id, payload.restaurant_id, payload.date, payload.helpful_count
+        )
+        return model_service.predict_features(row, payload)
+
+    try:
+        result = await run_with_deadline(request, profiled(score))
+    except FeatureLookupError as exc:
+        raise _features_not_found(request, exc) from exc
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as exc:
+        logger.exception(
+            "Rating prediction by id FAILED",
+            extra={"user_id": payload.user_id, "restaurant_id": payload.restaurant_id},
+        )
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "code": "PREDICTION_FAILURE",
+                "message": f"Rating prediction crashed: {exc}",
+                "trace_id": str(getattr(request.state, "trace_id", "")),
+            },
+        ) from exc
+
+    return RatingPredictionResponse(
+        trace_id=result.trace_id,
+        latency_ms=result.latency_ms,
+        data=result.payload,
+    )
+
+
+@router.post(
+    "/top",
+    response_model=TopRatingsResponse,
+    summary="Top-k restaurants for a user on a date",
+)
+async def top_restaurants(payload: TopRatingsRequest, request: Request) -> TopRatingsResponse:
+    """Score the (filtered) catalog in one batch and return the k best predicted ratings."""
+    _require_feature_store(request, "rank restaurants")
+    try:
+        result = await run_with_deadline(request, profiled(get_restaurant_ranker().top), payload)
+    except FeatureLookupError as exc:
+        raise _features_not_found(request, exc) from exc
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as exc:
+        logger.exception("Restaurant ranking FAILED", extra={"user_id": payload.user_id})
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "code": "INTERNAL_SERVER_ERROR",
+                "message": f"Restaurant ranking crashed: {exc}",
+            },
+        ) from exc
+
+    return TopRatingsResponse(
+        trace_id=result.trace_id,
+        latency_ms=result.latency_ms,
+        data=result.payload,
+    )
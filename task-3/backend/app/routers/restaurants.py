@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 
+from ..deadline import run_with_deadline
 from ..dependencies import get_rag_service
+from ..profiling import profiled
 from ..schemas import RestaurantSearchRequest, RestaurantSearchResponse
 from ..services.rag import RAGService
 
@@ -13,10 +15,14 @@ router = APIRouter()
     summary="Restaurant RAG search",
 )
 async def search_restaurants(
-    payload: RestaurantSearchRequest, rag_service: RAGService = Depends(get_rag_service)
+    payload: RestaurantSearchRequest,
+    request: Request,
+    rag_service: RAGService = Depends(get_rag_service),
 ) -> RestaurantSearchResponse:
     """Run the Task 1 LangGraph workflow, persisting chat state per conversation id."""
-    result = rag_service.search(payload)
+    # Off the event loop, so concurrent identical searches can share one graph run. If the
+    # client leaves or the deadline passes, the graph stops before its next Gemini call.
+    result = await run_with_deadline(request, profiled(rag_service.search), payload)
     return RestaurantSearchResponse(
         trace_id=result.trace_id,
         latency_ms=result.latency_ms,
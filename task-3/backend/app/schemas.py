@@ -1,8 +1,23 @@
 from __future__ import annotations
 
-from typing import List, Optional
-
-from pydantic import BaseModel, Field, UUID4, conlist, constr
+import base64
+import binascii
+import datetime
+from typing import TYPE_CHECKING, Annotated, Any, Dict, List, Optional, Union
+
+from pydantic import (
+    BaseModel,
+    BeforeValidator,
+    Field,
+    PrivateAttr,
+    UUID4,
+    conlist,
+    constr,
+    model_validator,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
 
 
 # ---- Shared ----
@@ -105,16 +120,85 @@ class ReviewContext(BaseModel):
 
 
 class EmbeddingPayload(BaseModel):
-    review_text_embedding: List[float]
+    """
+    Precomputed review embedding, either as a JSON float list or as a base64-encoded
+    little-endian float32 buffer (`review_text_embedding_b64` + `dimension`). The binary
+    form skips per-element float parsing and is decoded with a single numpy.frombuffer.
+    """
+
+    review_text_embedding: Optional[List[float]] = None
+    review_text_embedding_b64: Optional[str] = None
+    dimension: Optional[int] = Field(default=None, ge=1, le=8192)
     tokenizer_version: Optional[str] = None
 
+    _vector: Optional[np.ndarray] = PrivateAttr(default=None)
+
+    @model_validator(mode="after")
+    def _decode_binary(self) -> "EmbeddingPayload":
+        if self.review_text_embedding_b64 is None:
+            if self.review_text_embedding is None:
+                raise ValueError(
+                    "Provide review_text_embedding or review_text_embedding_b64."
+                )
+            return self
+        if self.review_text_embedding is not None:
+            raise ValueError(
+                "Send either review_text_embedding or review_text_embedding_b64, not both."
+            )
+        if self.dimension is None:
+            raise ValueError("dimension is required with review_text_embedding_b64.")
+        try:
+            raw = base64.b64decode(self.review_text_embedding_b64, validate=True)
+        except (binascii.Error, ValueError) as exc:
+            raise ValueError(f"review_text_embedding_b64 is not valid base64: {exc}") from exc
+        if len(raw) != self.dimension * 4:
+            raise ValueError(
+                f"Expected {self.dimension * 4} bytes for {self.dimension} float32 values, "
+                f"received {len(raw)}."
+            )
+        import numpy as np  # only the binary form needs it
+
+        self._vector = np.frombuffer(raw, dtype="<f4")
+        return self
+
+    def vector(self) -> Optional[Union[List[float], np.ndarray]]:
+        """The embedding in whichever form it arrived (float list or float32 array)."""
+        if self._vector is not None:
+            return self._vector
+        return self.review_text_embedding
+
+
+def _empty_embeddings_as_absent(value: Any) -> Any:
+    """`{}` or empty fields mean "no embedding", so the request falls back to review_text."""
+    if isinstance(value, dict) and not (
+        value.get("review_text_embedding") or value.get("review_text_embedding_b64")
+    ):
+        return None
+    return value
+
+
+OptionalEmbeddings = Annotated[
+    Optional[EmbeddingPayload], BeforeValidator(_empty_embeddings_as_absent)
+]
+
 
 class RatingPredictionRequest(BaseModel):
     restaurant: RestaurantInfo
     user: UserInfo
     review_context: ReviewContext
     review_text: Optional[str] = None
-    embeddings: Optional[EmbeddingPayload] = None
+    embeddings: OptionalEmbeddings = None
+
+
+class RatingByIdRequest(BaseModel):
+    """Lean predict: profiles and trends are resolved server-side from the feature store."""
+
+    user_id: int
+    restaurant_id: int
+    date: datetime.date
+    helpful_count: int = Field(default=0, ge=0)
+    review_text: Optional[str] = None
+    embeddings: OptionalEmbeddings = None
 
 
 class RatingPredictionPayload(BaseModel):
@@ -129,6 +213,44 @@ class RatingPredictionResponse(TraceEnvelope):
     data: RatingPredictionPayload
 
 
+class TopRatingsRequest(BaseModel):
+    """Rank the restaurant catalog for one user on one date."""
+
+    user_id: int
+    date: datetime.date
+    k: int = Field(default=10, ge=1, le=100)
+    cuisine: Optional[str] = Field(default=None, max_length=64)
+    location: Optional[str] = Field(default=None, max_length=128)
+    max_price: Optional[float] = Field(default=None, gt=0)
+    helpful_count: int = Field(default=0, ge=0)
+    # Optional review context; without it every candidate is scored with a zero embedding.
+    review_text: Optional[str] = None
+    embeddings: OptionalEmbeddings = None
+
+
+class RankedRestaurant(BaseModel):
+    restaurant_id: int
+    name: str
+    cuisine: str
+    location: str
+    price_range: Optional[str] = None
+    rating_prediction: float = Field(ge=0, le=5)
+
+
+class TopRatingsPayload(BaseModel):
+    user_id: int
+    date: datetime.date
+    candidates: int = Field(ge=0)
+    results: List[RankedRestaurant]
+    model_version: str
+    # "matrix" when served from the precomputed score matrix, "model" when scored live.
+    source: str
+
+
+class TopRatingsResponse(TraceEnvelope):
+    data: TopRatingsPayload
+
+
 # ---- Health ----
 
 
@@ -148,3 +270,20 @@ class HealthPayload(BaseModel):
 class HealthResponse(TraceEnvelope):
     data: HealthPayload
 
+
+class ComponentReadiness(BaseModel):
+    status: str
+    latency_ms: Optional[int] = None
+    detail: Optional[str] = None
+    required: bool = True
+
+
+class ReadinessPayload(BaseModel):
+    ready: bool
+    # Ready, but an optional component is not loaded (see WARMUP_OPTIONAL_STEPS).
+    degraded: bool = False
+    components: Dict[str, ComponentReadiness]
+
+
+class ReadinessResponse(TraceEnvelope):
+    data: ReadinessPayload
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Callable, Dict, Generic, Hashable, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+
+class TTLCache(Generic[T]):
+    """
+    Thread-safe bounded LRU with an optional per-entry TTL. Counts hits and misses so
+    callers can report effectiveness.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: Optional[float] = None) -> None:
+        self._maxsize = max(1, maxsize)
+        self._ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, Tuple[float, T]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[T]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or (self._ttl_seconds is not None and entry[0] <= now):
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: T) -> None:
+        expires = time.monotonic() + self._ttl_seconds if self._ttl_seconds else 0.0
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SingleFlight(Generic[T]):
+    """
+    Collapse concurrent calls for the same key into one execution (Go's singleflight).
+    The first caller runs `fn`; callers arriving while it is in flight wait for and
+    share its result or exception. Exceptions listed in `retry_on` are specific to the
+    leader (e.g. its caller went away), so followers retry instead of inheriting them.
+    `coalesced` counts callers that waited on another's run, once each.
+    """
+
+    def __init__(self, retry_on: Tuple[Type[BaseException], ...] = ()) -> None:
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._retry_on = retry_on
+        self.coalesced = 0
+
+    def do(
+        self, key: Hashable, fn: Callable[[], T], timeout: Optional[float] = None
+    ) -> Tuple[T, bool]:
+        """
+        Returns (result, shared) where `shared` is True for callers that piggybacked.
+        A follower waits at most `timeout` seconds in total (across retries) and then
+        raises concurrent.futures.TimeoutError; the leader is never timed out here.
+        """
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        counted = False
+        while True:
+            with self._lock:
+                future = self._inflight.get(key)
+                if future is not None:
+                    if not counted:
+                        self.coalesced += 1
+                        counted = True
+                    leader = False
+                else:
+                    future = Future()
+                    self._inflight[key] = future
+                    leader = True
+
+            if leader:
+                break
+            remaining = None
+            if give_up_at is not None:
+                remaining = give_up_at - time.monotonic()
+                if remaining <= 0:
+                    raise FutureTimeout()
+            try:
+                return future.result(timeout=remaining), True
+            except self._retry_on:
+                continue
+
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
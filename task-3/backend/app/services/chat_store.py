@@ -1,12 +1,22 @@
 from __future__ import annotations
 
 import threading
+import time
 from abc import ABC, abstractmethod
-from collections import defaultdict, deque
+from collections import OrderedDict, deque
 from typing import Deque, Dict, List, Optional
 from uuid import UUID
 
 
+def _check_max_history(max_history: int) -> None:
+    if max_history < 1:
+        raise ValueError(f"max_history must be at least 1, got {max_history}")
+
+
+def _size(turn: str) -> int:
+    return len(turn.encode("utf-8"))
+
+
 class ChatStore(ABC):
     @abstractmethod
     def fetch(self, conversation_id: UUID, limit: int = 6) -> List[str]:
@@ -19,26 +29,173 @@ class ChatStore(ABC):
         raise NotImplementedError
 
 
-class InMemoryChatStore(ChatStore):
-    """Simple in-process chat buffer for development."""
+class _Conversation:
+    __slots__ = ("turns", "size", "last_access")
+
+    def __init__(self, max_history: int, now: float) -> None:
+        self.turns: Deque[str] = deque(maxlen=max_history)
+        self.size = 0
+        self.last_access = now
+
+
+class _Shard:
+    """One lock + LRU-ordered map; conversations are pinned to a shard by UUID."""
 
     def __init__(self) -> None:
-        self._store: Dict[UUID, Deque[str]] = defaultdict(lambda: deque(maxlen=6))
-        self._lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.conversations: "OrderedDict[UUID, _Conversation]" = OrderedDict()
+        self.size = 0
+        self.next_sweep = 0.0
+        self.evicted = {"ttl": 0, "memory": 0}
+
+
+class InMemoryChatStore(ChatStore):
+    """
+    In-process chat buffer, lock-striped across `num_shards` so concurrent conversations
+    rarely contend. Idle conversations expire after `ttl_seconds`, and each shard keeps
+    its share of `max_bytes` (UTF-8 size of the stored turns) by evicting
+    least-recently-used conversations.
+    """
+
+    def __init__(
+        self,
+        num_shards: int = 16,
+        ttl_seconds: float = 3600.0,
+        max_bytes: int = 64 * 1024 * 1024,
+        sweep_interval_seconds: float = 30.0,
+    ) -> None:
+        self._shards = [_Shard() for _ in range(max(1, num_shards))]
+        self._ttl_seconds = ttl_seconds
+        self._shard_max_bytes = max(1, max_bytes // len(self._shards))
+        self._sweep_interval = sweep_interval_seconds
+
+    def _shard(self, conversation_id: UUID) -> _Shard:
+        return self._shards[conversation_id.int % len(self._shards)]
+
+    def _drop(self, shard: _Shard, conversation_id: UUID, reason: str) -> None:
+        conversation = shard.conversations.pop(conversation_id)
+        shard.size -= conversation.size
+        shard.evicted[reason] += 1
+
+    def _expire(self, shard: _Shard, now: float) -> None:
+        """Drop idle conversations. LRU order means we can stop at the first live one."""
+        deadline = now - self._ttl_seconds
+        while shard.conversations:
+            conversation_id, conversation = next(iter(shard.conversations.items()))
+            if conversation.last_access > deadline:
+                break
+            self._drop(shard, conversation_id, "ttl")
+        shard.next_sweep = now + self._sweep_interval
 
     def fetch(self, conversation_id: UUID, limit: int = 6) -> List[str]:
-        with self._lock:
-            history = self._store.get(conversation_id)
-            if not history:
+        shard = self._shard(conversation_id)
+        now = time.monotonic()
+        with shard.lock:
+            conversation = shard.conversations.get(conversation_id)
+            if conversation is None:
                 return []
-            return list(history)[-limit:]
+            if conversation.last_access <= now - self._ttl_seconds:
+                self._drop(shard, conversation_id, "ttl")
+                return []
+            conversation.last_access = now
+            shard.conversations.move_to_end(conversation_id)
+            turns = list(conversation.turns)
+        return turns[-limit:] if limit < len(turns) else turns
 
     def append(
         self, conversation_id: UUID, user_turn: str, ai_turn: str, max_history: int = 6
     ) -> None:
-        with self._lock:
-            history = self._store[conversation_id]
-            history.extend([user_turn, ai_turn])
-            history = deque(list(history)[-max_history:], maxlen=max_history)
-            self._store[conversation_id] = history
+        _check_max_history(max_history)
+        shard = self._shard(conversation_id)
+        now = time.monotonic()
+        with shard.lock:
+            if now >= shard.next_sweep:
+                self._expire(shard, now)
+
+            conversation = shard.conversations.get(conversation_id)
+            if conversation is None:
+                conversation = _Conversation(max_history, now)
+                shard.conversations[conversation_id] = conversation
+            else:
+                shard.conversations.move_to_end(conversation_id)
+                if conversation.turns.maxlen != max_history:
+                    conversation.turns = deque(conversation.turns, maxlen=max_history)
+                    before = conversation.size
+                    conversation.size = sum(_size(turn) for turn in conversation.turns)
+                    shard.size += conversation.size - before
+
+            # Account for turns the bounded deque is about to push out, then append in place.
+            for turn in (user_turn, ai_turn):
+                if len(conversation.turns) == conversation.turns.maxlen:
+                    dropped = _size(conversation.turns[0])
+                    conversation.size -= dropped
+                    shard.size -= dropped
+                size = _size(turn)
+                conversation.turns.append(turn)
+                conversation.size += size
+                shard.size += size
+            conversation.last_access = now
+
+            while shard.size > self._shard_max_bytes and len(shard.conversations) > 1:
+                oldest_id = next(iter(shard.conversations))
+                self._drop(shard, oldest_id, "memory")
+
+    def stats(self) -> Dict[str, int]:
+        """Point-in-time counters for monitoring (cheap: one pass over the shards)."""
+        totals = {"conversations": 0, "bytes": 0, "evicted_ttl": 0, "evicted_memory": 0}
+        for shard in self._shards:
+            with shard.lock:
+                totals["conversations"] += len(shard.conversations)
+                totals["bytes"] += shard.size
+                totals["evicted_ttl"] += shard.evicted["ttl"]
+                totals["evicted_memory"] += shard.evicted["memory"]
+        totals["shards"] = len(self._shards)
+        return totals
+
+
+class RedisChatStore(ChatStore):
+    """
+    Shared chat history over the Redis protocol so any worker/instance can continue a
+    conversation. Each conversation is one list stored newest-first: an append is a
+    single LPUSH + LTRIM + EXPIRE pipeline, and fetch is one LRANGE. A supplied
+    `client` must be created with `decode_responses=True`.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ttl_seconds: int = 86400,
+        max_connections: int = 20,
+        key_prefix: str = "chat:",
+        client: Optional[object] = None,
+    ) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._key_prefix = key_prefix
+        if client is None:
+            import redis
+
+            client = redis.Redis(
+                connection_pool=redis.ConnectionPool.from_url(
+                    url, max_connections=max_connections, decode_responses=True
+                )
+            )
+        self._client = client
+
+    def _key(self, conversation_id: UUID) -> str:
+        return f"{self._key_prefix}{conversation_id}"
+
+    def fetch(self, conversation_id: UUID, limit: int = 6) -> List[str]:
+        turns = self._client.lrange(self._key(conversation_id), 0, limit - 1)
+        return list(reversed(turns))
 
+    def append(
+        self, conversation_id: UUID, user_turn: str, ai_turn: str, max_history: int = 6
+    ) -> None:
+        _check_max_history(max_history)
+        key = self._key(conversation_id)
+        with self._client.pipeline(transaction=True) as pipe:
+            # LPUSH inserts left-to-right, so the AI turn ends up at the head.
+            pipe.lpush(key, user_turn, ai_turn)
+            pipe.ltrim(key, 0, max_history - 1)
+            pipe.expire(key, self._ttl_seconds)
+            pipe.execute()
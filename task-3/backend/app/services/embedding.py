@@ -2,26 +2,250 @@ from __future__ import annotations
 
 import hashlib
 import threading
-from typing import Dict, Optional, Tuple
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
-from sentence_transformers import SentenceTransformer
+from ..cpu_budget import CpuBudget, apply_torch_threads
+from ..deadline import (
+    Deadline,
+    DeadlineExceeded,
+    bind_deadline,
+    check_deadline,
+    current_deadline,
+    reset_deadline,
+)
+from ..metrics import CANCELLED_WORK, stage_timer
+from .sidecar import SidecarClient, SidecarEncoder
+
+
+class _Handoff:
+    """Result handed to the next queued caller: lead one round, then wait on `future`."""
+
+    __slots__ = ("future",)
+
+    def __init__(self, future: Future) -> None:
+        self.future = future
+
+
+class _EmbedCoalescer:
+    """
+    Merges single-text `embed` calls from concurrent requests into shared batches.
+
+    The first caller to arrive becomes the leader and encodes one batch. It waits a short
+    window for more callers only when others are already queued and the batch is not yet
+    full; a lone request is encoded at once. After its round the leader hands leadership
+    to the oldest queued caller, so no request keeps encoding for others under sustained
+    load. Followers block on their future (giving up when their request is cancelled,
+    or after `wait_timeout_seconds` without a deadline), so no background thread is
+    needed. Entries whose requests were cancelled while queued are never encoded.
+    """
+
+    def __init__(
+        self,
+        encode_batch: Callable[[List[str]], List[list]],
+        max_batch: int,
+        window_seconds: float,
+        wait_timeout_seconds: float = 30.0,
+    ) -> None:
+        self._encode_batch = encode_batch
+        self._max_batch = max(1, max_batch)
+        self._window_seconds = max(0.0, window_seconds)
+        self._wait_timeout_seconds = wait_timeout_seconds
+        self._pending: List[Tuple[str, Future, Optional[Deadline]]] = []
+        self._leader_active = False
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def submit(self, text: str) -> list:
+        future: Future = Future()
+        deadline = current_deadline()
+        with self._lock:
+            self._pending.append((text, future, deadline))
+            is_leader = not self._leader_active
+            if is_leader:
+                self._leader_active = True
+
+        while True:
+            if is_leader:
+                self._drain()
+            result = self._wait(future, deadline)
+            if not isinstance(result, _Handoff):
+                return result
+            # The previous leader finished its round; this caller encodes the next one.
+            future, is_leader = result.future, True
+
+    def _wait(self, future: Future, deadline: Optional[Deadline]):
+        try:
+            if deadline is None:
+                try:
+                    return future.result(timeout=self._wait_timeout_seconds)
+                except FutureTimeout:
+                    raise DeadlineExceeded("embedding_wait", "timeout") from None
+            # Followers poll so a cancelled request stops waiting on someone else's batch.
+            while True:
+                try:
+                    return future.result(timeout=min(0.1, deadline.remaining()))
+                except FutureTimeout:
+                    deadline.check("embedding_wait")
+        except DeadlineExceeded:
+            self._abandon(future)
+            raise
+
+    def _abandon(self, future: Future) -> None:
+        """Drop a caller that stopped waiting, passing on leadership if it just got it."""
+        with self._lock:
+            handed = (
+                future.done()
+                and future.exception() is None
+                and isinstance(future.result(), _Handoff)
+            )
+            if handed:
+                future = future.result().future
+            self._pending = [entry for entry in self._pending if entry[1] is not future]
+            if handed:
+                self._hand_off()
+
+    def _hand_off(self) -> None:
+        """Promote the oldest queued caller, or stand down when the queue is empty."""
+        if not self._pending:
+            self._leader_active = False
+            return
+        text, future, deadline = self._pending[0]
+        successor: Future = Future()
+        self._pending[0] = (text, successor, deadline)
+        future.set_result(_Handoff(successor))
+
+    def _drain(self) -> None:
+        try:
+            with self._lock:
+                contended = 1 < len(self._pending) < self._max_batch
+            if self._window_seconds and contended:
+                time.sleep(self._window_seconds)
+            with self._lock:
+                batch = self._pending[: self._max_batch]
+                del self._pending[: self._max_batch]
+            # Texts whose requests were already abandoned are not worth encoding.
+            live = []
+            for text, future, deadline in batch:
+                if deadline is not None and deadline.cancelled:
+                    reason = deadline.reason or "deadline"
+                    CANCELLED_WORK.inc("embedding_encode", reason)
+                    future.set_exception(DeadlineExceeded("embedding_encode", reason))
+                else:
+                    live.append((text, future))
+            if live:
+                self._encode(live)
+        finally:
+            with self._lock:
+                self._hand_off()
+
+    def _encode(self, live: List[Tuple[str, Future]]) -> None:
+        # The leader encodes for everyone, so its own deadline must not apply.
+        token = bind_deadline(None)
+        try:
+            vectors = self._encode_batch([text for text, _ in live])
+        except Exception as exc:
+            for _, future in live:
+                future.set_exception(exc)
+            return
+        finally:
+            reset_deadline(token)
+        for (_, future), vector in zip(live, vectors):
+            future.set_result(vector)
 
 
 class EmbeddingService:
     """Lazy SentenceTransformer wrapper with simple text caching."""
 
-    def __init__(self, model_name: str, device: str = "cpu") -> None:
+    def __init__(
+        self,
+        model_name: str,
+        device: str = "cpu",
+        batch_size: int = 32,
+        coalesce_window_ms: float = 0.0,
+        backend: str = "torch",
+        onnx_cache_dir: Optional[Path] = None,
+        onnx_quantize: bool = False,
+        cpu_budget: Optional[CpuBudget] = None,
+        sidecar: Optional[SidecarClient] = None,
+    ) -> None:
+        if backend not in {"torch", "onnx", "sidecar"}:
+            raise ValueError(
+                f"Unknown embedding backend '{backend}'. Use 'torch', 'onnx' or 'sidecar'."
+            )
+        if backend == "onnx" and onnx_cache_dir is None:
+            raise ValueError("The onnx embedding backend requires onnx_cache_dir.")
+        if backend == "sidecar" and sidecar is None:
+            raise ValueError("The sidecar embedding backend requires a SidecarClient.")
         self._model_name = model_name
         self._device = device
-        self._model: Optional[SentenceTransformer] = None
+        self._batch_size = max(1, batch_size)
+        self._backend = backend
+        self._onnx_cache_dir = onnx_cache_dir
+        self._onnx_quantize = onnx_quantize
+        self._cpu_budget = cpu_budget
+        self._sidecar = sidecar
+        self._model = None
         self._cache: Dict[str, Tuple[str, list]] = {}
         self._lock = threading.Lock()
+        # Serializes the one-off ONNX export without holding `_lock`, which cache
+        # writes need.
+        self._export_lock = threading.Lock()
+        # Coalescing only pays off when requests run on worker threads, so a zero
+        # window keeps the old direct path for scripts and single-threaded callers.
+        self._coalescer: Optional[_EmbedCoalescer] = None
+        if coalesce_window_ms > 0:
+            self._coalescer = _EmbedCoalescer(
+                self.embed_many,
+                max_batch=self._batch_size,
+                window_seconds=coalesce_window_ms / 1000.0,
+            )
 
-    def _load_model(self) -> SentenceTransformer:
+    def prepare(self) -> None:
+        """
+        Produce the on-disk ONNX artifact if it is missing (a no-op for other backends).
+        Warm-up calls this so the export never runs on a request path.
+        """
+        if self._backend != "onnx":
+            return
+        from .onnx_embedding import ensure_onnx_artifact
+
+        with self._export_lock:
+            ensure_onnx_artifact(self._model_name, self._onnx_cache_dir, self._onnx_quantize)
+
+    def _load_model(self):
         """Instantiate the transformer the first time we need it (thread-safe)."""
         if self._model is None:
+            self.prepare()  # outside `_lock`: an export can take minutes
             with self._lock:
-                if self._model is None:
+                if self._model is None and self._backend == "sidecar":
+                    # Weights live in the sidecar process; this worker only ships text.
+                    self._model = SidecarEncoder(self._sidecar)
+                elif self._model is None and self._backend == "onnx":
+                    # Exports + caches the ONNX artifact on first use; both backends
+                    # expose the same encode() signature.
+                    from .onnx_embedding import load_onnx_model
+
+                    budget = self._cpu_budget
+                    self._model = load_onnx_model(
+                        self._model_name,
+                        self._onnx_cache_dir,
+                        quantize=self._onnx_quantize,
+                        intra_op_threads=budget.torch_intra_op_threads if budget else None,
+                    )
+                elif self._model is None:
+                    # Imported here: sentence_transformers drags in torch, which costs
+                    # seconds and hundreds of MB even when embeddings are never needed.
+                    from sentence_transformers import SentenceTransformer
+
+                    apply_torch_threads(self._cpu_budget)
+
                     # NOTE: We intentionally avoid 'trust_remote_code' here because the
                     # installed sentence-transformers version does not accept that
                     # keyword argument. The configured model_name (e.g. Qwen/Qwen3-Embedding-0.6B)
@@ -32,34 +256,75 @@ class EmbeddingService:
                     )
         return self._model
 
+    @property
+    def backend(self) -> str:
+        return self._backend
+
+    def load(self):
+        """Load the model now rather than on the first embed (pre-fork preloading)."""
+        return self._load_model()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "cache_size": len(self._cache),
+            "coalesce_pending": self._coalescer.pending if self._coalescer else 0,
+        }
+
     @staticmethod
     def _hash_text(text: str) -> str:
         """Content hash used as the cache key."""
         return hashlib.md5(text.encode("utf-8")).hexdigest()
 
+    @staticmethod
+    def _clean(text: str) -> str:
+        text = text.strip()
+        if not text:
+            raise ValueError("Review text cannot be empty when generating embeddings.")
+        return text
+
     def embed(self, text: str) -> list:
         """
         Generate (or retrieve) a normalized embedding for the provided review snippet.
         """
-        text = text.strip()
-        if not text:
-            raise ValueError("Review text cannot be empty when generating embeddings.")
+        text = self._clean(text)
+        cached = self._cache.get(self._hash_text(text))
+        if cached is not None:
+            return cached[1]
 
-        text_hash = self._hash_text(text)
+        if self._coalescer is not None:
+            return self._coalescer.submit(text)
+        return self.embed_many([text])[0]
 
-        if text_hash in self._cache:
-            return self._cache[text_hash][1]
+    def embed_many(self, texts: Sequence[str]) -> List[list]:
+        """
+        Embed several snippets at once, preserving input order.
 
-        model = self._load_model()
-        vector = model.encode(
-            [text],
-            batch_size=1,
-            show_progress_bar=False,
-            convert_to_numpy=True,
-            normalize_embeddings=True,
-        )[0].tolist()
+        Cache hits and duplicates are resolved first; the remaining texts are sorted by
+        length so each batch pads to similar sizes, then encoded in a single call.
+        """
+        cleaned = [self._clean(text) for text in texts]
+        hashes = [self._hash_text(text) for text in cleaned]
 
-        with self._lock:
-            self._cache[text_hash] = (text, vector)
-        return vector
+        # Plain dict reads are atomic in CPython, so lookups skip the lock entirely.
+        misses: Dict[str, str] = {}
+        for text, text_hash in zip(cleaned, hashes):
+            if text_hash not in self._cache and text_hash not in misses:
+                misses[text_hash] = text
+
+        if misses:
+            check_deadline("embedding_encode")
+            ordered = sorted(misses.items(), key=lambda item: len(item[1]))
+            model = self._load_model()
+            with stage_timer("embedding_encode"):
+                vectors = model.encode(
+                    [text for _, text in ordered],
+                    batch_size=self._batch_size,
+                    show_progress_bar=False,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                ).tolist()
+            with self._lock:
+                for (text_hash, text), vector in zip(ordered, vectors):
+                    self._cache[text_hash] = (text, vector)
 
+        return [self._cache[text_hash][1] for text_hash in hashes]
@@ -0,0 +1,117 @@
+"""
+Compact binary wire format for remote (SageMaker) rating inference.
+
+JSON sends the embedding as hundreds of float literals per row. Here a batch of feature
+rows is packed into one uncompressed `.npz` archive with a fixed column layout:
+
+- `numeric`   float64 (rows, len(NUMERIC_FEATURES))
+- `integer`   int32   (rows, len(INTEGER_FEATURES))
+- `text`      unicode (rows, len(TEXT_FEATURES))
+- `embedding` float32 (rows, dim)
+
+Predictions come back as a float32 `.npy` vector. Both sides use `allow_pickle=False`,
+so decoding never executes code from the wire. The endpoint's inference handler calls
+`decode_features` to rebuild the DataFrame the Task 2 pipeline expects.
+"""
+from __future__ import annotations
+
+import io
+from typing import TYPE_CHECKING, Dict, List, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
+
+NPZ_CONTENT_TYPE = "application/x-npz"
+NPY_CONTENT_TYPE = "application/x-npy"
+LAYOUT_VERSION = 1
+
+NUMERIC_FEATURES = (
+    "helpful_count",
+    "age",
+    "avg_rating_given",
+    "total_reviews_written",
+    "popularity_score",
+    "avg_price",
+    "booking_lead_time_days",
+    "popularity_7_day_avg",
+    "popularity_30_day_avg",
+    "popularity_lag_1",
+    "avg_price_7_day_avg",
+    "popularity_7_day_growth",
+    "price_avg",
+    "price_alignment_score",
+    "user_cuisine_match",
+    "dietary_conflict",
+    "is_local_resident",
+)
+# One-hot encoded at train time from integer values, so they must stay integers.
+INTEGER_FEATURES = ("review_month", "review_day_of_week", "is_holiday")
+TEXT_FEATURES = (
+    "resto_location",
+    "resto_cuisine",
+    "resto_price_bucket",
+    "home_location",
+    "preferred_price_range",
+    "dietary_restrictions",
+    "dining_frequency",
+    "season",
+    "day_type",
+    "weather_impact_category",
+    "resto_description",
+    "resto_amenities",
+    "resto_attributes",
+)
+
+
+def encode_features(rows: Sequence[Dict], embeddings: np.ndarray) -> bytes:
+    """Pack feature rows (see `build_feature_row`) plus their embeddings into npz bytes."""
+    embeddings = np.asarray(embeddings, dtype="<f4")
+    if embeddings.ndim != 2 or embeddings.shape[0] != len(rows):
+        raise ValueError("embeddings must be a (rows, dim) matrix aligned with rows")
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        layout_version=np.array(LAYOUT_VERSION, dtype="<i4"),
+        numeric=np.array([[row[c] for c in NUMERIC_FEATURES] for row in rows], dtype="<f8"),
+        integer=np.array([[row[c] for c in INTEGER_FEATURES] for row in rows], dtype="<i4"),
+        text=np.array([[row[c] for c in TEXT_FEATURES] for row in rows], dtype=np.str_),
+        embedding=embeddings,
+    )
+    return buffer.getvalue()
+
+
+def decode_features(body: bytes, embedding_cols: Sequence[str] = ()) -> "pd.DataFrame":
+    """Inverse of `encode_features`; embedding columns default to `embed_{i}`."""
+    import pandas as pd
+
+    with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+        version = int(archive["layout_version"])
+        if version != LAYOUT_VERSION:
+            raise ValueError(f"Unsupported feature layout version {version}")
+        numeric = archive["numeric"]
+        integer = archive["integer"]
+        text = archive["text"]
+        embedding = archive["embedding"]
+
+    cols = list(embedding_cols) or [f"embed_{i}" for i in range(embedding.shape[1])]
+    if len(cols) != embedding.shape[1]:
+        raise ValueError(f"Expected {len(cols)} embedding values, received {embedding.shape[1]}")
+    frames = [
+        pd.DataFrame(numeric, columns=NUMERIC_FEATURES),
+        pd.DataFrame(integer, columns=INTEGER_FEATURES),
+        pd.DataFrame(text.astype(object), columns=TEXT_FEATURES),
+        pd.DataFrame(embedding, columns=cols),
+    ]
+    return pd.concat(frames, axis=1)
+
+
+def encode_predictions(predictions: Sequence[float]) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, np.asarray(predictions, dtype="<f4"), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def decode_predictions(body: bytes) -> List[float]:
+    return np.load(io.BytesIO(body), allow_pickle=False).astype(float).tolist()
@@ -0,0 +1,345 @@
+"""
+In-memory feature store for id-based rating predictions.
+
+Built from `engagetest/data` with the transforms `engineer_merged_features` itself calls
+(Task 2's `src/transforms.py`, which imports neither torch nor Task 2's `config`), so a
+lean request carrying only user_id, restaurant_id and a date yields the same feature row
+the model was trained on:
+
+- restaurant and user profiles live in columnar numpy arrays with an id -> row index;
+- trend features are stored per cuisine as a sorted day array plus columns, resolved
+  as-of the request date with one `searchsorted`.
+
+Lookups only read an immutable snapshot. `FeatureStoreRefresher` stats the source files
+on an interval in the background and rebuilds when they change; the snapshot is swapped
+atomically, so the request path never checks files or starts threads.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import json
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, Iterable, Tuple
+
+import numpy as np
+
+from .model import _ensure_task2_on_path
+
+logger = logging.getLogger(__name__)
+
+SOURCE_FILES = ("restaurant.json", "user_data.csv", "dining_trends.csv")
+
+_TREND_NUMERIC = (
+    "popularity_score",
+    "avg_price",
+    "popularity_lag_1",
+    "popularity_7_day_avg",
+    "popularity_30_day_avg",
+    "avg_price_7_day_avg",
+    "popularity_7_day_growth",
+    "booking_lead_time_days",
+)
+_TREND_TEXT = ("season", "day_type", "weather_impact_category")
+
+
+class FeatureLookupError(LookupError):
+    """Unknown id, or no trend history on or before the requested date."""
+
+
+def _missing(value: Any) -> Any:
+    """pandas NA -> float NaN, which the pipeline's imputers treat as missing."""
+    try:
+        return float("nan") if value is None or value != value else value
+    except (TypeError, ValueError):
+        return value
+
+
+@dataclass(frozen=True)
+class _Columns:
+    index: Dict[int, int]
+    columns: Dict[str, np.ndarray]
+
+    def row(self, key: int, kind: str) -> int:
+        try:
+            return self.index[key]
+        except KeyError:
+            raise FeatureLookupError(f"Unknown {kind} id {key}.") from None
+
+
+@dataclass(frozen=True)
+class _Trend:
+    days: np.ndarray  # datetime64[D], ascending
+    columns: Dict[str, np.ndarray]
+
+
+@dataclass(frozen=True)
+class FeatureSnapshot:
+    restaurants: _Columns
+    users: _Columns
+    trends: Dict[str, _Trend]
+    # Lower-cased favourite cuisines per user row.
+    favorite_cuisines: Tuple[frozenset, ...]
+    source_stat: Tuple[Tuple[int, int], ...]
+    built_ms: float
+    # Task 2's src.transforms, for the user x restaurant interaction features.
+    transforms: ModuleType
+
+
+def _source_stat(data_dir: Path) -> Tuple[Tuple[int, int], ...]:
+    stats = []
+    for name in SOURCE_FILES:
+        stat = (data_dir / name).stat()
+        stats.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(stats)
+
+
+def build_snapshot(data_dir: Path, task2_dir: Path) -> FeatureSnapshot:
+    """Read the source files and run Task 2's transforms once into lookup arrays."""
+    import pandas as pd
+
+    _ensure_task2_on_path(task2_dir)
+    from src import transforms
+
+    start = time.perf_counter()
+    source_stat = _source_stat(data_dir)
+    with open(data_dir / "restaurant.json", "r") as handle:
+        df_restaurants = pd.DataFrame(json.load(handle))
+    df_users = pd.read_csv(data_dir / "user_data.csv")
+    df_trends = transforms.engineer_trend_features(pd.read_csv(data_dir / "dining_trends.csv"))
+
+    restaurants = _Columns(
+        index={int(key): idx for idx, key in enumerate(df_restaurants["id"])},
+        columns={
+            "id": df_restaurants["id"].to_numpy(np.int64),
+            "name": df_restaurants["name"].fillna("").to_numpy(object),
+            "location": df_restaurants["location"].to_numpy(object),
+            "cuisine": df_restaurants["cuisine"].to_numpy(object),
+            "cuisine_key": df_restaurants["cuisine"].astype(str).str.lower().to_numpy(object),
+            "price_range": df_restaurants["price_range"].to_numpy(object),
+            "price_bucket": df_restaurants["price_range"]
+            .apply(transforms.map_restaurant_price_bucket)
+            .to_numpy(object),
+            "price_avg": df_restaurants["price_range"]
+            .apply(transforms.parse_price_range_to_avg)
+            .to_numpy(np.float64),
+            "description": df_restaurants["description"].fillna("").to_numpy(object),
+            "amenities": df_restaurants["amenities"].fillna("").to_numpy(object),
+            "attributes": df_restaurants["attributes"].fillna("").to_numpy(object),
+        },
+    )
+    users = _Columns(
+        index={int(key): idx for idx, key in enumerate(df_users["user_id"])},
+        columns={
+            "age": df_users["age"].to_numpy(np.float64),
+            "avg_rating_given": df_users["avg_rating_given"].to_numpy(np.float64),
+            "total_reviews_written": df_users["total_reviews_written"].to_numpy(np.float64),
+            **{
+                col: df_users[col].to_numpy(object)
+                for col in (
+                    "home_location",
+                    "preferred_price_range",
+                    "dietary_restrictions",
+                    "dining_frequency",
+                )
+            },
+        },
+    )
+    favorite_cuisines = tuple(
+        transforms.favorite_cuisine_set(value) for value in df_users["favorite_cuisines"]
+    )
+
+    trends: Dict[str, _Trend] = {}
+    for cuisine, group in df_trends.groupby("cuisine_type", sort=False):
+        group = group.sort_values("date")
+        columns = {col: group[col].to_numpy(np.float64) for col in _TREND_NUMERIC}
+        columns.update({col: group[col].to_numpy(object) for col in _TREND_TEXT})
+        columns["is_holiday"] = group["is_holiday"].astype(bool).to_numpy()
+        trends[str(cuisine).lower()] = _Trend(
+            days=group["date"].to_numpy("datetime64[D]"), columns=columns
+        )
+
+    return FeatureSnapshot(
+        restaurants=restaurants,
+        users=users,
+        trends=trends,
+        favorite_cuisines=favorite_cuisines,
+        source_stat=source_stat,
+        built_ms=(time.perf_counter() - start) * 1000,
+        transforms=transforms,
+    )
+
+
+class FeatureStore:
+    """
+    Resolves (user_id, restaurant_id, date) into a Task 2 feature row. Requests only
+    read the current snapshot; `FeatureStoreRefresher` swaps in a rebuilt one when the
+    source files change.
+    """
+
+    def __init__(self, data_dir: Path, task2_dir: Path):
+        self._data_dir = data_dir
+        self._task2_dir = task2_dir
+        self._snapshot = build_snapshot(data_dir, task2_dir)
+        self._rebuilding = threading.Lock()
+        logger.info("Feature store built in %.0f ms", self._snapshot.built_ms)
+
+    @property
+    def snapshot(self) -> FeatureSnapshot:
+        return self._snapshot
+
+    def current(self) -> FeatureSnapshot:
+        """The live snapshot. Callers keep the object they got for the whole request."""
+        return self._snapshot
+
+    def check_for_update(self) -> bool:
+        """
+        Rebuild and swap the snapshot if the source files changed. Blocking; runs on a
+        background thread. A failed rebuild keeps the previous snapshot. Returns True
+        when a new snapshot was swapped in.
+        """
+        try:
+            changed = _source_stat(self._data_dir) != self._snapshot.source_stat
+        except OSError:
+            return False
+        if not changed or not self._rebuilding.acquire(blocking=False):
+            return False
+        try:
+            snapshot = build_snapshot(self._data_dir, self._task2_dir)
+        except Exception:
+            logger.exception("Feature store reload failed; keeping the previous snapshot")
+            return False
+        else:
+            self._snapshot = snapshot
+        finally:
+            self._rebuilding.release()
+        logger.info("Feature store reloaded in %.0f ms", snapshot.built_ms)
+        return True
+
+    def stats(self) -> Dict[str, float]:
+        snapshot = self._snapshot
+        return {
+            "restaurants": len(snapshot.restaurants.index),
+            "users": len(snapshot.users.index),
+            "cuisines": len(snapshot.trends),
+            "built_ms": round(snapshot.built_ms, 1),
+        }
+
+    def feature_row(
+        self, user_id: int, restaurant_id: int, date: dt.date, helpful_count: int = 0
+    ) -> Dict[str, Any]:
+        """Same keys as `build_feature_row`, computed as in Task 2's merge."""
+        snap = self.current()
+        r = snap.restaurants.row(restaurant_id, "restaurant")
+        cuisine = snap.restaurants.columns["cuisine"][r]
+        trend = snap.trends.get(str(cuisine).lower())
+        if trend is None:
+            raise FeatureLookupError(f"No dining trends for cuisine {cuisine!r}.")
+        if trend.days[0] > np.datetime64(date, "D"):
+            raise FeatureLookupError(f"No {cuisine} trend data on or before {date}.")
+        block = feature_block(snap, user_id, date, np.array([r]), helpful_count)
+        return {col: _scalar(values[0]) for col, values in block.items()}
+
+
+def _scalar(value: Any) -> Any:
+    """numpy scalar -> Python scalar, so rows stay JSON-serializable (prediction keys)."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def feature_block(
+    snap: FeatureSnapshot,
+    user_id: int,
+    date: dt.date,
+    rows: np.ndarray,
+    helpful_count: int = 0,
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized `FeatureStore.feature_row` for one user against many restaurant rows:
+    restaurant columns are sliced, user values broadcast, and trends resolved once per
+    cuisine. Restaurants without trend history get NaN trends (imputed, as in training's
+    left merge) instead of failing the whole block.
+    """
+    u = snap.users.row(user_id, "user")
+    rest = snap.restaurants.columns
+    user = snap.users.columns
+    n = len(rows)
+    day = np.datetime64(date, "D")
+
+    cuisine_keys = rest["cuisine_key"][rows]
+    trend_values: Dict[str, np.ndarray] = {col: np.full(n, np.nan) for col in _TREND_NUMERIC}
+    trend_values.update({col: np.full(n, np.nan, dtype=object) for col in _TREND_TEXT})
+    trend_values["is_holiday"] = np.zeros(n, dtype=np.int64)
+    for key in np.unique(cuisine_keys):
+        trend = snap.trends.get(key)
+        if trend is None:
+            continue
+        t = int(np.searchsorted(trend.days, day, side="right")) - 1
+        if t < 0:
+            continue
+        mask = cuisine_keys == key
+        for col in (*_TREND_NUMERIC, *_TREND_TEXT, "is_holiday"):
+            trend_values[col][mask] = trend.columns[col][t]
+        growth = float(trend.columns["popularity_7_day_growth"][t])
+        if not math.isfinite(growth):
+            trend_values["popularity_7_day_growth"][mask] = 0.0
+
+    transforms = snap.transforms
+    price_bucket = rest["price_bucket"][rows]
+    preferred = user["preferred_price_range"][u]
+    favorites = snap.favorite_cuisines[u]
+    home = user["home_location"][u]
+
+    def per_row(values: Iterable[int]) -> np.ndarray:
+        return np.fromiter(values, dtype=np.int64, count=n)
+
+    def broadcast(value: Any) -> np.ndarray:
+        return np.full(n, value, dtype=object if isinstance(value, str) else None)
+
+    return {
+        "helpful_count": np.full(n, helpful_count, dtype=np.int64),
+        "age": np.full(n, user["age"][u]),
+        "avg_rating_given": np.full(n, user["avg_rating_given"][u]),
+        "total_reviews_written": np.full(n, user["total_reviews_written"][u]),
+        "popularity_score": trend_values["popularity_score"],
+        "avg_price": trend_values["avg_price"],
+        "booking_lead_time_days": trend_values["booking_lead_time_days"],
+        "popularity_7_day_avg": trend_values["popularity_7_day_avg"],
+        "popularity_30_day_avg": trend_values["popularity_30_day_avg"],
+        "popularity_lag_1": trend_values["popularity_lag_1"],
+        "avg_price_7_day_avg": trend_values["avg_price_7_day_avg"],
+        "popularity_7_day_growth": trend_values["popularity_7_day_growth"],
+        "price_avg": rest["price_avg"][rows],
+        "price_alignment_score": per_row(
+            transforms.price_alignment(preferred, bucket) for bucket in price_bucket
+        ),
+        "user_cuisine_match": per_row(
+            transforms.user_cuisine_match(cuisine, favorites) for cuisine in rest["cuisine"][rows]
+        ),
+        # Not a training column (the pipeline drops it); kept so rows match
+        # `build_feature_row` and the npz wire layout.
+        "dietary_conflict": np.zeros(n),
+        "is_local_resident": per_row(
+            transforms.is_local_resident(home, location) for location in rest["location"][rows]
+        ),
+        "resto_location": rest["location"][rows],
+        "resto_cuisine": rest["cuisine"][rows],
+        "resto_price_bucket": price_bucket,
+        "home_location": broadcast(_missing(home)),
+        "preferred_price_range": broadcast(_missing(preferred)),
+        "dietary_restrictions": broadcast(_missing(user["dietary_restrictions"][u])),
+        "dining_frequency": broadcast(_missing(user["dining_frequency"][u])),
+        "season": trend_values["season"],
+        "day_type": trend_values["day_type"],
+        "weather_impact_category": trend_values["weather_impact_category"],
+        "review_month": np.full(n, date.month, dtype=np.int64),
+        "review_day_of_week": np.full(n, date.weekday(), dtype=np.int64),
+        "is_holiday": trend_values["is_holiday"],
+        "resto_description": rest["description"][rows],
+        "resto_amenities": rest["amenities"][rows],
+        "resto_attributes": rest["attributes"][rows],
+    }
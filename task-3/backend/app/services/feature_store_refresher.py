@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Callable, Optional
+
+from .feature_store import FeatureStore
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureStoreRefresher:
+    """
+    Background watcher that rebuilds the feature store when its source files change.
+
+    Calls `FeatureStore.check_for_update` every `interval_seconds` on a worker thread, so
+    the stat and any rebuild stay off the request path. Like HealthMonitor, it never
+    constructs the store.
+    """
+
+    def __init__(
+        self,
+        store_getter: Callable[[], Optional[FeatureStore]],
+        interval_seconds: float,
+    ) -> None:
+        self._store_getter = store_getter
+        self._interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> bool:
+        store = self._store_getter()
+        if store is None:
+            return False
+        try:
+            return await asyncio.to_thread(store.check_for_update)
+        except Exception:  # pragma: no cover - check_for_update logs its own failures
+            logger.exception("Feature store refresh failed")
+            return False
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval_seconds)
+            await self.refresh()
+
+    def start(self) -> None:
+        if self._task is None and self._interval_seconds > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Callable, Optional
+
+from ..schemas import DependencyStatus, HealthPayload
+from .model import RatingModelService
+from .rag import RAGService
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """
+    Collects dependency health on a fixed interval and caches the latest snapshot.
+
+    Probes only touch services that are already constructed (via the `*_getter`
+    callables, which return None otherwise), so a load-balancer hitting /healthz can never
+    trigger model loading, and the handler itself just returns `snapshot`.
+    """
+
+    def __init__(
+        self,
+        rag_getter: Callable[[], Optional[RAGService]],
+        rating_getter: Callable[[], Optional[RatingModelService]],
+        interval_seconds: float,
+    ) -> None:
+        self._rag_getter = rag_getter
+        self._rating_getter = rating_getter
+        self._interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+        self.snapshot = HealthPayload(
+            status="starting",
+            chroma=DependencyStatus(status="unknown"),
+            rag_graph=DependencyStatus(status="unknown"),
+            rating_model=DependencyStatus(status="unknown"),
+        )
+        self.checked_at: Optional[float] = None
+
+    def collect(self) -> HealthPayload:
+        """Blocking probe of every dependency. Runs on a worker thread."""
+        rag_service = self._rag_getter()
+        rating_service = self._rating_getter()
+
+        if rag_service is None:
+            chroma_status = DependencyStatus(status="not_loaded")
+            rag_status = DependencyStatus(status="not_loaded")
+        else:
+            rag_status = DependencyStatus(status="ok")
+            ping_start = time.perf_counter()
+            try:
+                rag_service.heartbeat()
+                chroma_status = DependencyStatus(
+                    status="ok", latency_ms=int((time.perf_counter() - ping_start) * 1000)
+                )
+            except Exception as exc:
+                chroma_status = DependencyStatus(status="degraded", detail=str(exc))
+
+        if rating_service is None:
+            rating_status = DependencyStatus(status="not_loaded")
+        else:
+            rating_status = DependencyStatus(status="ok", detail=rating_service.model_version)
+
+        statuses = {chroma_status.status, rag_status.status, rating_status.status}
+        overall = "degraded" if "degraded" in statuses else "ok"
+        return HealthPayload(
+            status=overall,
+            chroma=chroma_status,
+            rag_graph=rag_status,
+            rating_model=rating_status,
+        )
+
+    async def refresh(self) -> HealthPayload:
+        try:
+            self.snapshot = await asyncio.to_thread(self.collect)
+            self.checked_at = time.time()
+        except Exception:  # pragma: no cover - keep serving the last good snapshot
+            logger.exception("Health refresh failed")
+        return self.snapshot
+
+    async def _run(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self._interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -1,27 +1,45 @@
 from __future__ import annotations
 
+import hashlib
+import io
 import json
+import logging
 import sys
+import threading
 import time
 import uuid
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
 
-import boto3
-import joblib
 import numpy as np
-import pandas as pd
-from botocore.config import Config
-from botocore.exceptions import BotoCoreError, ClientError
 from fastapi import HTTPException, status
 
 from ..config import Settings
+from ..cpu_budget import cpu_budget
+from ..deadline import DeadlineExceeded, check_deadline
+from ..metrics import stage_timer
 from ..schemas import (
     RatingPredictionPayload,
     RatingPredictionRequest,
 )
+from .cache import TTLCache
 from .embedding import EmbeddingService
+from .feature_codec import (
+    NPY_CONTENT_TYPE,
+    NPZ_CONTENT_TYPE,
+    decode_predictions,
+    encode_features,
+)
+from .sidecar import SidecarClient, SidecarError
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
+
+# joblib/pandas (local mode) and boto3 (SageMaker mode) are imported inside the branch
+# that needs them, so a process only pays for the stack its configuration uses.
+
+logger = logging.getLogger(__name__)
 
 
 def _ensure_task2_on_path(task2_dir: Path) -> None:
@@ -38,6 +56,52 @@ def _ensure_task2_on_path(task2_dir: Path) -> None:
                 sys.modules.pop(module_name, None)
 
 
+def build_feature_row(request: RatingPredictionRequest) -> Dict:
+    """
+    Flatten a request into the Task 2 training columns (embeddings excluded).
+    Shared by the local DataFrame path and the binary remote wire format.
+    """
+    rest = request.restaurant
+    user = request.user
+    ctx = request.review_context
+
+    return {
+        "helpful_count": ctx.helpful_count,
+        "age": user.age,
+        "avg_rating_given": user.avg_rating_given,
+        "total_reviews_written": user.total_reviews_written,
+        "popularity_score": rest.popularity_score,
+        "avg_price": rest.avg_price,
+        "booking_lead_time_days": ctx.booking_lead_time_days,
+        "popularity_7_day_avg": rest.trend_features.popularity_7_day_avg,
+        "popularity_30_day_avg": rest.trend_features.popularity_30_day_avg,
+        "popularity_lag_1": rest.trend_features.popularity_lag_1,
+        "avg_price_7_day_avg": rest.trend_features.avg_price_7_day_avg,
+        "popularity_7_day_growth": rest.trend_features.popularity_7_day_growth,
+        "price_avg": rest.avg_price,
+        "price_alignment_score": user.user_cuisine_match,
+        "user_cuisine_match": user.user_cuisine_match,
+        "dietary_conflict": user.dietary_conflict,
+        "is_local_resident": 1 if user.is_local_resident else 0,
+        "resto_location": rest.location,
+        "resto_cuisine": rest.cuisine,
+        "resto_price_bucket": rest.price_bucket,
+        "home_location": user.home_location,
+        "preferred_price_range": user.preferred_price_range,
+        "dietary_restrictions": user.dietary_restrictions,
+        "dining_frequency": user.dining_frequency,
+        "season": ctx.season,
+        "day_type": ctx.day_type,
+        "weather_impact_category": ctx.weather_impact_category,
+        "review_month": ctx.review_month,
+        "review_day_of_week": ctx.review_day_of_week,
+        "is_holiday": int(ctx.is_holiday),
+        "resto_description": rest.description,
+        "resto_amenities": ", ".join(rest.amenities),
+        "resto_attributes": ", ".join(rest.attributes),
+    }
+
+
 @dataclass
 class RatingResult:
     payload: RatingPredictionPayload
@@ -45,48 +109,129 @@ class RatingResult:
     trace_id: uuid.UUID
 
 
+@dataclass(frozen=True)
+class LoadedModel:
+    """
+    One immutable model generation. Requests read `RatingModelService._active` once and
+    use that object throughout, so a hot swap never changes the model mid-request.
+    """
+
+    pipeline: Any
+    version: str
+    fingerprint: str
+    embedding_cols: List[str]
+    residual_std: Optional[float]
+    # (st_mtime_ns, st_size) of the artifact this generation was read from.
+    artifact_stat: Optional[Tuple[int, int]] = None
+
+
+def load_local_model(model_path: Path, nthread: Optional[int] = None) -> LoadedModel:
+    """
+    Read the joblib artifact once into memory, so the version hash and the unpickled
+    pipeline are guaranteed to come from the same bytes. `nthread` overrides the
+    regressor's saved `n_jobs` (see app/cpu_budget.py).
+    """
+    import joblib
+
+    artifact_stat = model_path.stat()
+    raw = model_path.read_bytes()
+    digest = hashlib.blake2b(raw, digest_size=6).hexdigest()
+    pipeline = joblib.load(io.BytesIO(raw))
+    if nthread:
+        pipeline.steps[-1][1].set_params(n_jobs=nthread)
+    preprocessor = pipeline.named_steps["preprocessor"]
+    embed_entry = next(
+        (entry for entry in preprocessor.transformers if entry[0] == "embed"), None
+    )
+    version = f"{model_path.stem}@{digest}"
+    return LoadedModel(
+        pipeline=pipeline,
+        version=version,
+        fingerprint=version,
+        embedding_cols=list(embed_entry[2]) if embed_entry else [],
+        residual_std=0.3,  # fallback until training exports residual statistics
+        artifact_stat=(artifact_stat.st_mtime_ns, artifact_stat.st_size),
+    )
+
+
+def sidecar_model(info: Dict[str, Any]) -> LoadedModel:
+    """Placeholder generation describing the model the sidecar process holds."""
+    return LoadedModel(
+        pipeline=None,
+        version=info["model_version"],
+        fingerprint=f"sidecar:{info['fingerprint']}",
+        embedding_cols=list(info["embedding_cols"]),
+        residual_std=info.get("residual_std"),
+    )
+
+
+def block_frame(
+    columns: Dict[str, np.ndarray], embedding_vector: Sequence[float], model: LoadedModel
+) -> pd.DataFrame:
+    """Training-schema DataFrame for a feature block, one embedding broadcast to every row."""
+    import pandas as pd
+
+    df = pd.DataFrame(columns)
+    if model.embedding_cols:
+        embed = np.broadcast_to(
+            np.asarray(embedding_vector, dtype=float), (len(df), len(model.embedding_cols))
+        )
+        df = pd.concat([df, pd.DataFrame(embed, columns=model.embedding_cols)], axis=1)
+    return df
+
+
 class RatingModelService:
     """Loads the Task 2 pipeline artifact and exposes a FastAPI-friendly predict method."""
 
-    def __init__(self, settings: Settings, embedding_service: EmbeddingService) -> None:
+    def __init__(
+        self,
+        settings: Settings,
+        embedding_service: EmbeddingService,
+        sidecar: Optional[SidecarClient] = None,
+    ) -> None:
         self._settings = settings
         self._embedding_service = embedding_service
         self._sm_client = None
-
-        if settings.enable_local_model:
+        self._sidecar = sidecar
+        # Memoized raw scores for repeated feature rows (0 disables). Local and sidecar
+        # generations change fingerprint on every swap; a SageMaker endpoint does not,
+        # so its scores only live for the remote TTL.
+        remote = sidecar is None and not settings.enable_local_model
+        ttl = settings.remote_prediction_cache_ttl_seconds if remote else 0
+        self._prediction_cache: Optional[TTLCache[float]] = (
+            TTLCache(maxsize=settings.prediction_cache_size, ttl_seconds=ttl or None)
+            if settings.prediction_cache_size
+            else None
+        )
+        # Guards the two memo counters below; requests update them from many threads.
+        self._memo_stats_lock = threading.Lock()
+        self._inference_ms_ema = 0.0
+        self._saved_ms = 0.0
+        self._model_path: Optional[Path] = None
+        self._reload_lock = threading.Lock()
+        self._pending_stat: Optional[Tuple[int, int]] = None
+        self._failed_stat: Optional[Tuple[int, int]] = None
+        budget = cpu_budget()
+        self._nthread = budget.xgboost_threads if budget else None
+
+        if sidecar is not None:
+            # The sidecar owns the pipeline; this worker only needs its schema and version.
+            self._active = sidecar_model(sidecar.info())
+        elif settings.enable_local_model:
             _ensure_task2_on_path(settings.task2_dir)
-            model_path = settings.task2_dir / settings.rating_model_filename
+            model_path = settings.rating_model_dir / settings.rating_model_filename
             if not model_path.exists():
                 raise FileNotFoundError(
                     f"Rating model not found at {model_path}. Train Task 2 pipeline first."
                 )
-            self._model = joblib.load(model_path)
-            self._model_version = model_path.stem
-            preprocessor = self._model.named_steps["preprocessor"]
-            embed_entry = next(
-                (entry for entry in preprocessor.transformers if entry[0] == "embed"), None
-            )
-            self._embedding_cols: List[str] = embed_entry[2] if embed_entry else []
-
-            # Find the model step (could be 'regressor' or 'classifier' depending on training)
-            model_step_name = None
-            for step_name in self._model.named_steps:
-                if step_name in ['regressor', 'classifier']:
-                    model_step_name = step_name
-                    break
-
-            if model_step_name:
-                model_step = self._model.named_steps[model_step_name]
-                residuals = getattr(model_step, "best_score", None)
-                if hasattr(model_step, "evals_result"):
-                    pass  # placeholder for richer metrics
-            else:
-                residuals = None
-
-            self._residual_std = 0.3  # fallback
+            self._model_path = model_path
+            self._active = load_local_model(model_path, self._nthread)
         else:
             if not settings.sagemaker_endpoint_name:
                 raise ValueError("ENABLE_LOCAL_MODEL=false but no SageMaker endpoint provided.")
+            import boto3
+            from botocore.config import Config
+
             session_kwargs = {}
             if settings.aws_profile:
                 session_kwargs["profile_name"] = settings.aws_profile
@@ -104,21 +249,136 @@ class RatingModelService:
                 endpoint_url=settings.aws_endpoint_url,
                 config=config,
             )
-            self._model = None
-            self._model_version = settings.sagemaker_endpoint_name
-            self._embedding_cols = []
-            self._residual_std = None
+            self._active = LoadedModel(
+                pipeline=None,
+                version=settings.sagemaker_endpoint_name,
+                fingerprint=f"sagemaker:{settings.sagemaker_endpoint_name}",
+                embedding_cols=[],
+                residual_std=None,
+            )
 
-    def _resolve_embedding(self, request: RatingPredictionRequest) -> List[float]:
+    @property
+    def model_version(self) -> str:
+        return self._active.version
+
+    @property
+    def active_model(self) -> LoadedModel:
+        """The current generation; callers should read it once per request."""
+        return self._active
+
+    @property
+    def _npz_remote(self) -> bool:
+        """Scoring goes out as one feature_codec npz batch (sidecar or npz SageMaker)."""
+        if self._sidecar is not None:
+            return True
+        return bool(self._sm_client) and self._settings.sagemaker_wire_format == "npz"
+
+    @property
+    def embedding_dim(self) -> int:
+        """Number of embedding columns the local pipeline expects (0 in remote mode)."""
+        return len(self._active.embedding_cols)
+
+    def _smoke_test(self, candidate: LoadedModel) -> None:
+        """Score one synthetic row with a freshly loaded generation before it goes live."""
+        from ..warmup import _sample_rating_request  # warmup imports this module
+
+        request = _sample_rating_request(len(candidate.embedding_cols))
+        vectors = [request.embeddings.vector()] if request.embeddings else [[]]
+        df = self._rows_to_dataframe([build_feature_row(request)], vectors, candidate)
+        preds = np.asarray(candidate.pipeline.predict(df), dtype=float)
+        if preds.shape != (1,) or not np.isfinite(preds).all():
+            raise ValueError(f"Smoke prediction returned {preds!r}")
+
+    def reload(self) -> str:
+        """
+        Load the artifact on disk, validate it and swap it in. Requests already running
+        keep the generation they started with. Returns the active version; on failure
+        the current model stays live and the error propagates.
+        """
+        if self._sidecar is not None:
+            return self._refresh_sidecar_model() or self.model_version
+        if self._model_path is None:
+            return self.model_version
+        with self._reload_lock:
+            try:
+                candidate = load_local_model(self._model_path, self._nthread)
+                self._smoke_test(candidate)
+            except Exception:
+                try:
+                    stat = self._model_path.stat()
+                    self._failed_stat = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    pass
+                raise
+            previous = self._active
+            if candidate.version == previous.version:
+                self._active = candidate  # same bytes, just refresh the stat
+                return candidate.version
+            if candidate.embedding_cols != previous.embedding_cols:
+                logger.warning(
+                    "Rating model %s expects %d embedding values (was %d)",
+                    candidate.version,
+                    len(candidate.embedding_cols),
+                    len(previous.embedding_cols),
+                )
+            self._swap(previous, candidate)
+            return candidate.version
+
+    def _swap(self, previous: LoadedModel, candidate: LoadedModel) -> None:
+        self._active = candidate
+        # Keys embed the fingerprint, so old scores could never be served; drop them
+        # to free the memory and restart the inference-time estimate.
+        if self._prediction_cache is not None:
+            self._prediction_cache.clear()
+        with self._memo_stats_lock:
+            self._inference_ms_ema = 0.0
+        logger.info("Rating model swapped: %s -> %s", previous.version, candidate.version)
+
+    def _refresh_sidecar_model(self) -> Optional[str]:
+        """Adopt the sidecar's generation when it hot-swapped its model; None if unchanged."""
+        candidate = sidecar_model(self._sidecar.info())
+        previous = self._active
+        if candidate.fingerprint == previous.fingerprint:
+            return None
+        self._swap(previous, candidate)
+        return candidate.version
+
+    def check_for_update(self) -> Optional[str]:
+        """
+        Poll hook: reload once the artifact's (mtime, size) changed and then held still
+        for one poll, so a half-written pickle from run_pipeline.py is never loaded.
+        Artifacts that already failed validation are skipped until they change again.
+        With a sidecar, the sidecar watches the artifact and workers just follow its version.
+        """
+        if self._sidecar is not None:
+            return self._refresh_sidecar_model()
+        if self._model_path is None:
+            return None
+        try:
+            stat = self._model_path.stat()
+        except OSError:
+            return None
+        current = (stat.st_mtime_ns, stat.st_size)
+        if current in (self._active.artifact_stat, self._failed_stat):
+            return None
+        if current != self._pending_stat:
+            self._pending_stat = current
+            return None
+        return self.reload()
+
+    def _resolve_embedding(self, request: RatingPredictionRequest) -> Sequence[float]:
         """
         Accept caller-provided embeddings when available, otherwise create one on the fly.
         """
-        if request.embeddings and request.embeddings.review_text_embedding:
-            return request.embeddings.review_text_embedding
+        vector = request.embeddings.vector() if request.embeddings is not None else None
+        if vector is not None and len(vector):
+            return vector
 
         if request.review_text:
             try:
                 return self._embedding_service.embed(request.review_text)
+            except DeadlineExceeded:
+                raise
             except Exception as exc:
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -136,138 +396,238 @@ class RatingModelService:
             },
         )
 
-    def _to_dataframe(
-        self, request: RatingPredictionRequest, embedding_vector: List[float]
-    ) -> pd.DataFrame:
+    def embedding_for(self, request: Any, model: LoadedModel) -> Sequence[float]:
         """
-        Mirror the feature schema used during training so the sklearn pipeline can run.
+        Embedding for a request whose review context is optional (ranking): a zero vector
+        when it carries neither `review_text` nor `embeddings` and the model is local.
         """
-        rest = request.restaurant
-        user = request.user
-        ctx = request.review_context
-
-        row: Dict[str, Optional[float]] = {
-            "helpful_count": ctx.helpful_count,
-            "age": user.age,
-            "avg_rating_given": user.avg_rating_given,
-            "total_reviews_written": user.total_reviews_written,
-            "popularity_score": rest.popularity_score,
-            "avg_price": rest.avg_price,
-            "booking_lead_time_days": ctx.booking_lead_time_days,
-            "popularity_7_day_avg": rest.trend_features.popularity_7_day_avg,
-            "popularity_30_day_avg": rest.trend_features.popularity_30_day_avg,
-            "popularity_lag_1": rest.trend_features.popularity_lag_1,
-            "avg_price_7_day_avg": rest.trend_features.avg_price_7_day_avg,
-            "popularity_7_day_growth": rest.trend_features.popularity_7_day_growth,
-            "price_avg": rest.avg_price,
-            "price_alignment_score": user.user_cuisine_match,
-            "user_cuisine_match": user.user_cuisine_match,
-            "dietary_conflict": user.dietary_conflict,
-            "is_local_resident": 1 if user.is_local_resident else 0,
-            "resto_location": rest.location,
-            "resto_cuisine": rest.cuisine,
-            "resto_price_bucket": rest.price_bucket,
-            "home_location": user.home_location,
-            "preferred_price_range": user.preferred_price_range,
-            "dietary_restrictions": user.dietary_restrictions,
-            "dining_frequency": user.dining_frequency,
-            "season": ctx.season,
-            "day_type": ctx.day_type,
-            "weather_impact_category": ctx.weather_impact_category,
-            "review_month": ctx.review_month,
-            "review_day_of_week": ctx.review_day_of_week,
-            "is_holiday": int(ctx.is_holiday),
-            "resto_description": rest.description,
-            "resto_amenities": ", ".join(rest.amenities),
-            "resto_attributes": ", ".join(rest.attributes),
-        }
-
-        for idx, col in enumerate(self._embedding_cols):
-            row[col] = embedding_vector[idx]
-
-        return pd.DataFrame([row])
+        if request.embeddings is None and not request.review_text and model.embedding_cols:
+            return np.zeros(len(model.embedding_cols))
+        vector = self._resolve_embedding(request)
+        self._check_embedding_dim(vector, model)
+        return vector
 
-    def predict(self, request: RatingPredictionRequest) -> RatingResult:
+    def _rows_to_dataframe(
+        self,
+        rows: List[Dict],
+        embedding_vectors: Sequence[Sequence[float]],
+        model: LoadedModel,
+    ) -> pd.DataFrame:
         """
-        Core inference entry point. Handles trace bookkeeping + error translation.
+        Mirror the feature schema used during training so the sklearn pipeline can run.
         """
-        trace_id = uuid.uuid4()
-        start = time.perf_counter()
+        import pandas as pd
 
-        embedding_vector = self._resolve_embedding(request)
-        if self._embedding_cols and len(embedding_vector) != len(self._embedding_cols):
+        df = pd.DataFrame(rows)
+        if model.embedding_cols:
+            embed_df = pd.DataFrame(
+                np.asarray(embedding_vectors, dtype=float), columns=model.embedding_cols
+            )
+            df = pd.concat([df, embed_df], axis=1)
+        return df
+
+    def _check_embedding_dim(
+        self, embedding_vector: Sequence[float], model: LoadedModel
+    ) -> None:
+        if model.embedding_cols and len(embedding_vector) != len(model.embedding_cols):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail={
                     "code": "EMBED_DIM_MISMATCH",
                     "message": (
-                        f"Expected {len(self._embedding_cols)} embedding values, "
+                        f"Expected {len(model.embedding_cols)} embedding values, "
                         f"received {len(embedding_vector)}."
                     ),
                 },
             )
 
-        if self._sm_client:
-            pred_raw = self._predict_remote(request, embedding_vector, trace_id)
-        else:
-            df = self._to_dataframe(request, embedding_vector)
-            try:
-                pred_raw = float(self._model.predict(df)[0])
-            except Exception as exc:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail={
-                        "code": "MODEL_INFERENCE_ERROR",
-                        "message": "Prediction failed. Ensure schema matches training data.",
-                        "trace_id": str(trace_id),
-                    },
-                ) from exc
+    def _predict_local(
+        self, df: pd.DataFrame, trace_id: uuid.UUID, model: LoadedModel
+    ) -> List[float]:
+        check_deadline("xgboost_predict")
+        try:
+            with stage_timer("xgboost_predict"):
+                return [float(value) for value in model.pipeline.predict(df)]
+        except Exception as exc:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail={
+                    "code": "MODEL_INFERENCE_ERROR",
+                    "message": "Prediction failed. Ensure schema matches training data.",
+                    "trace_id": str(trace_id),
+                },
+            ) from exc
 
+    def _build_payload(self, pred_raw: float, model: LoadedModel) -> RatingPredictionPayload:
         pred = float(np.clip(pred_raw, 1.0, 5.0))
         rounded_pred = float(np.clip(np.rint(pred), 1.0, 5.0))
 
         ci = None
-        if self._residual_std:
-            lower = max(1.0, pred - 1.96 * self._residual_std)
-            upper = min(5.0, pred + 1.96 * self._residual_std)
+        if model.residual_std:
+            lower = max(1.0, pred - 1.96 * model.residual_std)
+            upper = min(5.0, pred + 1.96 * model.residual_std)
             ci = [lower, upper]
 
-        payload = RatingPredictionPayload(
+        return RatingPredictionPayload(
             rating_prediction=pred,
             rounded_rating=rounded_pred,
             confidence_interval=ci,
-            model_version=self._model_version,
-            inference_mode="remote" if self._sm_client else "local",
+            model_version=model.version,
+            inference_mode=self._inference_mode,
         )
+
+    @property
+    def _inference_mode(self) -> str:
+        if self._sidecar is not None:
+            return "sidecar"
+        return "remote" if self._sm_client else "local"
+
+    def _prediction_key(
+        self, row: Dict, embedding_vector: Sequence[float], model: LoadedModel
+    ) -> bytes:
+        """
+        Stable digest of the canonical feature row, the float32 embedding bytes and the
+        model fingerprint, so a new artifact never serves a stale memoized score.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(model.fingerprint.encode("utf-8"))
+        digest.update(json.dumps(row, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+        digest.update(np.asarray(embedding_vector, dtype="<f4").tobytes())
+        return digest.digest()
+
+    def prediction_cache_stats(self) -> Dict[str, float]:
+        stats = dict(self._prediction_cache.stats()) if self._prediction_cache else {}
+        with self._memo_stats_lock:
+            stats["saved_ms"] = round(self._saved_ms, 1)
+            stats["avg_inference_ms"] = round(self._inference_ms_ema, 3)
+        return stats
+
+    def predict(self, request: RatingPredictionRequest) -> RatingResult:
+        """
+        Core inference entry point. Handles trace bookkeeping + error translation.
+        """
+        trace_id = uuid.uuid4()
+        start = time.perf_counter()
+        model = self._active  # pinned for the whole request, even across a hot swap
+
+        embedding_vector = self._resolve_embedding(request)
+        self._check_embedding_dim(embedding_vector, model)
+
+        row = build_feature_row(request)
+        pred_raw = self._score_row(row, embedding_vector, model, trace_id, request)
+        payload = self._build_payload(pred_raw, model)
         latency_ms = int((time.perf_counter() - start) * 1000)
         return RatingResult(payload=payload, latency_ms=latency_ms, trace_id=trace_id)
 
-    def _predict_remote(
+    def predict_features(self, row: Dict, request: Any) -> RatingResult:
+        """
+        Score a feature row resolved server-side (see FeatureStore.feature_row). `request`
+        only needs `review_text` / `embeddings`, like the lean /predict-by-id body.
+        """
+        trace_id = uuid.uuid4()
+        start = time.perf_counter()
+        model = self._active
+
+        embedding_vector = self._resolve_embedding(request)
+        self._check_embedding_dim(embedding_vector, model)
+        pred_raw = self._score_row(row, embedding_vector, model, trace_id)
+        payload = self._build_payload(pred_raw, model)
+        latency_ms = int((time.perf_counter() - start) * 1000)
+        return RatingResult(payload=payload, latency_ms=latency_ms, trace_id=trace_id)
+
+    def score_block(
         self,
-        request: RatingPredictionRequest,
-        embedding_vector: List[float],
+        columns: Dict[str, np.ndarray],
+        embedding_vector: Sequence[float],
+        model: LoadedModel,
         trace_id: uuid.UUID,
-    ) -> float:
+    ) -> np.ndarray:
         """
-        Invoke the configured SageMaker endpoint and return the raw float prediction.
+        Raw scores for a columnar feature block sharing one embedding: one pipeline call
+        locally, one multi-row npz invocation remotely. Bypasses the per-row memo.
         """
-        if not self._sm_client:
-            raise RuntimeError("Remote inference requested but SageMaker client not initialized.")
-
-        payload = request.model_dump(mode="json")
-        payload.setdefault("embeddings", {})
-        # Always send the embedding vector explicitly so SageMaker does not need to
-        # run an embedding model during inference (keeps latency low and logic aligned
-        # with the local flow).
-        payload["embeddings"]["review_text_embedding"] = embedding_vector
+        n = len(next(iter(columns.values()))) if columns else 0
+        if self._sm_client and not self._npz_remote:
+            raise HTTPException(
+                status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                detail={
+                    "code": "FEATURE_ROW_UNSUPPORTED",
+                    "message": "Remote feature-row scoring needs SAGEMAKER_WIRE_FORMAT=npz.",
+                    "trace_id": str(trace_id),
+                },
+            )
+        if self._npz_remote:
+            keys = list(columns)
+            rows = [dict(zip(keys, values)) for values in zip(*columns.values())]
+            return np.asarray(
+                self._invoke_remote_npz(rows, [embedding_vector] * n, trace_id), dtype=float
+            )
+        df = block_frame(columns, embedding_vector, model)
+        return np.asarray(self._predict_local(df, trace_id, model), dtype=float)
 
+    def _score_row(
+        self,
+        row: Dict,
+        embedding_vector: Sequence[float],
+        model: LoadedModel,
+        trace_id: uuid.UUID,
+        request: Optional[RatingPredictionRequest] = None,
+    ) -> float:
+        """Memoized raw score for one feature row, local or remote."""
+        key = None
+        if self._prediction_cache is not None:
+            key = self._prediction_key(row, embedding_vector, model)
+            pred_raw = self._prediction_cache.get(key)
+            if pred_raw is not None:
+                with self._memo_stats_lock:
+                    self._saved_ms += self._inference_ms_ema
+                return pred_raw
+
+        infer_start = time.perf_counter()
+        if self._npz_remote:
+            pred_raw = self._invoke_remote_npz([row], [embedding_vector], trace_id)[0]
+        elif self._sm_client:
+            if request is None:
+                raise HTTPException(
+                    status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                    detail={
+                        "code": "FEATURE_ROW_UNSUPPORTED",
+                        "message": "Remote feature-row scoring needs SAGEMAKER_WIRE_FORMAT=npz.",
+                        "trace_id": str(trace_id),
+                    },
+                )
+            pred_raw = self._predict_remote(request, embedding_vector, trace_id)
+        else:
+            pred_raw = self._predict_local(
+                self._rows_to_dataframe([row], [embedding_vector], model), trace_id, model
+            )[0]
+        infer_ms = (time.perf_counter() - infer_start) * 1000
+        with self._memo_stats_lock:
+            ema = self._inference_ms_ema
+            self._inference_ms_ema = infer_ms if not ema else 0.9 * ema + 0.1 * infer_ms
+        if key is not None:
+            self._prediction_cache.set(key, pred_raw)
+        return pred_raw
+
+    def _invoke_endpoint(
+        self, body: bytes, content_type: str, accept: str, trace_id: uuid.UUID
+    ) -> bytes:
+        if self._sidecar is not None:
+            return self._invoke_sidecar(body, trace_id)
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        # botocore has no per-call timeout (read_timeout is client-wide), so an abandoned
+        # request is stopped before it spends an invocation.
+        check_deadline("sagemaker_invoke")
         try:
-            response = self._sm_client.invoke_endpoint(
-                EndpointName=self._settings.sagemaker_endpoint_name,
-                ContentType="application/json",
-                Accept="application/json",
-                Body=json.dumps(payload).encode("utf-8"),
-            )
+            with stage_timer("sagemaker_invoke"):
+                response = self._sm_client.invoke_endpoint(
+                    EndpointName=self._settings.sagemaker_endpoint_name,
+                    ContentType=content_type,
+                    Accept=accept,
+                    Body=body,
+                )
+                body = response.get("Body").read()
         except (BotoCoreError, ClientError) as exc:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -277,18 +637,89 @@ class RatingModelService:
                     "trace_id": str(trace_id),
                 },
             ) from exc
+        return body
 
+    def _invoke_sidecar(self, body: bytes, trace_id: uuid.UUID) -> bytes:
         try:
-            body = response.get("Body").read()
-            result = json.loads(body)
-            return float(result["rating_prediction"])
-        except Exception as exc:
+            with stage_timer("sidecar_score"):
+                return self._sidecar.score(body)
+        except SidecarError as exc:
+            unavailable = exc.code in {"SIDECAR_UNAVAILABLE", "SIDECAR_TIMEOUT"}
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                status_code=(
+                    status.HTTP_503_SERVICE_UNAVAILABLE
+                    if unavailable
+                    else status.HTTP_500_INTERNAL_SERVER_ERROR
+                ),
                 detail={
-                    "code": "SAGEMAKER_BAD_RESPONSE",
-                    "message": f"SageMaker returned invalid payload: {exc}",
+                    "code": exc.code if unavailable else "MODEL_INFERENCE_ERROR",
+                    "message": f"Model sidecar failed: {exc.message}",
                     "trace_id": str(trace_id),
                 },
             ) from exc
 
+    @staticmethod
+    def _bad_remote_response(exc: Exception, trace_id: uuid.UUID) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "code": "SAGEMAKER_BAD_RESPONSE",
+                "message": f"SageMaker returned invalid payload: {exc}",
+                "trace_id": str(trace_id),
+            },
+        )
+
+    def _invoke_remote_npz(
+        self,
+        rows: List[Dict],
+        embedding_vectors: Sequence[Sequence[float]],
+        trace_id: uuid.UUID,
+    ) -> List[float]:
+        """Send all rows in one binary invocation (see feature_codec for the layout)."""
+        body = encode_features(rows, np.asarray(embedding_vectors, dtype=np.float32))
+        raw = self._invoke_endpoint(body, NPZ_CONTENT_TYPE, NPY_CONTENT_TYPE, trace_id)
+        try:
+            preds = decode_predictions(raw)
+        except Exception as exc:
+            raise self._bad_remote_response(exc, trace_id) from exc
+        if len(preds) != len(rows):
+            raise self._bad_remote_response(
+                ValueError(f"expected {len(rows)} predictions, got {len(preds)}"), trace_id
+            )
+        return preds
+
+    def _predict_remote(
+        self,
+        request: RatingPredictionRequest,
+        embedding_vector: Sequence[float],
+        trace_id: uuid.UUID,
+    ) -> float:
+        """
+        Invoke the configured SageMaker endpoint and return the raw float prediction.
+        """
+        if not self._sm_client:
+            raise RuntimeError("Remote inference requested but SageMaker client not initialized.")
+
+        if self._settings.sagemaker_wire_format == "npz":
+            return self._invoke_remote_npz(
+                [build_feature_row(request)], [embedding_vector], trace_id
+            )[0]
+
+        payload = request.model_dump(mode="json")
+        # Always send the embedding vector explicitly so SageMaker does not need to
+        # run an embedding model during inference (keeps latency low and logic aligned
+        # with the local flow).
+        tokenizer_version = request.embeddings.tokenizer_version if request.embeddings else None
+        payload["embeddings"] = {
+            "review_text_embedding": np.asarray(embedding_vector, dtype=float).tolist(),
+            "tokenizer_version": tokenizer_version,
+        }
+
+        body = self._invoke_endpoint(
+            json.dumps(payload).encode("utf-8"), "application/json", "application/json", trace_id
+        )
+        try:
+            result = json.loads(body)
+            return float(result["rating_prediction"])
+        except Exception as exc:
+            raise self._bad_remote_response(exc, trace_id) from exc
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import signal
+from typing import Callable, Optional
+
+from .model import RatingModelService
+
+logger = logging.getLogger(__name__)
+
+
+class ModelReloader:
+    """
+    Background watcher that hot-swaps the rating model when its artifact changes.
+
+    Polls `RatingModelService.check_for_update` every `interval_seconds` and also reloads
+    on SIGHUP (e.g. `kill -HUP <pid>` after run_pipeline.py). Loading, the smoke
+    prediction and the swap all run on a worker thread, so requests keep being served by
+    the current model meanwhile. Like HealthMonitor, it never constructs the service.
+    """
+
+    def __init__(
+        self,
+        rating_getter: Callable[[], Optional[RatingModelService]],
+        interval_seconds: float,
+    ) -> None:
+        self._rating_getter = rating_getter
+        self._interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._forced = False
+        self._signal_installed = False
+
+    def trigger(self) -> None:
+        """Request an immediate, unconditional reload (safe from a signal handler)."""
+        self._forced = True
+        self._wakeup.set()
+
+    async def reload_now(self, force: bool = False) -> Optional[str]:
+        service = self._rating_getter()
+        if service is None:
+            return None
+        try:
+            if force:
+                return await asyncio.to_thread(service.reload)
+            return await asyncio.to_thread(service.check_for_update)
+        except Exception:
+            logger.exception("Rating model reload failed; keeping %s", service.model_version)
+            return None
+
+    async def _run(self) -> None:
+        timeout = self._interval_seconds or None
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            forced, self._forced = self._forced, False
+            await self.reload_now(force=forced)
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, self.trigger)
+            self._signal_installed = True
+        except (AttributeError, NotImplementedError, RuntimeError):
+            # No SIGHUP on Windows, and signals need the main thread.
+            pass
+
+    async def stop(self) -> None:
+        if self._signal_installed:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+            self._signal_installed = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
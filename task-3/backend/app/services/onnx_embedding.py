@@ -0,0 +1,371 @@
+"""
+ONNX Runtime backend for the rating embedding model.
+
+The configured SentenceTransformer is exported once to ONNX (optionally with dynamic
+int8 weight quantization) and cached on disk next to its tokenizer and a small manifest.
+Later processes load only the tokenizer + ONNX Runtime session, which skips torch model
+construction on startup and is noticeably cheaper per request on CPU-only instances.
+
+Run as a script to build the artifact and print a parity / latency / memory report:
+
+    python -m app.services.onnx_embedding --quantize --report onnx_report.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+MANIFEST_NAME = "manifest.json"
+FP32_NAME = "model.onnx"
+INT8_NAME = "model.int8.onnx"
+
+PARITY_TEXTS = [
+    "Great food and friendly staff, would come back.",
+    "The biryani was cold and the service painfully slow.",
+    "Lovely terrace with a view of the marina, a bit pricey.",
+    "Average experience overall.",
+    "Best shawarma in Sharjah, hands down!",
+]
+
+
+def artifact_dir(cache_root: Path, model_name: str, quantize: bool) -> Path:
+    """Stable per-model cache folder, e.g. `<root>/all-MiniLM-L6-v2-int8`."""
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", model_name).strip("_")
+    return cache_root / f"{slug}-{'int8' if quantize else 'fp32'}"
+
+
+# Pooling layer flags reproduced by `OnnxEmbeddingModel._pool`.
+_POOLING_MODES = {
+    "pooling_mode_cls_token": "cls",
+    "pooling_mode_lasttoken": "lasttoken",
+    "pooling_mode_mean_tokens": "mean",
+}
+
+
+def _module_stack(st_model) -> Dict[str, object]:
+    """
+    Read pooling and normalization from the SentenceTransformer module stack.
+
+    Only a transformer followed by one cls / last-token / mean pooling layer and an
+    optional Normalize layer is reproduced in numpy. Anything else (Dense projections,
+    max or weighted-mean pooling, extra modules) raises instead of exporting an artifact
+    whose embeddings silently disagree with the torch model.
+    """
+    from sentence_transformers.models import Normalize, Pooling, Transformer
+
+    modules = list(st_model)
+    names = [type(module).__name__ for module in modules]
+    normalize = bool(modules) and isinstance(modules[-1], Normalize)
+    body = modules[:-1] if normalize else modules
+    if (
+        len(body) != 2
+        or not isinstance(body[0], Transformer)
+        or not isinstance(body[1], Pooling)
+    ):
+        raise ValueError(
+            f"Unsupported SentenceTransformer module stack {names} for ONNX export; "
+            "only Transformer -> Pooling [-> Normalize] is supported."
+        )
+    cfg = body[1].get_config_dict()
+    enabled = sorted(
+        key for key, value in cfg.items() if key.startswith("pooling_mode_") and value
+    )
+    if len(enabled) != 1 or enabled[0] not in _POOLING_MODES:
+        raise ValueError(
+            f"Unsupported pooling {enabled} for ONNX export; "
+            f"supported: {sorted(_POOLING_MODES.values())}."
+        )
+    return {"pooling": _POOLING_MODES[enabled[0]], "normalize": normalize}
+
+
+def export_onnx(model_name: str, out_dir: Path, quantize: bool = False) -> Path:
+    """
+    Export the transformer body of `model_name` to ONNX and save its tokenizer.
+    Pooling and normalization stay in numpy; unsupported module stacks are rejected
+    before anything is exported.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device="cpu")
+    stack = _module_stack(st_model)
+    transformer = st_model[0]
+    auto_model = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+
+    sample = tokenizer(["export sample text"], return_tensors="pt", padding=True)
+    input_names = [
+        name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample
+    ]
+
+    class _HiddenStates(torch.nn.Module):
+        def __init__(self) -> None:
+            super().__init__()
+            self.body = auto_model
+
+        def forward(self, *args):
+            return self.body(**dict(zip(input_names, args))).last_hidden_state
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    fp32_path = out_dir / FP32_NAME
+    with torch.no_grad():
+        torch.onnx.export(
+            _HiddenStates(),
+            tuple(sample[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+
+    model_file = FP32_NAME
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(str(fp32_path), str(out_dir / INT8_NAME), weight_type=QuantType.QInt8)
+        model_file = INT8_NAME
+
+    tokenizer.save_pretrained(str(out_dir))
+    manifest = {
+        "model_name": model_name,
+        "model_file": model_file,
+        "input_names": input_names,
+        "pooling": stack["pooling"],
+        "normalize": stack["normalize"],
+        "max_seq_length": int(st_model.get_max_seq_length() or 512),
+        "quantized": quantize,
+    }
+    (out_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+    return out_dir
+
+
+class OnnxEmbeddingModel:
+    """
+    Drop-in for the subset of `SentenceTransformer.encode` used by EmbeddingService.
+    """
+
+    def __init__(self, model_dir: Path, intra_op_threads: Optional[int] = None) -> None:
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        manifest = json.loads((model_dir / MANIFEST_NAME).read_text())
+        self._input_names: List[str] = manifest["input_names"]
+        self._pooling: str = manifest["pooling"]
+        # The model's own Normalize layer applies whatever the caller asks for.
+        self._normalize: bool = manifest.get("normalize", False)
+        self._max_length: int = manifest["max_seq_length"]
+        self.model_name: str = manifest["model_name"]
+        self.quantized: bool = manifest["quantized"]
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self._session = ort.InferenceSession(
+            str(model_dir / manifest["model_file"]),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+
+    def _pool(self, hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        if self._pooling == "cls":
+            return hidden[:, 0]
+        if self._pooling == "lasttoken":
+            # Works for both left- and right-padded tokenizers.
+            last = mask.shape[1] - 1 - np.argmax(mask[:, ::-1], axis=1)
+            return hidden[np.arange(hidden.shape[0]), last]
+        weights = mask[..., None].astype(hidden.dtype)
+        return (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+
+    def encode(
+        self,
+        sentences: Sequence[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = True,
+    ) -> np.ndarray:
+        chunks = []
+        for start in range(0, len(sentences), max(1, batch_size)):
+            encoded = self._tokenizer(
+                list(sentences[start : start + batch_size]),
+                padding=True,
+                truncation=True,
+                max_length=self._max_length,
+                return_tensors="np",
+            )
+            feeds = {name: encoded[name].astype(np.int64) for name in self._input_names}
+            hidden = self._session.run(None, feeds)[0]
+            chunks.append(self._pool(hidden, encoded["attention_mask"]))
+
+        vectors = np.vstack(chunks).astype(np.float32)
+        if normalize_embeddings or self._normalize:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.clip(norms, 1e-12, None)
+        return vectors
+
+
+def ensure_onnx_artifact(model_name: str, cache_root: Path, quantize: bool = False) -> Path:
+    """
+    Return the artifact folder, exporting it first if needed. The export goes to a private
+    temporary folder that is renamed into place, so concurrent workers never see or
+    write a half-exported artifact; when two race, the first rename wins.
+    """
+    model_dir = artifact_dir(cache_root, model_name, quantize)
+    if (model_dir / MANIFEST_NAME).exists():
+        return model_dir
+    cache_root.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{model_dir.name}-", dir=cache_root))
+    try:
+        export_onnx(model_name, staging, quantize=quantize)
+        if model_dir.exists() and not (model_dir / MANIFEST_NAME).exists():
+            # Leftover of an interrupted non-atomic export.
+            shutil.rmtree(model_dir, ignore_errors=True)
+        try:
+            os.rename(staging, model_dir)
+        except OSError:
+            if not (model_dir / MANIFEST_NAME).exists():
+                raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return model_dir
+
+
+def load_onnx_model(
+    model_name: str,
+    cache_root: Path,
+    quantize: bool = False,
+    intra_op_threads: Optional[int] = None,
+) -> OnnxEmbeddingModel:
+    """Load the cached ONNX artifact, exporting it first if it does not exist yet."""
+    model_dir = ensure_onnx_artifact(model_name, cache_root, quantize)
+    return OnnxEmbeddingModel(model_dir, intra_op_threads=intra_op_threads)
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _profile_backend(
+    backend: str, model_name: str, cache_root: str, quantize: bool, texts: List[str], rounds: int
+) -> Dict:
+    """Runs in a fresh process so load time and RSS are not polluted by the other backend."""
+    rss_before = _peak_rss_mb()
+    load_start = time.perf_counter()
+    if backend == "onnx":
+        model = load_onnx_model(model_name, Path(cache_root), quantize=quantize)
+    else:
+        from sentence_transformers import SentenceTransformer
+
+        model = SentenceTransformer(model_name, device="cpu")
+    load_s = time.perf_counter() - load_start
+
+    kwargs = dict(show_progress_bar=False, convert_to_numpy=True, normalize_embeddings=True)
+    model.encode(texts[:1], batch_size=1, **kwargs)  # warm-up
+    single, batched = [], []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        model.encode(texts[:1], batch_size=1, **kwargs)
+        single.append((time.perf_counter() - t0) * 1000)
+        t0 = time.perf_counter()
+        vectors = model.encode(texts, batch_size=len(texts), **kwargs)
+        batched.append((time.perf_counter() - t0) * 1000)
+
+    return {
+        "load_seconds": round(load_s, 3),
+        "single_p50_ms": round(float(np.median(single)), 3),
+        "batch_p50_ms": round(float(np.median(batched)), 3),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "rss_growth_mb": round(_peak_rss_mb() - rss_before, 1),
+        "embeddings": np.asarray(vectors).tolist(),
+    }
+
+
+def compare_backends(
+    model_name: str,
+    cache_root: Path,
+    quantize: bool = False,
+    texts: Sequence[str] = PARITY_TEXTS,
+    rounds: int = 20,
+) -> Dict:
+    """
+    Parity + performance report of PyTorch vs ONNX Runtime for the same model.
+    Cosine similarity is computed row-wise between the two backends' embeddings.
+    """
+    import multiprocessing
+
+    texts = list(texts)
+    ctx = multiprocessing.get_context("spawn")
+    args = (model_name, str(cache_root), quantize, texts, rounds)
+    with ctx.Pool(1) as pool:
+        torch_stats = pool.apply(_profile_backend, ("torch",) + args)
+    with ctx.Pool(1) as pool:
+        onnx_stats = pool.apply(_profile_backend, ("onnx",) + args)
+
+    reference = np.asarray(torch_stats.pop("embeddings"))
+    candidate = np.asarray(onnx_stats.pop("embeddings"))
+    cosine = (reference * candidate).sum(axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+    return {
+        "model_name": model_name,
+        "quantized": quantize,
+        "parity": {
+            "cosine_min": round(float(cosine.min()), 6),
+            "cosine_mean": round(float(cosine.mean()), 6),
+        },
+        "torch": torch_stats,
+        "onnx": onnx_stats,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from ..config import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Export / benchmark the ONNX embedding backend")
+    parser.add_argument("--model", default=settings.rating_embedding_model)
+    parser.add_argument("--cache-dir", type=Path, default=settings.rating_embedding_onnx_dir)
+    parser.add_argument("--quantize", action="store_true", help="Apply dynamic int8 quantization")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument(
+        "--min-cosine", type=float, default=0.99, help="Fail if parity drops below this value"
+    )
+    parser.add_argument("--report", type=Path, help="Optional path to write the JSON report")
+    args = parser.parse_args(argv)
+
+    model_dir = artifact_dir(args.cache_dir, args.model, args.quantize)
+    if not (model_dir / MANIFEST_NAME).exists():
+        ensure_onnx_artifact(args.model, args.cache_dir, quantize=args.quantize)
+        print(f"[ONNX] Exported {args.model} to {model_dir}")
+
+    report = compare_backends(args.model, args.cache_dir, args.quantize, rounds=args.rounds)
+    print(json.dumps(report, indent=2))
+    if args.report:
+        args.report.write_text(json.dumps(report, indent=2))
+    if report["parity"]["cosine_min"] < args.min_cosine:
+        raise SystemExit(
+            f"ONNX parity check failed: min cosine {report['parity']['cosine_min']} "
+            f"< {args.min_cosine}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,10 @@ import logging
 import sys
 import time
 import uuid
+from concurrent.futures import TimeoutError as FutureTimeout
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
 from fastapi import HTTPException, status
@@ -14,12 +15,15 @@ from fastapi import HTTPException, status
 logger = logging.getLogger(__name__)
 
 from ..config import Settings
+from ..deadline import DeadlineExceeded, check_deadline, current_deadline
+from ..metrics import observe_stage
 from ..schemas import (
     AppliedFilters,
     DocumentSnippet,
     RestaurantSearchPayload,
     RestaurantSearchRequest,
 )
+from .cache import SingleFlight, TTLCache
 from .chat_store import ChatStore
 
 
@@ -83,7 +87,7 @@ class RAGService:
         # Fix the database path to be absolute (relative paths break when running from API)
         import config as task1_config  # type: ignore
 
-        db_path_absolute = str(settings.task1_dir / "db")
+        db_path_absolute = str(settings.chroma_db_dir)
         task1_config.DB_PATH = db_path_absolute
         task1_config.get_chroma_client.cache_clear()
         logger.info(f"Set ChromaDB path to: {db_path_absolute}")
@@ -91,8 +95,32 @@ class RAGService:
         from main import build_graph  # type: ignore
 
         self._graph = build_graph()
+        self._task1_config = task1_config
         self._chat_store = chat_store
         self._settings = settings
+        self._response_cache: TTLCache[RestaurantSearchPayload] = TTLCache(
+            maxsize=settings.search_cache_size, ttl_seconds=settings.search_cache_ttl_seconds
+        )
+        # A leader abandoned by its own caller must not fail the requests sharing its run.
+        self._singleflight: SingleFlight[RestaurantSearchPayload] = SingleFlight(
+            retry_on=(DeadlineExceeded,)
+        )
+
+    def heartbeat(self) -> None:
+        """Ping the Chroma client this service already holds (no new client per call)."""
+        self._task1_config.get_chroma_client().heartbeat()
+
+    def warm_up(self) -> None:
+        """
+        Open the Chroma collection and run one local vector query so the sqlite file and
+        HNSW index are paged in. Reuses a stored embedding, so no Gemini call is made.
+        """
+        client = self._task1_config.get_chroma_client()
+        collection = client.get_collection(name=self._task1_config.COLLECTION_NAME)
+        sample = collection.peek(limit=1)
+        embeddings = sample.get("embeddings")
+        if embeddings is not None and len(embeddings):
+            collection.query(query_embeddings=[list(embeddings[0])], n_results=1)
 
     def _prepare_history(self, conversation_id: Optional[uuid.UUID]) -> List[str]:
         """Fetch last few turns for multi-turn conversations."""
@@ -108,18 +136,90 @@ class RAGService:
             return
         self._chat_store.append(conversation_id, f"User: {user_input}", f"AI: {ai_output}")
 
+    @staticmethod
+    def _normalize_question(question: str) -> str:
+        return " ".join(question.casefold().split())
+
+    def _catalog_version(self) -> int:
+        """Chroma sqlite mtime; re-ingesting the catalog invalidates cached answers."""
+        try:
+            return (self._settings.chroma_db_dir / "chroma.sqlite3").stat().st_mtime_ns
+        except OSError:
+            return 0
+
+    def cache_stats(self) -> Dict[str, float]:
+        stats = dict(self._response_cache.stats())
+        stats["coalesced"] = self._singleflight.coalesced
+        return stats
+
     def search(self, request: RestaurantSearchRequest) -> RAGResult:
         """Invoke LangGraph and translate results into API schemas."""
         trace_id = uuid.uuid4()
         start = time.perf_counter()
-        history = self._prepare_history(request.conversation_id)
-        inputs = {"question": request.question, "messages": history}
 
+        if request.conversation_id or not self._settings.search_cache_ttl_seconds:
+            history = self._prepare_history(request.conversation_id)
+            payload = self._run_graph(request.question, history, trace_id)
+            self._persist_turn(request.conversation_id, request.question, payload.answer)
+        else:
+            # Stateless requests depend only on the question and the catalog, so identical
+            # in-flight calls share one graph run and recent answers are served from cache.
+            key = (self._normalize_question(request.question), self._catalog_version())
+            payload = self._response_cache.get(key)
+            if payload is None:
+                deadline = current_deadline()
+                try:
+                    payload, _ = self._singleflight.do(
+                        key,
+                        lambda: self._run_graph_and_cache(key, request.question, trace_id),
+                        timeout=deadline.remaining() if deadline is not None else None,
+                    )
+                except FutureTimeout:
+                    raise DeadlineExceeded("rag_singleflight_wait") from None
+
+        latency_ms = int((time.perf_counter() - start) * 1000)
+        return RAGResult(payload=payload, latency_ms=latency_ms, trace_id=trace_id)
+
+    def _run_graph_and_cache(
+        self, key: Tuple[str, int], question: str, trace_id: uuid.UUID
+    ) -> RestaurantSearchPayload:
+        payload = self._run_graph(question, [], trace_id)
+        # Closest-match fallbacks and empty answers are shared with the callers already
+        # waiting, but not kept: the next request should get a fresh attempt.
+        if payload.answer and payload.documents and not payload.fallback:
+            self._response_cache.set(key, payload)
+        return payload
+
+    def _invoke_graph(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Equivalent to graph.invoke, but streams per-node updates so each node's latency
+        (extract_query / retrieve / generate) lands in the stage histogram, and a cancelled
+        request stops between nodes instead of making the remaining Gemini calls.
+        """
+        check_deadline("rag_graph")
+        result = dict(inputs)
+        last = time.perf_counter()
+        for update in self._graph.stream(inputs, stream_mode="updates"):
+            now = time.perf_counter()
+            for node, values in update.items():
+                observe_stage(f"rag_{node}", now - last)
+                if values:
+                    result.update(values)
+            check_deadline("rag_graph")
+            last = now
+        return result
+
+    def _run_graph(
+        self, question: str, history: List[str], trace_id: uuid.UUID
+    ) -> RestaurantSearchPayload:
+        inputs = {"question": question, "messages": history}
         try:
-            result = self._graph.invoke(inputs)
+            result = self._invoke_graph(inputs)
+        except DeadlineExceeded:
+            raise
         except Exception as exc:  # pragma: no cover - network/LLM errors
             logger.exception(
-                f"RAG execution failed for question: {request.question[:100]}",
+                f"RAG execution failed for question: {question[:100]}",
                 exc_info=exc,
             )
             error_msg = str(exc)
@@ -143,7 +243,7 @@ class RAGService:
         documents = result.get("documents", [])
         filters = result.get("filters", {})
 
-        payload = RestaurantSearchPayload(
+        return RestaurantSearchPayload(
             answer=answer,
             applied_filters=AppliedFilters(**filters),
             documents=[
@@ -157,7 +257,3 @@ class RAGService:
             ],
             fallback=bool(documents and "[NOTE:" in documents[0]),
         )
-        self._persist_turn(request.conversation_id, request.question, answer)
-        latency_ms = int((time.perf_counter() - start) * 1000)
-        return RAGResult(payload=payload, latency_ms=latency_ms, trace_id=trace_id)
-
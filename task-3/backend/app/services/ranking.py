@@ -0,0 +1,261 @@
+"""
+Top-k restaurants for one user and date (`POST /v1/ratings/top`).
+
+When the offline score matrix (see score_matrix.py) covers the request, i.e. same date,
+same model version and no review context, the user's precomputed row is sliced instead of
+running the model. Otherwise the whole (filtered) catalog is turned into one columnar
+feature block by `feature_block` and scored in a single batch. Either way
+`np.argpartition` picks the top k.
+
+Locally the fitted pipeline is split per ColumnTransformer branch: branches that only
+read restaurant columns (the description / amenities / attributes vectorizers) are
+transformed once per catalog snapshot and model generation and sliced per request, so a
+ranking call only runs the user- and date-dependent branches plus the regressor. The
+split is checked once against `pipeline.predict`; on any mismatch, or for pipelines of
+another shape, ranking falls back to the plain pipeline call.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+import numpy as np
+
+from ..deadline import check_deadline
+from ..metrics import stage_timer
+from ..schemas import RankedRestaurant, TopRatingsPayload, TopRatingsRequest
+from .feature_store import FeatureSnapshot, FeatureStore, feature_block
+from .model import LoadedModel, RatingModelService, block_frame
+from .score_matrix import ScoreMatrix
+
+logger = logging.getLogger(__name__)
+
+# Feature columns that depend only on the restaurant row.
+RESTAURANT_COLUMNS = {
+    "resto_description": "description",
+    "resto_amenities": "amenities",
+    "resto_attributes": "attributes",
+    "resto_location": "location",
+    "resto_cuisine": "cuisine",
+    "resto_price_bucket": "price_bucket",
+    "price_avg": "price_avg",
+}
+
+
+@dataclass
+class RankingResult:
+    payload: TopRatingsPayload
+    latency_ms: int
+    trace_id: uuid.UUID
+
+
+def _dense(block: Any) -> np.ndarray:
+    if hasattr(block, "toarray"):
+        return block.toarray()
+    return block.to_numpy() if hasattr(block, "to_numpy") else np.asarray(block)
+
+
+class CatalogScorer:
+    """A fitted `preprocessor -> regressor` pipeline with restaurant-only branches precomputed."""
+
+    def __init__(self, model: LoadedModel, snapshot: FeatureSnapshot) -> None:
+        import pandas as pd
+
+        self.model = model
+        self.snapshot = snapshot
+        self._pipeline = model.pipeline
+        self._verified = False
+        self._parts: Optional[List[tuple]] = None
+
+        steps = getattr(self._pipeline, "steps", [])
+        if len(steps) != 2 or not hasattr(steps[0][1], "transformers_"):
+            return
+        preprocessor, self._regressor = steps[0][1], steps[1][1]
+        self._sparse = bool(getattr(preprocessor, "sparse_output_", False))
+        rest = snapshot.restaurants.columns
+        catalog = pd.DataFrame({col: rest[src] for col, src in RESTAURANT_COLUMNS.items()})
+        parts = []
+        for _, transformer, columns in preprocessor.transformers_:
+            selected = [columns] if isinstance(columns, str) else list(columns)
+            if (isinstance(transformer, str) and transformer == "drop") or not selected:
+                continue
+            if not all(isinstance(col, str) for col in selected):
+                return  # positional selections (e.g. a remainder): keep the plain pipeline
+            if isinstance(transformer, str):  # "passthrough" on older scikit-learn
+                parts.append(("passthrough", columns))
+            elif set(selected) <= RESTAURANT_COLUMNS.keys():
+                parts.append(("static", transformer.transform(catalog[columns])))
+            else:
+                parts.append(("dynamic", (transformer, columns)))
+        self._parts = parts
+
+    def _transform(self, frame, rows: np.ndarray):
+        blocks = []
+        for kind, value in self._parts:
+            if kind == "static":
+                blocks.append(value[rows])
+            elif kind == "passthrough":
+                blocks.append(frame[value].to_numpy())
+            else:
+                transformer, columns = value
+                blocks.append(transformer.transform(frame[columns]))
+        if self._sparse:
+            from scipy import sparse
+
+            return sparse.hstack(
+                [b if sparse.issparse(b) else sparse.csr_matrix(_dense(b)) for b in blocks]
+            ).tocsr()
+        return np.hstack([_dense(block) for block in blocks])
+
+    def predict(self, frame, rows: np.ndarray) -> np.ndarray:
+        if self._parts is None:
+            return np.asarray(self._pipeline.predict(frame), dtype=float)
+        scores = np.asarray(self._regressor.predict(self._transform(frame, rows)), dtype=float)
+        if not self._verified:
+            expected = np.asarray(self._pipeline.predict(frame), dtype=float)
+            if not np.allclose(scores, expected, atol=1e-5):
+                logger.warning(
+                    "Precomputed restaurant features disagree with %s; using the full pipeline",
+                    self.model.version,
+                )
+                self._parts = None
+                return expected
+            self._verified = True
+        return scores
+
+
+class RestaurantRanker:
+    """Scores every catalog restaurant for one user and returns the best k."""
+
+    def __init__(
+        self,
+        feature_store: FeatureStore,
+        model_service: RatingModelService,
+        score_matrix: Optional[ScoreMatrix] = None,
+    ) -> None:
+        self._feature_store = feature_store
+        self._model_service = model_service
+        self._score_matrix = score_matrix
+        self._scorer: Optional[CatalogScorer] = None
+        self._scorer_lock = threading.Lock()
+
+    def _catalog_scorer(self, model: LoadedModel, snapshot: FeatureSnapshot) -> CatalogScorer:
+        scorer = self._scorer
+        if scorer is not None and scorer.model is model and scorer.snapshot is snapshot:
+            return scorer
+        with self._scorer_lock:
+            scorer = self._scorer
+            if scorer is None or scorer.model is not model or scorer.snapshot is not snapshot:
+                scorer = CatalogScorer(model, snapshot)
+                self._scorer = scorer
+        return scorer
+
+    @staticmethod
+    def _candidates(snapshot: FeatureSnapshot, request: TopRatingsRequest) -> np.ndarray:
+        rest = snapshot.restaurants.columns
+        mask = np.ones(len(rest["id"]), dtype=bool)
+        if request.cuisine:
+            mask &= rest["cuisine_key"] == request.cuisine.strip().lower()
+        if request.location:
+            needle = request.location.strip().lower()
+            mask &= np.array([needle in str(loc).lower() for loc in rest["location"]])
+        if request.max_price is not None:
+            with np.errstate(invalid="ignore"):
+                mask &= rest["price_avg"] <= request.max_price
+        return np.flatnonzero(mask)
+
+    def _precomputed(
+        self,
+        snapshot: FeatureSnapshot,
+        rows: np.ndarray,
+        request: TopRatingsRequest,
+        model: LoadedModel,
+    ) -> Optional[np.ndarray]:
+        """Scores from the offline matrix, or None if it does not cover this request."""
+        generation = self._score_matrix.current() if self._score_matrix else None
+        if (
+            generation is None
+            or generation.date != request.date
+            or generation.model_version != model.version
+            or request.review_text
+            or request.embeddings is not None
+            or request.helpful_count
+        ):
+            return None
+        user_row = generation.user_row(request.user_id)
+        if user_row is None:
+            return None
+        columns = generation.columns(snapshot.restaurants.columns["id"][rows])
+        if (columns < 0).any():
+            return None
+        return user_row[columns].astype(np.float64)
+
+    def top(self, request: TopRatingsRequest) -> RankingResult:
+        trace_id = uuid.uuid4()
+        start = time.perf_counter()
+        snapshot = self._feature_store.current()
+        model = self._model_service.active_model
+        snapshot.users.row(request.user_id, "user")  # unknown users 404 even with no candidates
+
+        rows = self._candidates(snapshot, request)
+        results: List[RankedRestaurant] = []
+        source = "model"
+        scores = self._precomputed(snapshot, rows, request, model) if len(rows) else None
+        if scores is not None:
+            source = "matrix"
+            results = self._top_k(snapshot, rows, scores, request.k)
+        elif len(rows):
+            embedding_vector = self._model_service.embedding_for(request, model)
+            with stage_timer("rank_features"):
+                columns = feature_block(
+                    snapshot, request.user_id, request.date, rows, request.helpful_count
+                )
+            check_deadline("rank_score")
+            if model.pipeline is None:
+                scores = self._model_service.score_block(
+                    columns, embedding_vector, model, trace_id
+                )
+            else:
+                frame = block_frame(columns, embedding_vector, model)
+                with stage_timer("xgboost_predict"):
+                    scores = self._catalog_scorer(model, snapshot).predict(frame, rows)
+            results = self._top_k(snapshot, rows, np.clip(scores, 1.0, 5.0), request.k)
+
+        payload = TopRatingsPayload(
+            user_id=request.user_id,
+            date=request.date,
+            candidates=len(rows),
+            results=results,
+            model_version=model.version,
+            source=source,
+        )
+        latency_ms = int((time.perf_counter() - start) * 1000)
+        return RankingResult(payload=payload, latency_ms=latency_ms, trace_id=trace_id)
+
+    @staticmethod
+    def _top_k(
+        snapshot: FeatureSnapshot, rows: np.ndarray, scores: np.ndarray, k: int
+    ) -> List[RankedRestaurant]:
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        rest = snapshot.restaurants.columns
+        ranked = []
+        for pos in best:
+            r = rows[pos]
+            price_range = rest["price_range"][r]
+            ranked.append(
+                RankedRestaurant(
+                    restaurant_id=int(rest["id"][r]),
+                    name=str(rest["name"][r]),
+                    cuisine=str(rest["cuisine"][r]),
+                    location=str(rest["location"][r]),
+                    price_range=price_range if isinstance(price_range, str) else None,
+                    rating_prediction=float(scores[pos]),
+                )
+            )
+        return ranked
@@ -0,0 +1,121 @@
+"""
+Read side of Task 2's precomputed user x restaurant score matrix (`task-2/score_matrix.py`).
+
+The float16 matrix is memory-mapped, never read into the heap: a score is one index
+lookup and a user's row is a contiguous slice, so `/ratings/top` can rank without running
+the model. `CURRENT` in the matrix directory names the live generation; it is re-checked
+on an interval and a new generation is mapped atomically when the batch job publishes one.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import json
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LAYOUT_VERSION = 1
+SCORES_FILE = "scores.f16"
+
+
+@dataclass(frozen=True)
+class ScoreMatrixGeneration:
+    name: str
+    date: dt.date
+    model_version: str
+    scores: np.memmap  # float16 (users, restaurants), read-only
+    user_index: Dict[int, int]
+    restaurant_index: Dict[int, int]
+
+    def score(self, user_id: int, restaurant_id: int) -> Optional[float]:
+        u = self.user_index.get(user_id)
+        r = self.restaurant_index.get(restaurant_id)
+        if u is None or r is None:
+            return None
+        return float(self.scores[u, r])
+
+    def user_row(self, user_id: int) -> Optional[np.ndarray]:
+        u = self.user_index.get(user_id)
+        return None if u is None else self.scores[u]
+
+    def columns(self, restaurant_ids: np.ndarray) -> np.ndarray:
+        """Column of every restaurant id, -1 where the matrix has no such restaurant."""
+        return np.fromiter(
+            (self.restaurant_index.get(int(r), -1) for r in restaurant_ids),
+            dtype=np.int64,
+            count=len(restaurant_ids),
+        )
+
+
+def load_generation(root: Path, name: str) -> ScoreMatrixGeneration:
+    gen_dir = root / name
+    manifest = json.loads((gen_dir / "manifest.json").read_text())
+    if manifest.get("layout_version") != LAYOUT_VERSION:
+        raise ValueError(f"Unsupported score matrix layout {manifest.get('layout_version')}")
+    shape = tuple(manifest["shape"])
+    user_ids = np.load(gen_dir / "user_ids.npy")
+    restaurant_ids = np.load(gen_dir / "restaurant_ids.npy")
+    if shape != (len(user_ids), len(restaurant_ids)):
+        raise ValueError(f"Score matrix shape {shape} does not match its id files")
+    return ScoreMatrixGeneration(
+        name=name,
+        date=dt.date.fromisoformat(manifest["date"]),
+        model_version=manifest["model_version"],
+        scores=np.memmap(gen_dir / SCORES_FILE, dtype="<f2", mode="r", shape=shape),
+        user_index={int(u): i for i, u in enumerate(user_ids)},
+        restaurant_index={int(r): i for i, r in enumerate(restaurant_ids)},
+    )
+
+
+class ScoreMatrix:
+    """The live generation under `root`, or None until the batch job has published one."""
+
+    def __init__(self, root: Path, check_interval_seconds: float = 5.0) -> None:
+        self._root = root
+        self._check_interval = check_interval_seconds
+        self._pointer_stat: Optional[Tuple[int, int]] = None
+        self._generation: Optional[ScoreMatrixGeneration] = None
+        self._next_check = 0.0
+        self.current()
+
+    def current(self) -> Optional[ScoreMatrixGeneration]:
+        now = time.monotonic()
+        if now < self._next_check:
+            return self._generation
+        self._next_check = now + self._check_interval
+        pointer = self._root / "CURRENT"
+        try:
+            stat = pointer.stat()
+        except OSError:
+            return self._generation
+        pointer_stat = (stat.st_mtime_ns, stat.st_ino)
+        if pointer_stat == self._pointer_stat:
+            return self._generation
+        # Failed generations are not retried until CURRENT changes again.
+        self._pointer_stat = pointer_stat
+        try:
+            name = pointer.read_text().strip()
+            self._generation = load_generation(self._root, name)
+        except Exception:
+            logger.exception("Score matrix reload failed; keeping the previous generation")
+        else:
+            logger.info("Mapped score matrix %s (%s)", name, self._generation.model_version)
+        return self._generation
+
+    def stats(self) -> Dict[str, object]:
+        generation = self._generation
+        if generation is None:
+            return {"loaded": False}
+        return {
+            "loaded": True,
+            "generation": generation.name,
+            "date": generation.date.isoformat(),
+            "model_version": generation.model_version,
+            "shape": list(generation.scores.shape),
+        }
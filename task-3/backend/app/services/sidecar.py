@@ -0,0 +1,384 @@
+"""
+Model sidecar: one local process owns the SentenceTransformer and the rating pipeline and
+serves every uvicorn worker over a Unix socket, so N workers no longer mean N copies of
+the weights (or N cold starts).
+
+Wire format, one request/response per frame on a persistent connection:
+
+    header  <2sBBI  magic b"ES", protocol version, op (request) or status (response),
+                    payload length
+    INFO    -> JSON {model_version, fingerprint, embedding_cols, residual_std, ...}
+    EMBED   u32 count, u32[count] utf-8 lengths, concatenated utf-8 texts
+            -> u32 rows, u32 dim, float32[rows * dim] (little-endian, row-major)
+    SCORE   feature_codec npz batch -> feature_codec float32 npy predictions
+
+Errors come back with status 1 and a JSON {code, message} body. On the server side
+single-text embeds go through EmbeddingService's coalescer and SCORE batches from
+concurrent connections are merged into one pipeline call, so the sidecar batches across
+workers as well as within them.
+
+    SIDECAR_SOCKET=/tmp/engage-sidecar.sock python -m app.services.sidecar
+    SIDECAR_SOCKET=/tmp/engage-sidecar.sock uvicorn app.main:app --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..deadline import DeadlineExceeded, check_deadline, current_deadline
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"ES"
+PROTOCOL_VERSION = 1
+HEADER = struct.Struct("<2sBBI")
+OP_INFO, OP_EMBED, OP_SCORE = 1, 2, 3
+STATUS_OK, STATUS_ERROR = 0, 1
+MAX_FRAME_BYTES = 256 * 1024 * 1024
+
+
+class SidecarError(RuntimeError):
+    """The sidecar is unreachable or answered with an error frame."""
+
+    def __init__(self, code: str, message: str) -> None:
+        super().__init__(f"{code}: {message}")
+        self.code = code
+        self.message = message
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if not count:
+            raise ConnectionError("sidecar connection closed mid-frame")
+        received += count
+    return bytes(buffer)
+
+
+def read_frame(sock: socket.socket) -> Tuple[int, bytes]:
+    magic, version, code, length = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if magic != MAGIC or version != PROTOCOL_VERSION:
+        raise ConnectionError(f"bad sidecar frame header {magic!r} v{version}")
+    if length > MAX_FRAME_BYTES:
+        raise ConnectionError(f"sidecar frame of {length} bytes exceeds the limit")
+    return code, _recv_exact(sock, length) if length else b""
+
+
+def write_frame(sock: socket.socket, code: int, payload: bytes = b"") -> None:
+    sock.sendall(HEADER.pack(MAGIC, PROTOCOL_VERSION, code, len(payload)) + payload)
+
+
+def encode_texts(texts: Sequence[str]) -> bytes:
+    encoded = [text.encode("utf-8") for text in texts]
+    lengths = np.asarray([len(item) for item in encoded], dtype="<u4")
+    return struct.pack("<I", len(encoded)) + lengths.tobytes() + b"".join(encoded)
+
+
+def decode_texts(payload: bytes) -> List[str]:
+    (count,) = struct.unpack_from("<I", payload)
+    lengths = np.frombuffer(payload, dtype="<u4", count=count, offset=4)
+    offset = 4 + 4 * count
+    texts = []
+    for length in lengths.tolist():
+        texts.append(payload[offset:offset + length].decode("utf-8"))
+        offset += length
+    return texts
+
+
+def encode_matrix(matrix: np.ndarray) -> bytes:
+    matrix = np.ascontiguousarray(matrix, dtype="<f4")
+    rows, dim = matrix.shape
+    return struct.pack("<II", rows, dim) + matrix.tobytes()
+
+
+def decode_matrix(payload: bytes) -> np.ndarray:
+    rows, dim = struct.unpack_from("<II", payload)
+    return np.frombuffer(payload, dtype="<f4", count=rows * dim, offset=8).reshape(rows, dim)
+
+
+# --------------------------------------------------------------------------- client
+
+
+class SidecarClient:
+    """Thread-safe client; each calling thread keeps its own persistent connection."""
+
+    def __init__(self, socket_path: str, timeout_seconds: float = 10.0) -> None:
+        self._socket_path = socket_path
+        self._timeout = timeout_seconds
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.settimeout(self._timeout)
+                sock.connect(self._socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _discard(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def call(self, op: int, payload: bytes = b"") -> bytes:
+        check_deadline("sidecar_call")
+        deadline = current_deadline()
+        timeout = self._timeout if deadline is None else min(self._timeout, deadline.remaining())
+        # A dropped connection (sidecar restart) is retried once; every op is idempotent.
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                sock.settimeout(max(timeout, 0.001))
+                write_frame(sock, op, payload)
+                status, body = read_frame(sock)
+                break
+            except socket.timeout as exc:
+                # The reply may still arrive later and would desync the stream.
+                self._discard()
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExceeded("sidecar_call") from exc
+                raise SidecarError("SIDECAR_TIMEOUT", f"no reply in {timeout:.1f}s") from exc
+            except OSError as exc:
+                self._discard()
+                if attempt:
+                    raise SidecarError("SIDECAR_UNAVAILABLE", str(exc)) from exc
+        if status != STATUS_OK:
+            error = json.loads(body.decode("utf-8"))
+            raise SidecarError(error.get("code", "SIDECAR_ERROR"), error.get("message", ""))
+        return body
+
+    def info(self) -> Dict[str, Any]:
+        return json.loads(self.call(OP_INFO).decode("utf-8"))
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return decode_matrix(self.call(OP_EMBED, encode_texts(texts)))
+
+    def score(self, npz_body: bytes) -> bytes:
+        return self.call(OP_SCORE, npz_body)
+
+
+class SidecarEncoder:
+    """`encode` as EmbeddingService calls it on SentenceTransformer, served by the sidecar."""
+
+    def __init__(self, client: SidecarClient) -> None:
+        self._client = client
+
+    def encode(self, sentences, batch_size: int = 32, **_ignored) -> np.ndarray:
+        return self._client.embed(list(sentences))
+
+
+# --------------------------------------------------------------------------- server
+
+
+class _FrameCoalescer:
+    """
+    Merges concurrent SCORE batches into one pipeline call (same leader/follower scheme
+    as EmbeddingService's coalescer): the first caller waits a short window only when
+    other batches are already queued, then predicts everything queued and hands each
+    caller its slice. Each batch carries the model generation its frame was decoded
+    against, so a hot swap mid-window never scores a frame with the other generation.
+    """
+
+    def __init__(
+        self, predict: Callable[[Any, "pd.DataFrame"], np.ndarray], window_seconds: float
+    ) -> None:
+        self._predict = predict
+        self._window_seconds = window_seconds
+        self._pending: List[Tuple[Any, "pd.DataFrame", Future]] = []
+        self._leader_active = False
+        self._lock = threading.Lock()
+
+    def submit(self, model: Any, frame: "pd.DataFrame") -> np.ndarray:
+        future: Future = Future()
+        with self._lock:
+            self._pending.append((model, frame, future))
+            is_leader = not self._leader_active
+            if is_leader:
+                self._leader_active = True
+        if is_leader:
+            self._drain()
+        return future.result()
+
+    def _drain(self) -> None:
+        with self._lock:
+            contended = len(self._pending) > 1
+        if self._window_seconds and contended:
+            time.sleep(self._window_seconds)
+        while True:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                if not batch:
+                    self._leader_active = False
+                    return
+            groups: Dict[int, List[Tuple[Any, "pd.DataFrame", Future]]] = {}
+            for entry in batch:
+                groups.setdefault(id(entry[0]), []).append(entry)
+            for group in groups.values():
+                self._score(group)
+
+    def _score(self, group: List[Tuple[Any, "pd.DataFrame", Future]]) -> None:
+        import pandas as pd
+
+        try:
+            frames = [frame for _, frame, _ in group]
+            merged = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+            preds = np.asarray(self._predict(group[0][0], merged), dtype=np.float32)
+        except Exception as exc:
+            for _, _, future in group:
+                future.set_exception(exc)
+            return
+        offset = 0
+        for _, frame, future in group:
+            future.set_result(preds[offset:offset + len(frame)])
+            offset += len(frame)
+
+
+class SidecarServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """One thread per worker connection; frames on a connection are handled in order."""
+
+    daemon_threads = True
+
+    def __init__(
+        self, socket_path: str, rating_service, embedding_service, score_window_ms: float
+    ) -> None:
+        self.rating_service = rating_service
+        self.embedding_service = embedding_service
+        self.scores = _FrameCoalescer(self._predict, score_window_ms / 1000.0)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _SidecarHandler)
+        os.chmod(socket_path, 0o600)
+
+    @staticmethod
+    def _predict(model, frame: "pd.DataFrame") -> np.ndarray:
+        return model.pipeline.predict(frame)
+
+    def info(self) -> Dict[str, Any]:
+        model = self.rating_service.active_model
+        return {
+            "model_version": model.version,
+            "fingerprint": model.fingerprint,
+            "embedding_cols": model.embedding_cols,
+            "residual_std": model.residual_std,
+            "pid": os.getpid(),
+        }
+
+    def handle_op(self, op: int, payload: bytes) -> bytes:
+        from .feature_codec import decode_features, encode_predictions
+
+        if op == OP_INFO:
+            return json.dumps(self.info()).encode("utf-8")
+        if op == OP_EMBED:
+            texts = decode_texts(payload)
+            if len(texts) == 1:
+                vectors = [self.embedding_service.embed(texts[0])]
+            else:
+                vectors = self.embedding_service.embed_many(texts)
+            return encode_matrix(np.asarray(vectors, dtype=np.float32))
+        if op == OP_SCORE:
+            model = self.rating_service.active_model
+            frame = decode_features(payload, model.embedding_cols)
+            return encode_predictions(self.scores.submit(model, frame))
+        raise SidecarError("UNKNOWN_OP", f"Unsupported sidecar op {op}")
+
+
+class _SidecarHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        sock: socket.socket = self.request
+        while True:
+            try:
+                op, payload = read_frame(sock)
+            except (ConnectionError, OSError):
+                return
+            try:
+                body, status = self.server.handle_op(op, payload), STATUS_OK
+            except SidecarError as exc:
+                body = json.dumps({"code": exc.code, "message": exc.message})
+                status = STATUS_ERROR
+            except Exception as exc:
+                logger.exception("Sidecar op %d failed", op)
+                body = json.dumps({"code": "SIDECAR_INFERENCE_ERROR", "message": str(exc)})
+                status = STATUS_ERROR
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            try:
+                write_frame(sock, status, body)
+            except OSError:
+                return
+
+
+def _poll_model_updates(rating_service, interval_seconds: float) -> None:
+    while True:
+        time.sleep(interval_seconds)
+        try:
+            rating_service.check_for_update()
+        except Exception:
+            logger.exception("Sidecar model reload failed; keeping the current model")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from ..config import get_settings
+    from ..dependencies import get_embedding_service, get_rating_service
+    from ..warmup import WARMUP_TEXT
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Embedding + rating model sidecar")
+    parser.add_argument(
+        "--socket", default=settings.sidecar_socket or "/tmp/engage-sidecar.sock"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    # This process is the model owner: build the local services, not sidecar clients, and
+    # give it the whole CPU budget instead of one worker's share.
+    settings.sidecar_socket = None
+    settings.web_workers = 1
+    rating_service = get_rating_service()
+    embedding_service = get_embedding_service()
+    embedding_service.embed(WARMUP_TEXT)
+
+    if settings.model_reload_interval_seconds > 0:
+        threading.Thread(
+            target=_poll_model_updates,
+            args=(rating_service, settings.model_reload_interval_seconds),
+            name="sidecar-model-reload",
+            daemon=True,
+        ).start()
+
+    server = SidecarServer(
+        args.socket, rating_service, embedding_service, settings.sidecar_score_window_ms
+    )
+    logger.info("Model sidecar serving %s on %s", rating_service.model_version, args.socket)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Startup warm-up for the heavyweight services.
+
+The dependency factories in dependencies.py are lazy, so without this module the first
+request after a deploy pays for loading LangGraph, Chroma, the joblib pipeline and the
+SentenceTransformer. The lifespan hook in main.py kicks off `warm_up_services` in the
+background and `/readyz` reports unready until every required component has loaded once.
+A step that fails is retried with exponential backoff (reported as "retrying"), so a
+transient error at boot delays readiness instead of failing the instance for its whole
+life. Optional steps (WARMUP_OPTIONAL_STEPS) do not hold readiness back: while they are
+not loaded the instance is ready but "degraded", and after a bounded number of attempts
+they are reported as "failed" (a missing GOOGLE_API_KEY only costs /restaurants/search).
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+from .config import get_settings
+from .dependencies import (
+    get_embedding_service,
+    get_feature_store,
+    get_rag_service,
+    get_rating_service,
+)
+from .schemas import (
+    EmbeddingPayload,
+    RatingPredictionRequest,
+    RestaurantInfo,
+    ReviewContext,
+    TrendFeatures,
+    UserInfo,
+)
+
+logger = logging.getLogger(__name__)
+
+WARMUP_TEXT = "Warm-up review: friendly staff and tasty food."
+
+
+@dataclass
+class ComponentWarmup:
+    status: str = "pending"
+    latency_ms: Optional[int] = None
+    detail: Optional[str] = None
+    required: bool = True
+
+
+@dataclass
+class WarmupState:
+    """Shared between the lifespan task and the /readyz handler (stored on app.state)."""
+
+    components: Dict[str, ComponentWarmup] = field(default_factory=dict)
+    started_at: float = field(default_factory=time.perf_counter)
+    finished: bool = False
+    # Set on shutdown so steps still retrying stop waiting.
+    stopped: threading.Event = field(default_factory=threading.Event, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def ready(self) -> bool:
+        if not self.components:
+            return self.finished
+        return all(c.status == "ok" for c in self.components.values() if c.required)
+
+    @property
+    def degraded(self) -> bool:
+        """Serving, but an optional component is still retrying or gave up."""
+        return self.ready and any(c.status != "ok" for c in self.components.values())
+
+    def record(self, name: str, component: ComponentWarmup) -> None:
+        with self._lock:
+            self.components[name] = component
+
+
+def _sample_rating_request(embedding_dim: int) -> RatingPredictionRequest:
+    """Plausible feature row; values only need to pass validation and the pipeline."""
+    embeddings = None
+    review_text = WARMUP_TEXT
+    if embedding_dim:
+        # Skip the embedding model so the pipeline warms in parallel with it.
+        embeddings = EmbeddingPayload(review_text_embedding=[0.0] * embedding_dim)
+        review_text = None
+    return RatingPredictionRequest(
+        restaurant=RestaurantInfo(
+            location="Dubai Marina",
+            cuisine="Italian",
+            price_bucket="Medium",
+            avg_price=125.0,
+            popularity_score=60.0,
+            trend_features=TrendFeatures(
+                popularity_7_day_avg=60.0,
+                popularity_30_day_avg=60.0,
+                popularity_lag_1=60.0,
+                avg_price_7_day_avg=125.0,
+                popularity_7_day_growth=0.0,
+            ),
+        ),
+        user=UserInfo(
+            age=30,
+            home_location="Dubai Marina",
+            preferred_price_range="Medium",
+            dining_frequency="Weekly",
+            avg_rating_given=3.5,
+            total_reviews_written=10,
+            is_local_resident=True,
+            user_cuisine_match=1.0,
+            dietary_conflict=0.0,
+        ),
+        review_context=ReviewContext(
+            helpful_count=0,
+            season="Winter/Peak",
+            day_type="Weekday",
+            weather_impact_category="Neutral",
+            review_month=1,
+            review_day_of_week=0,
+            booking_lead_time_days=0,
+        ),
+        review_text=review_text,
+        embeddings=embeddings,
+    )
+
+
+def _warm_rag() -> None:
+    get_rag_service().warm_up()
+
+
+def _warm_rating_model() -> None:
+    service = get_rating_service()
+    service.predict(_sample_rating_request(service.embedding_dim))
+
+
+def _warm_embeddings() -> None:
+    service = get_embedding_service()
+    service.prepare()
+    service.embed(WARMUP_TEXT)
+
+
+def _warm_feature_store() -> None:
+    if get_settings().enable_feature_store:
+        get_feature_store()
+
+
+WARMUP_STEPS: Dict[str, Callable[[], None]] = {
+    "rag_graph": _warm_rag,
+    "rating_model": _warm_rating_model,
+    "embedding_model": _warm_embeddings,
+    "feature_store": _warm_feature_store,
+}
+
+
+def _run_step(state: WarmupState, name: str, step: Callable[[], None]) -> None:
+    settings = get_settings()
+    required = name not in settings.warmup_optional_steps
+    max_attempts = None if required else max(1, settings.warmup_optional_max_attempts)
+    delay = settings.warmup_retry_initial_seconds
+    start = time.perf_counter()
+    attempt = 1
+    while True:
+        try:
+            step()
+            break
+        except Exception as exc:
+            latency_ms = int((time.perf_counter() - start) * 1000)
+            if max_attempts is not None and attempt >= max_attempts:
+                logger.exception(
+                    "Warm-up of optional %s failed %d times; serving without it",
+                    name,
+                    attempt,
+                )
+                state.record(
+                    name,
+                    ComponentWarmup("failed", latency_ms, f"attempt {attempt}: {exc}", False),
+                )
+                return
+            logger.exception(
+                "Warm-up of %s failed (attempt %d); retrying in %.0fs", name, attempt, delay
+            )
+            state.record(
+                name,
+                ComponentWarmup("retrying", latency_ms, f"attempt {attempt}: {exc}", required),
+            )
+        if state.stopped.wait(delay):
+            state.record(
+                name, ComponentWarmup("failed", None, "stopped while retrying", required)
+            )
+            return
+        delay = min(delay * 2, settings.warmup_retry_max_seconds)
+        attempt += 1
+    latency_ms = int((time.perf_counter() - start) * 1000)
+    logger.info("Warm-up of %s completed in %d ms (attempt %d)", name, latency_ms, attempt)
+    state.record(name, ComponentWarmup("ok", latency_ms, required=required))
+
+
+def warm_up_services(state: WarmupState) -> WarmupState:
+    """
+    Load and exercise every service in parallel, retrying required steps until they
+    succeed or `state.stopped` is set. Blocking; run it off the event loop.
+    """
+    optional = get_settings().warmup_optional_steps
+    for name in WARMUP_STEPS:
+        state.record(name, ComponentWarmup(required=name not in optional))
+    # The embedding factory is shared by the rating service; build it (cheaply, the
+    # model itself stays lazy) before fanning out so lru_cache never races.
+    get_embedding_service()
+    with ThreadPoolExecutor(max_workers=len(WARMUP_STEPS), thread_name_prefix="warmup") as pool:
+        for name, step in WARMUP_STEPS.items():
+            pool.submit(_run_step, state, name, step)
+    state.finished = True
+    logger.info(
+        "Warm-up finished in %d ms (ready=%s, degraded=%s)",
+        int((time.perf_counter() - state.started_at) * 1000),
+        state.ready,
+        state.degraded,
+    )
+    return state
@@ -0,0 +1 @@
+"""Performance benchmarks and guards for the Task 3 backend."""
@@ -0,0 +1,120 @@
+"""
+Throughput under different CPU thread budgets (see app/cpu_budget.py).
+
+Boots the loadgen server once per configuration, each in a fresh process so the
+OpenMP/BLAS limits are in place before torch and xgboost load, drives the same
+request mix against it and prints one JSON report comparing RPS, tail latency and server
+CPU per configuration. Use --real-embeddings so torch's intra-op pool is exercised too.
+
+    cd task-3/backend
+    python -m benchmarks.cpu_budget --concurrency 32 --duration 20 --real-embeddings
+    python -m benchmarks.cpu_budget --config xgb4:XGBOOST_NTHREAD=4,TORCH_INTRA_OP_THREADS=2
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from typing import Dict, List, Optional
+
+from app.cpu_budget import BLAS_ENV_VARS, detect_cores
+
+from benchmarks.loadgen import (
+    _parse_mix,
+    _process_usage,
+    _start_server,
+    _wait_ready,
+    run_load,
+)
+
+
+def default_configs() -> Dict[str, Dict[str, str]]:
+    cores = str(detect_cores())
+    return {
+        # What the process does with no budget: every library sizes itself to all cores.
+        "library-defaults": {"CPU_BUDGET_ENABLED": "false"},
+        "budget": {"CPU_BUDGET_ENABLED": "true"},
+        "budget-xgboost-all-cores": {"CPU_BUDGET_ENABLED": "true", "XGBOOST_NTHREAD": cores},
+        "single-threaded": {
+            "CPU_BUDGET_ENABLED": "true",
+            "XGBOOST_NTHREAD": "1",
+            "TORCH_INTRA_OP_THREADS": "1",
+            "BLAS_THREADS": "1",
+        },
+    }
+
+
+def _parse_config(item: str) -> tuple:
+    name, _, assignments = item.partition(":")
+    env = {}
+    for pair in filter(None, assignments.split(",")):
+        key, _, value = pair.partition("=")
+        env[key.strip()] = value.strip()
+    return name, env
+
+
+def run_config(args, env: Dict[str, str], mix: Dict[str, float]) -> dict:
+    # Start from a clean slate so a BLAS limit exported in this shell does not leak
+    # into the "library-defaults" run.
+    overrides: Dict[str, Optional[str]] = {name: None for name in BLAS_ENV_VARS}
+    overrides.update(env)
+    server = _start_server(args, overrides)
+    try:
+        _wait_ready(args.port, args.startup_timeout, server)
+        if args.warmup > 0:
+            run_load(args.port, args.concurrency, args.warmup, mix, True)
+        before = _process_usage(server.pid)
+        report = run_load(args.port, args.concurrency, args.duration, mix, True)
+        after = _process_usage(server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    cpu = None
+    if before["cpu_seconds"] is not None and after["cpu_seconds"] is not None:
+        cpu = round(after["cpu_seconds"] - before["cpu_seconds"], 2)
+    return {
+        "env": env,
+        "overall": report["overall"],
+        "routes": report["routes"],
+        "cpu_seconds": cpu,
+        "peak_rss_mb": after["peak_rss_mb"],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare throughput across CPU thread budgets")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--mix", nargs="+", default=["predict=4", "search=1"])
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=20.0)
+    parser.add_argument("--real-embeddings", action="store_true")
+    parser.add_argument("--startup-timeout", type=float, default=180.0)
+    parser.add_argument(
+        "--config",
+        action="append",
+        default=[],
+        help="name:KEY=VALUE,... (repeatable); replaces the default configurations",
+    )
+    args = parser.parse_args(argv)
+
+    mix = _parse_mix(args.mix)
+    configs = dict(_parse_config(item) for item in args.config) or default_configs()
+    results = {name: run_config(args, env, mix) for name, env in configs.items()}
+    print(
+        json.dumps(
+            {
+                "cores": detect_cores(),
+                "concurrency": args.concurrency,
+                "mix": mix,
+                "real_embeddings": args.real_embeddings,
+                "configs": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
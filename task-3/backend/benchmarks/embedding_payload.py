@@ -0,0 +1,66 @@
+"""
+Parse-time benchmark: JSON float list vs base64 float32 embeddings in /predict bodies.
+
+    cd task-3/backend
+    python -m benchmarks.embedding_payload --dims 384 1024 --rounds 2000
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.schemas import RatingPredictionRequest
+from app.warmup import _sample_rating_request
+
+
+def _bodies(dim: int) -> Dict[str, bytes]:
+    vector = np.random.default_rng(0).standard_normal(dim).astype("<f4")
+    base = _sample_rating_request(0).model_dump(mode="json", exclude_none=True)
+    base.pop("review_text", None)
+    as_list = dict(base, embeddings={"review_text_embedding": vector.tolist()})
+    as_b64 = dict(
+        base,
+        embeddings={
+            "review_text_embedding_b64": base64.b64encode(vector.tobytes()).decode("ascii"),
+            "dimension": dim,
+        },
+    )
+    return {"list": json.dumps(as_list).encode(), "b64": json.dumps(as_b64).encode()}
+
+
+def run(dims: List[int], rounds: int) -> List[Dict]:
+    results = []
+    for dim in dims:
+        for form, body in _bodies(dim).items():
+            RatingPredictionRequest.model_validate_json(body)  # warm-up
+            start = time.perf_counter()
+            for _ in range(rounds):
+                request = RatingPredictionRequest.model_validate_json(body)
+                np.asarray(request.embeddings.vector(), dtype=float)
+            elapsed = time.perf_counter() - start
+            results.append(
+                {
+                    "dimension": dim,
+                    "form": form,
+                    "body_bytes": len(body),
+                    "parse_us": round(elapsed / rounds * 1e6, 2),
+                }
+            )
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Embedding payload parse benchmark")
+    parser.add_argument("--dims", type=int, nargs="+", default=[384, 1024])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.dims, args.rounds), indent=2))
+
+
+if __name__ == "__main__":
+    main()
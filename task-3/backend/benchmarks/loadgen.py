@@ -0,0 +1,344 @@
+"""
+Throughput / tail-latency benchmark for the API with local stubs.
+
+Boots `app.main:app` under uvicorn in a child process with the stubs from
+`benchmarks.stubs` installed (fake Gemini LLM + embeddings and fake SentenceTransformer
+with configurable latency, real XGBoost artifact, on-disk Chroma), waits for /readyz,
+then drives a closed-loop request mix and prints one JSON report: RPS, p50/p95/p99 per
+route, errors, and server CPU seconds and RSS (read from /proc, Linux only).
+
+    cd task-3/backend
+    python -m benchmarks.loadgen --concurrency 32 --duration 30 \\
+        --mix search=1 predict=4 healthz=1 --llm-latency-ms 300 > report.json
+
+Searches and predicts use distinct payloads by default so the response and prediction
+caches do not flatter the numbers; pass --repeat-payloads to measure the cached path.
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+ROUTES = {
+    "search": "/v1/restaurants/search",
+    "predict": "/v1/ratings/predict",
+    "healthz": "/v1/healthz",
+}
+QUESTIONS = (
+    "Cheap Italian food in Dubai Marina",
+    "Romantic dinner in Downtown",
+    "Best seafood in JBR with a view",
+    "Expensive French restaurant",
+    "Family friendly Indian place in Sharjah",
+    "Thai food near JLT",
+)
+REVIEWS = (
+    "Great service and the pasta was excellent.",
+    "Too noisy, food arrived cold.",
+    "Lovely view of the marina, a bit pricey.",
+    "Authentic flavours, will come back.",
+)
+
+
+# --------------------------------------------------------------------------- server
+
+
+def serve(
+    port: int, llm_latency_ms: float, embed_latency_ms: float, real_embeddings: bool = False
+) -> None:
+    """Child-process entry point: install stubs, lift the rate limit, run uvicorn."""
+    import uvicorn
+
+    from app.config import get_settings
+
+    from benchmarks.stubs import install_stubs
+
+    settings = get_settings()
+    # The load generator is a single caller; the limiter is not what we are measuring.
+    settings.default_rate_limit_per_minute = 10**9
+    install_stubs(
+        llm_latency_ms=llm_latency_ms,
+        embed_latency_ms=embed_latency_ms,
+        fake_encoder=not real_embeddings,
+    )
+
+    from app.main import app
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+def _start_server(
+    args, env_overrides: Optional[Dict[str, Optional[str]]] = None
+) -> subprocess.Popen:
+    """`env_overrides` values replace the inherited environment; None removes a variable."""
+    env = dict(os.environ)
+    # Task 1 refuses to build clients without a key, even though the stubs never use it.
+    env.setdefault("GOOGLE_API_KEY", "stub")
+    for name, value in (env_overrides or {}).items():
+        if value is None:
+            env.pop(name, None)
+        else:
+            env[name] = value
+    command = [
+        sys.executable, "-m", "benchmarks.loadgen", "--serve",
+        "--port", str(args.port),
+        "--llm-latency-ms", str(args.llm_latency_ms),
+        "--embed-latency-ms", str(args.embed_latency_ms),
+    ]
+    if getattr(args, "real_embeddings", False):
+        command.append("--real-embeddings")
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+
+
+def _wait_ready(port: int, timeout: float, server: subprocess.Popen) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited during startup (code {server.returncode}).")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/v1/readyz")
+            if conn.getresponse().status == 200:
+                return time.perf_counter() - start
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise TimeoutError(f"Server not ready after {timeout:.0f}s.")
+
+
+def _process_usage(pid: int) -> Dict[str, Optional[float]]:
+    """CPU seconds and RSS of the server process, or None off Linux."""
+    try:
+        fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+        ticks = os.sysconf("SC_CLK_TCK")
+        status = {
+            line.split(":")[0]: line.split()[1]
+            for line in Path(f"/proc/{pid}/status").read_text().splitlines()
+            if line.startswith(("VmRSS", "VmHWM"))
+        }
+    except (OSError, IndexError, ValueError):
+        return {"cpu_seconds": None, "rss_mb": None, "peak_rss_mb": None}
+    return {
+        # utime and stime are fields 14 and 15 of /proc/<pid>/stat.
+        "cpu_seconds": (int(fields[11]) + int(fields[12])) / ticks,
+        "rss_mb": round(int(status.get("VmRSS", 0)) / 1024, 1),
+        "peak_rss_mb": round(int(status.get("VmHWM", 0)) / 1024, 1),
+    }
+
+
+# --------------------------------------------------------------------------- client
+
+
+def _predict_body(rng: random.Random, distinct: bool, seq: int) -> dict:
+    from app.warmup import _sample_rating_request
+
+    body = _sample_rating_request(0).model_dump(mode="json", exclude_none=True)
+    review = rng.choice(REVIEWS)
+    body["review_text"] = f"{review} (visit {seq})" if distinct else review
+    body["user"]["age"] = rng.randint(18, 70)
+    return body
+
+
+def _search_body(rng: random.Random, distinct: bool, seq: int) -> dict:
+    question = rng.choice(QUESTIONS)
+    return {"question": f"{question} #{seq}" if distinct else question}
+
+
+def _make_request(
+    route: str, rng: random.Random, distinct: bool, seq: int
+) -> Tuple[str, str, bytes]:
+    if route == "healthz":
+        return "GET", ROUTES[route], b""
+    builder = _search_body if route == "search" else _predict_body
+    return "POST", ROUTES[route], json.dumps(builder(rng, distinct, seq)).encode()
+
+
+def _worker(
+    port: int,
+    deadline: float,
+    pick_route: Callable[[random.Random], str],
+    distinct: bool,
+    seed: int,
+    counter: Callable[[], int],
+    samples: Dict[str, List[float]],
+    errors: Dict[str, int],
+    lock: threading.Lock,
+) -> None:
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    headers = {"content-type": "application/json", "x-api-key": f"bench-{seed}"}
+    local: Dict[str, List[float]] = {route: [] for route in ROUTES}
+    local_errors: Dict[str, int] = {route: 0 for route in ROUTES}
+    while time.perf_counter() < deadline:
+        route = pick_route(rng)
+        method, path, body = _make_request(route, rng, distinct, counter())
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=body or None, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status < 400
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+            ok = False
+        elapsed = time.perf_counter() - start
+        if ok:
+            local[route].append(elapsed)
+        else:
+            local_errors[route] += 1
+    conn.close()
+    with lock:
+        for route in ROUTES:
+            samples[route].extend(local[route])
+            errors[route] += local_errors[route]
+
+
+def _summary(latencies: List[float], errors: int, duration: float) -> dict:
+    if not latencies:
+        return {"requests": 0, "errors": errors, "rps": 0.0}
+    ms = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / duration, 2),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(ms.max()), 2),
+    }
+
+
+def run_load(
+    port: int, concurrency: int, duration: float, mix: Dict[str, float], distinct: bool
+) -> dict:
+    routes = list(mix)
+    weights = [mix[route] for route in routes]
+    samples: Dict[str, List[float]] = {route: [] for route in ROUTES}
+    errors: Dict[str, int] = {route: 0 for route in ROUTES}
+    lock = threading.Lock()
+    sequence = iter(range(1 << 62))
+    seq_lock = threading.Lock()
+
+    def counter() -> int:
+        with seq_lock:
+            return next(sequence)
+
+    def pick_route(rng: random.Random) -> str:
+        return rng.choices(routes, weights)[0]
+
+    start = time.perf_counter()
+    deadline = start + duration
+    threads = [
+        threading.Thread(
+            target=_worker,
+            args=(port, deadline, pick_route, distinct, seed, counter, samples, errors, lock),
+            daemon=True,
+        )
+        for seed in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    all_latencies = [value for route in routes for value in samples[route]]
+    return {
+        "overall": _summary(all_latencies, sum(errors.values()), elapsed),
+        "routes": {route: _summary(samples[route], errors[route], elapsed) for route in routes},
+        "duration_s": round(elapsed, 2),
+    }
+
+
+def _parse_mix(items: List[str]) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for item in items:
+        route, _, weight = item.partition("=")
+        if route not in ROUTES:
+            raise SystemExit(f"Unknown route '{route}' in --mix; use {sorted(ROUTES)}.")
+        mix[route] = float(weight or 1)
+    return {route: weight for route, weight in mix.items() if weight > 0}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="API load test with local stubs")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds first")
+    parser.add_argument(
+        "--mix", nargs="+", default=["search=1", "predict=4", "healthz=1"],
+        help="route=weight pairs (routes: search, predict, healthz)",
+    )
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=20.0)
+    parser.add_argument("--repeat-payloads", action="store_true")
+    parser.add_argument(
+        "--real-embeddings", action="store_true", help="Keep the real SentenceTransformer"
+    )
+    parser.add_argument("--startup-timeout", type=float, default=180.0)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.port, args.llm_latency_ms, args.embed_latency_ms, args.real_embeddings)
+        return
+
+    mix = _parse_mix(args.mix)
+    server = _start_server(args)
+    try:
+        ready_s = _wait_ready(args.port, args.startup_timeout, server)
+        distinct = not args.repeat_payloads
+        if args.warmup > 0:
+            run_load(args.port, args.concurrency, args.warmup, mix, distinct)
+        before = _process_usage(server.pid)
+        report = run_load(args.port, args.concurrency, args.duration, mix, distinct)
+        after = _process_usage(server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    cpu = None
+    if before["cpu_seconds"] is not None and after["cpu_seconds"] is not None:
+        cpu = round(after["cpu_seconds"] - before["cpu_seconds"], 2)
+    report.update(
+        {
+            "run_id": str(uuid.uuid4()),
+            "config": {
+                "concurrency": args.concurrency,
+                "mix": mix,
+                "llm_latency_ms": args.llm_latency_ms,
+                "embed_latency_ms": args.embed_latency_ms,
+                "distinct_payloads": distinct,
+                "real_embeddings": args.real_embeddings,
+            },
+            "server": {
+                "ready_s": round(ready_s, 2),
+                "cpu_seconds": cpu,
+                "cpu_utilization": round(cpu / report["duration_s"], 3) if cpu is not None else None,
+                "rss_mb": after["rss_mb"],
+                "peak_rss_mb": after["peak_rss_mb"],
+            },
+        }
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Memory per worker and time to ready: pre-fork preloading (app/preload.py) vs. uvicorn.
+
+Launches the real app, with real models and no stubs, three ways:
+
+- dockerfile:   `uvicorn app.main:app`, the Dockerfile CMD (one process);
+- uvicorn:      `uvicorn app.main:app --workers N` (each worker loads its own models);
+- preload:      `WEB_CONCURRENCY=N python -m app.preload` (models loaded once, then fork).
+
+For each it records the seconds until every worker answered /readyz, then the PSS and
+RSS of the whole process tree (see benchmarks.sidecar.memory_report), idle and again after
+a short predict-only load, since copy-on-write sharing erodes as workers touch pages.
+Search traffic is left out so no Gemini calls are made.
+
+    cd task-3/backend
+    python -m benchmarks.preload --workers 4 --duration 15
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.loadgen import BACKEND_DIR, run_load
+from benchmarks.sidecar import memory_report
+
+
+def _command(mode: str, port: int, workers: int) -> List[str]:
+    if mode == "preload":
+        return [sys.executable, "-m", "app.preload", "--host", "127.0.0.1",
+                "--port", str(port), "--log-level", "warning", "--no-access-log"]
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+               "--port", str(port), "--log-level", "warning", "--no-access-log"]
+    if mode == "uvicorn":
+        command += ["--workers", str(workers)]
+    return command
+
+
+def _wait_all_ready(
+    port: int, workers: int, timeout: float, server: subprocess.Popen
+) -> float:
+    """
+    Each connection lands on one worker, so a single 200 proves little; require enough
+    consecutive 200s on fresh connections that every worker has almost surely answered.
+    """
+    needed = 5 * workers
+    streak = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited during startup (code {server.returncode}).")
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+        try:
+            conn.request("GET", "/v1/readyz", headers={"Connection": "close"})
+            ok = conn.getresponse().status == 200
+        except OSError:
+            ok = False
+        finally:
+            conn.close()
+        streak = streak + 1 if ok else 0
+        if streak >= needed:
+            return time.perf_counter() - start
+        if not ok:
+            time.sleep(0.25)
+    raise TimeoutError(f"Server not ready after {timeout:.0f}s.")
+
+
+def run_mode(args, mode: str) -> dict:
+    workers = 1 if mode == "dockerfile" else args.workers
+    env = dict(os.environ)
+    # Task 1 refuses to build clients without a key; warm-up never calls Gemini.
+    env.setdefault("GOOGLE_API_KEY", "stub")
+    env["WEB_CONCURRENCY"] = str(workers)
+    env.pop("SIDECAR_SOCKET", None)
+    server = subprocess.Popen(
+        _command(mode, args.port, workers), cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL
+    )
+    try:
+        ready_s = _wait_all_ready(args.port, workers, args.startup_timeout, server)
+        idle = memory_report([server.pid])
+        report = None
+        if args.duration > 0:
+            report = run_load(args.port, args.concurrency, args.duration, {"predict": 1.0}, True)
+        loaded = memory_report([server.pid])
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+    pss = loaded["pss_mb"]
+    return {
+        "workers": workers,
+        "ready_s": round(ready_s, 2),
+        "memory_idle": idle,
+        "memory_after_load": loaded,
+        "pss_mb_per_worker": round(pss / workers, 1) if pss is not None else None,
+        "predict": report["overall"] if report else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Pre-fork preloading vs. uvicorn workers")
+    parser.add_argument("--port", type=int, default=8768)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15.0, help="Predict load seconds")
+    parser.add_argument(
+        "--modes", nargs="+", default=["dockerfile", "uvicorn", "preload"],
+        choices=["dockerfile", "uvicorn", "preload"],
+    )
+    parser.add_argument("--startup-timeout", type=float, default=600.0)
+    args = parser.parse_args(argv)
+
+    results: Dict[str, dict] = {mode: run_mode(args, mode) for mode in args.modes}
+    print(json.dumps({"workers": args.workers, "modes": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Local stand-in for a SageMaker runtime endpoint.
+
+Implements `POST /endpoints/<name>/invocations` in front of the real Task 2 pipeline and
+accepts both wire formats the backend can send (JSON and the npz batch layout). Point
+the API at it to exercise the remote path without AWS:
+
+    python -m benchmarks.sagemaker_stub --port 8085 &
+    ENABLE_LOCAL_MODEL=false SAGEMAKER_ENDPOINT_NAME=stub \\
+    AWS_ENDPOINT_URL=http://127.0.0.1:8085 AWS_ACCESS_KEY_ID=x AWS_SECRET_ACCESS_KEY=x \\
+    SAGEMAKER_WIRE_FORMAT=npz uvicorn app.main:app
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+import joblib
+
+from app.config import get_settings
+from app.schemas import RatingPredictionRequest
+from app.services.feature_codec import (
+    NPY_CONTENT_TYPE,
+    NPZ_CONTENT_TYPE,
+    decode_features,
+    encode_predictions,
+)
+from app.services.model import _ensure_task2_on_path, build_feature_row
+
+_INVOCATION_PATH = re.compile(r"^/endpoints/[^/]+/invocations$")
+
+
+def load_pipeline():
+    settings = get_settings()
+    _ensure_task2_on_path(settings.task2_dir)
+    pipeline = joblib.load(settings.rating_model_dir / settings.rating_model_filename)
+    preprocessor = pipeline.named_steps["preprocessor"]
+    embed_entry = next((e for e in preprocessor.transformers if e[0] == "embed"), None)
+    return pipeline, (embed_entry[2] if embed_entry else [])
+
+
+def make_handler(pipeline, embedding_cols: List[str]):
+    import pandas as pd
+
+    class InvocationHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args) -> None:  # keep benchmark output quiet
+            pass
+
+        def _reply(self, code: int, body: bytes, content_type: str) -> None:
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("x-Amzn-Invoked-Production-Variant", "stub")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self) -> None:
+            if not _INVOCATION_PATH.match(self.path):
+                self._reply(404, b'{"message": "not found"}', "application/json")
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            content_type = self.headers.get("Content-Type", "application/json")
+            try:
+                if content_type.startswith(NPZ_CONTENT_TYPE):
+                    df = decode_features(body, embedding_cols)
+                    preds = pipeline.predict(df)
+                    self._reply(200, encode_predictions(preds), NPY_CONTENT_TYPE)
+                    return
+                request = RatingPredictionRequest(**json.loads(body))
+                row = build_feature_row(request)
+                row.update(zip(embedding_cols, request.embeddings.review_text_embedding))
+                pred = float(pipeline.predict(pd.DataFrame([row]))[0])
+                self._reply(
+                    200, json.dumps({"rating_prediction": pred}).encode(), "application/json"
+                )
+            except Exception as exc:
+                self._reply(
+                    400, json.dumps({"message": str(exc)}).encode(), "application/json"
+                )
+
+    return InvocationHandler
+
+
+def serve(host: str, port: int) -> ThreadingHTTPServer:
+    pipeline, embedding_cols = load_pipeline()
+    return ThreadingHTTPServer((host, port), make_handler(pipeline, embedding_cols))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Local SageMaker endpoint stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8085)
+    args = parser.parse_args(argv)
+    server = serve(args.host, args.port)
+    print(f"[STUB] SageMaker stand-in listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
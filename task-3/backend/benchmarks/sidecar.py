@@ -0,0 +1,213 @@
+"""
+Per-worker models vs. the model sidecar (app/services/sidecar.py), N uvicorn workers each.
+
+For each mode the benchmark boots `uvicorn benchmarks.stubbed_app:app --workers N` (and,
+in sidecar mode, the sidecar first), waits for /readyz, drives the same closed-loop mix
+and prints one JSON report: time to ready, RPS and p50/p99, and the memory of the whole
+process tree. PSS (from /proc/<pid>/smaps_rollup, Linux only) splits shared pages between
+the processes mapping them, so it is the number to compare; RSS double-counts them.
+
+    cd task-3/backend
+    python -m benchmarks.sidecar --workers 4 --concurrency 32 --duration 20 --real-embeddings
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.loadgen import BACKEND_DIR, _parse_mix, _wait_ready, run_load
+
+
+def _children(pid: int) -> List[int]:
+    pids = []
+    for task in Path(f"/proc/{pid}/task").glob("*"):
+        try:
+            pids.extend(int(child) for child in (task / "children").read_text().split())
+        except OSError:
+            continue
+    return pids
+
+
+def _tree(pid: int) -> List[int]:
+    pids, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        pids.append(current)
+        stack.extend(_children(current))
+    return pids
+
+
+def _smaps_rollup(pid: int) -> Dict[str, int]:
+    """Rss / Pss in kB, or {} when the process is gone or /proc is unavailable."""
+    try:
+        lines = Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()
+    except OSError:
+        return {}
+    values = {}
+    for line in lines:
+        key, _, rest = line.partition(":")
+        if key in ("Rss", "Pss"):
+            values[key] = int(rest.split()[0])
+    return values
+
+
+def memory_report(root_pids: List[int]) -> Dict[str, Optional[float]]:
+    processes = [pid for root in root_pids for pid in _tree(root)]
+    rollups = [_smaps_rollup(pid) for pid in processes]
+    rollups = [r for r in rollups if r]
+    if not rollups:
+        return {"processes": len(processes), "rss_mb": None, "pss_mb": None}
+    return {
+        "processes": len(rollups),
+        "rss_mb": round(sum(r.get("Rss", 0) for r in rollups) / 1024, 1),
+        "pss_mb": round(sum(r.get("Pss", 0) for r in rollups) / 1024, 1),
+    }
+
+
+def _env(args, sidecar_socket: Optional[str]) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("GOOGLE_API_KEY", "stub")
+    env.pop("SIDECAR_SOCKET", None)
+    env.update(
+        {
+            "WEB_CONCURRENCY": str(args.workers),
+            "BENCH_LLM_LATENCY_MS": str(args.llm_latency_ms),
+            "BENCH_EMBED_LATENCY_MS": str(args.embed_latency_ms),
+            "BENCH_REAL_EMBEDDINGS": "true" if args.real_embeddings else "false",
+        }
+    )
+    if sidecar_socket:
+        env["SIDECAR_SOCKET"] = sidecar_socket
+    return env
+
+
+def _start_sidecar(args, socket_path: str) -> subprocess.Popen:
+    command = [sys.executable, "-m", "benchmarks.sidecar", "--serve-sidecar", socket_path]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=_env(args, None))
+
+
+def _wait_sidecar(socket_path: str, timeout: float, process: subprocess.Popen) -> None:
+    from app.services.sidecar import SidecarClient, SidecarError
+
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"Sidecar exited during startup (code {process.returncode}).")
+        try:
+            SidecarClient(socket_path, timeout_seconds=2).info()
+            return
+        except SidecarError:
+            time.sleep(0.25)
+    raise TimeoutError(f"Sidecar not ready after {timeout:.0f}s.")
+
+
+def _start_workers(args, sidecar_socket: Optional[str]) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "uvicorn", "benchmarks.stubbed_app:app",
+        "--host", "127.0.0.1", "--port", str(args.port),
+        "--workers", str(args.workers),
+        "--log-level", "warning", "--no-access-log",
+    ]
+    return subprocess.Popen(
+        command, cwd=BACKEND_DIR, env=_env(args, sidecar_socket), stdout=subprocess.DEVNULL
+    )
+
+
+def run_mode(args, mix: Dict[str, float], use_sidecar: bool) -> dict:
+    socket_path = os.path.join(tempfile.mkdtemp(prefix="engage-sidecar-"), "sidecar.sock")
+    processes: List[subprocess.Popen] = []
+    start = time.perf_counter()
+    try:
+        if use_sidecar:
+            sidecar = _start_sidecar(args, socket_path)
+            processes.append(sidecar)
+            _wait_sidecar(socket_path, args.startup_timeout, sidecar)
+        server = _start_workers(args, socket_path if use_sidecar else None)
+        processes.append(server)
+        _wait_ready(args.port, args.startup_timeout, server)
+        ready_s = time.perf_counter() - start
+        idle = memory_report([p.pid for p in processes])
+        if args.warmup > 0:
+            run_load(args.port, args.concurrency, args.warmup, mix, True)
+        report = run_load(args.port, args.concurrency, args.duration, mix, True)
+        loaded = memory_report([p.pid for p in processes])
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in reversed(processes):
+            process.wait(timeout=30)
+    return {
+        "ready_s": round(ready_s, 2),
+        "overall": report["overall"],
+        "routes": report["routes"],
+        "memory_idle": idle,
+        "memory_after_load": loaded,
+        "pss_mb_per_worker": (
+            round(loaded["pss_mb"] / args.workers, 1) if loaded["pss_mb"] is not None else None
+        ),
+    }
+
+
+def serve_sidecar(socket_path: str) -> None:
+    """Child-process entry point: sidecar with the fake encoder unless real embeddings."""
+    from app.config import get_settings
+    from app.services import sidecar
+
+    from benchmarks.stubs import install_stubs
+
+    install_stubs(
+        llm_latency_ms=float(os.environ.get("BENCH_LLM_LATENCY_MS", "300")),
+        embed_latency_ms=float(os.environ.get("BENCH_EMBED_LATENCY_MS", "20")),
+        settings=get_settings(),
+        fake_encoder=os.environ.get("BENCH_REAL_EMBEDDINGS", "false").lower() != "true",
+    )
+    sidecar.main(["--socket", socket_path])
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Per-worker models vs. the model sidecar")
+    parser.add_argument("--serve-sidecar", metavar="SOCKET", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--mix", nargs="+", default=["predict=4", "search=1"])
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=20.0)
+    parser.add_argument("--real-embeddings", action="store_true")
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    args = parser.parse_args(argv)
+
+    if args.serve_sidecar:
+        serve_sidecar(args.serve_sidecar)
+        return
+
+    mix = _parse_mix(args.mix)
+    results = {
+        "per-worker": run_mode(args, mix, use_sidecar=False),
+        "sidecar": run_mode(args, mix, use_sidecar=True),
+    }
+    print(
+        json.dumps(
+            {
+                "workers": args.workers,
+                "concurrency": args.concurrency,
+                "mix": mix,
+                "real_embeddings": args.real_embeddings,
+                "modes": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
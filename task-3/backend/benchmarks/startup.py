@@ -0,0 +1,120 @@
+"""
+Cold-start guard for the backend.
+
+Imports `app.main` in a fresh interpreter with `python -X importtime`, then reports the
+slowest imports, total import time and peak RSS. It exits non-zero when a heavy ML/cloud
+dependency is imported eagerly or a budget is exceeded, so CI can run it before deploy:
+
+    cd task-3/backend
+    python -m benchmarks.startup --max-import-ms 1500 --max-rss-mb 250
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# These only belong in the process once their mode is configured / first used.
+LAZY_MODULES = (
+    "torch",
+    "sentence_transformers",
+    "transformers",
+    "onnxruntime",
+    "boto3",
+    "botocore",
+    "chromadb",
+    "langchain",
+    "langchain_core",
+    "langgraph",
+    "joblib",
+    "pandas",
+    "sklearn",
+    "xgboost",
+)
+
+_PROBE = (
+    "import resource, sys, time\n"
+    "t0 = time.perf_counter()\n"
+    "import app.main\n"
+    "elapsed = (time.perf_counter() - t0) * 1000\n"
+    "scale = 1024 * 1024 if sys.platform == 'darwin' else 1024\n"
+    "rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale\n"
+    "print(f'{elapsed:.1f} {rss:.1f}')\n"
+)
+
+
+def _parse_importtime(stderr: str) -> Dict[str, Dict[str, int]]:
+    """Map module name -> self/cumulative microseconds from -X importtime output."""
+    modules: Dict[str, Dict[str, int]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[12:].split("|"))
+        modules[name.strip()] = {"self_us": int(self_us), "cumulative_us": int(cumulative_us)}
+    return modules
+
+
+def measure(env: Optional[Dict[str, str]] = None) -> Dict:
+    proc_env = dict(os.environ)
+    # Warm-up would be triggered by the lifespan hook, not by import, but keep it off so
+    # the probe never touches model files.
+    proc_env.setdefault("ENABLE_WARMUP", "false")
+    proc_env.update(env or {})
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        cwd=BACKEND_DIR,
+        env=proc_env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    import_ms, rss_mb = (float(value) for value in proc.stdout.split())
+    modules = _parse_importtime(proc.stderr)
+    eager = sorted(
+        {name.split(".")[0] for name in modules} & set(LAZY_MODULES)
+    )
+    slowest: List[Dict] = sorted(
+        ({"module": name, **timing} for name, timing in modules.items()),
+        key=lambda item: item["self_us"],
+        reverse=True,
+    )[:15]
+    return {
+        "import_ms": import_ms,
+        "peak_rss_mb": rss_mb,
+        "module_count": len(modules),
+        "eager_heavy_modules": eager,
+        "slowest_self": slowest,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Backend cold-start import benchmark")
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-rss-mb", type=float, default=None)
+    parser.add_argument("--output", type=Path, help="Optional path to write the JSON report")
+    args = parser.parse_args(argv)
+
+    report = measure()
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    failures = []
+    if report["eager_heavy_modules"]:
+        failures.append(f"heavy modules imported eagerly: {report['eager_heavy_modules']}")
+    if args.max_import_ms is not None and report["import_ms"] > args.max_import_ms:
+        failures.append(f"import took {report['import_ms']} ms > {args.max_import_ms} ms")
+    if args.max_rss_mb is not None and report["peak_rss_mb"] > args.max_rss_mb:
+        failures.append(f"peak RSS {report['peak_rss_mb']} MB > {args.max_rss_mb} MB")
+    if failures:
+        raise SystemExit("Startup budget exceeded: " + "; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
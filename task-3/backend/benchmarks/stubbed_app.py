@@ -0,0 +1,33 @@
+"""
+Import target for multi-worker benchmark servers: `uvicorn benchmarks.stubbed_app:app
+--workers N`. Each worker process imports this module, so the stubs are installed per
+worker from the environment instead of from `loadgen --serve` arguments:
+
+    BENCH_LLM_LATENCY_MS, BENCH_EMBED_LATENCY_MS  fake model latencies
+    BENCH_REAL_EMBEDDINGS=true                    keep the real SentenceTransformer
+
+With SIDECAR_SOCKET set the embedding model lives in the sidecar, so no fake encoder is
+installed in the worker (the sidecar process installs its own, see benchmarks.sidecar).
+"""
+from __future__ import annotations
+
+import os
+
+from app.config import get_settings
+
+from benchmarks.stubs import install_stubs
+
+settings = get_settings()
+settings.default_rate_limit_per_minute = 10**9
+install_stubs(
+    llm_latency_ms=float(os.environ.get("BENCH_LLM_LATENCY_MS", "300")),
+    embed_latency_ms=float(os.environ.get("BENCH_EMBED_LATENCY_MS", "20")),
+    fake_encoder=(
+        not settings.sidecar_socket
+        and os.environ.get("BENCH_REAL_EMBEDDINGS", "false").lower() != "true"
+    ),
+)
+
+from app.main import app  # noqa: E402
+
+__all__ = ["app"]
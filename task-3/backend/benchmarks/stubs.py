@@ -0,0 +1,143 @@
+"""
+Deterministic local stand-ins for the remote/heavy dependencies of the backend.
+
+`install_stubs` swaps Task 1's Gemini chat model and Gemini embeddings, and the rating
+SentenceTransformer, for fakes with a configurable sleep, while keeping the real XGBoost
+pipeline and the on-disk Chroma collection. It must run before anything builds the RAG
+graph, because Task 1's agents bind `get_llm` / `get_embeddings` at import time.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from app.config import Settings, get_settings
+
+_CUISINES = (
+    "Chinese", "Emirati", "French", "Indian", "Seafood",
+    "Mexican", "Italian", "Thai", "Mediterranean", "Iranian",
+)
+_LOCATIONS = {
+    "marina": "Dubai Marina",
+    "downtown": "Downtown Dubai",
+    "jlt": "Jumeirah Lakes Towers (JLT)",
+    "jbr": "Jumeirah Beach Residence (JBR)",
+    "sharjah": "Sharjah",
+    "abu dhabi": "Abu Dhabi",
+    "business bay": "Business Bay",
+    "al barsha": "Al Barsha",
+}
+
+
+def _seeded_unit_vectors(texts: Sequence[str], dim: int) -> np.ndarray:
+    """Same text -> same vector across runs and processes."""
+    rows = []
+    for text in texts:
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+        seed = int.from_bytes(digest, "little")
+        row = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+        rows.append(row / np.linalg.norm(row))
+    return np.stack(rows) if rows else np.zeros((0, dim), dtype=np.float32)
+
+
+def fake_filters(question: str) -> dict:
+    """Keyword version of Task 1's filter extraction prompt."""
+    lowered = question.lower()
+    cuisine = next((c for c in _CUISINES if c.lower() in lowered), None)
+    location = next((v for k, v in _LOCATIONS.items() if k in lowered), None)
+    price_max = None
+    if "cheap" in lowered:
+        price_max = 100
+    elif "expensive" in lowered or "luxury" in lowered:
+        price_max = 300
+    return {"location": location, "price_max": price_max, "cuisine": cuisine, "amenities": None}
+
+
+def make_fake_llm(latency_ms: float):
+    """
+    Runnable that can stand in for ChatGoogleGenerativeAI in `prompt | llm | parser`.
+    Extraction prompts get a JSON filter object, everything else a short canned answer.
+    """
+    from langchain_core.messages import AIMessage
+    from langchain_core.runnables import RunnableLambda
+
+    def respond(prompt_value) -> AIMessage:
+        time.sleep(latency_ms / 1000.0)
+        prompt = prompt_value.to_string()
+        if "JSON Output:" in prompt:
+            question = prompt.rsplit("User Query:", 1)[-1].split("JSON Output:", 1)[0]
+            return AIMessage(content=json.dumps(fake_filters(question.strip())))
+        return AIMessage(content="Based on the context, the first listed restaurant is a great fit.")
+
+    return RunnableLambda(respond)
+
+
+class FakeQueryEmbeddings:
+    """Replaces GoogleGenerativeAIEmbeddings; dimension follows the stored collection."""
+
+    def __init__(self, task1_config, latency_ms: float, dim: Optional[int] = None) -> None:
+        self._task1_config = task1_config
+        self._latency_ms = latency_ms
+        self._dim = dim
+
+    def _dimension(self) -> int:
+        if self._dim is None:
+            client = self._task1_config.get_chroma_client()
+            collection = client.get_collection(name=self._task1_config.COLLECTION_NAME)
+            self._dim = len(collection.peek(limit=1)["embeddings"][0])
+        return self._dim
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self._latency_ms / 1000.0)
+        return _seeded_unit_vectors([text], self._dimension())[0].tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self._latency_ms / 1000.0)
+        return _seeded_unit_vectors(texts, self._dimension()).tolist()
+
+
+class FakeSentenceEncoder:
+    """Implements the `encode` signature EmbeddingService calls on SentenceTransformer."""
+
+    def __init__(self, dim: int, latency_ms: float) -> None:
+        self._dim = dim
+        self._latency_ms = latency_ms
+
+    def encode(self, sentences, batch_size: int = 32, **_ignored) -> np.ndarray:
+        # One "forward pass" per batch, like the real model.
+        batches = max(1, -(-len(sentences) // max(1, batch_size)))
+        time.sleep(self._latency_ms * batches / 1000.0)
+        return _seeded_unit_vectors(list(sentences), self._dim)
+
+
+def install_stubs(
+    llm_latency_ms: float = 300.0,
+    embed_latency_ms: float = 50.0,
+    settings: Optional[Settings] = None,
+    fake_encoder: bool = True,
+) -> None:
+    """
+    Patch Task 1's client factories and the shared EmbeddingService in-process.
+    `fake_encoder=False` keeps the real SentenceTransformer (CPU benchmarks).
+    """
+    from app.dependencies import get_embedding_service, get_rating_service
+    from app.services.rag import _ensure_task1_on_path
+
+    settings = settings or get_settings()
+    _ensure_task1_on_path(settings.task1_dir)
+    import config as task1_config  # type: ignore
+
+    fake_llm = make_fake_llm(llm_latency_ms)
+    fake_embeddings = FakeQueryEmbeddings(task1_config, embed_latency_ms)
+    task1_config.get_llm = lambda: fake_llm
+    task1_config.get_embeddings = lambda: fake_embeddings
+
+    if not fake_encoder:
+        return
+    # Loads the real joblib pipeline; its embedding width sizes the fake encoder.
+    dim = get_rating_service().embedding_dim or 384
+    get_embedding_service()._model = FakeSentenceEncoder(dim, embed_latency_ms)
@@ -0,0 +1,122 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Tests import `app` and `benchmarks` the way `cd task-3/backend && python -m ...` does.
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+TINY_MODEL_FILENAME = "tiny_rating_model.pkl"
+
+
+@pytest.fixture
+def write_tiny_model(tmp_path):
+    """
+    Save a small sklearn pipeline shaped like Task 2's (a "preprocessor" with an "embed"
+    entry); its prediction is `scale * age / 10`, so generations are easy to tell apart.
+    """
+    pd = pytest.importorskip("pandas")
+    joblib = pytest.importorskip("joblib")
+    pytest.importorskip("sklearn")
+    from sklearn.compose import ColumnTransformer
+    from sklearn.linear_model import LinearRegression
+    from sklearn.pipeline import Pipeline
+
+    def write(scale: float = 1.0) -> Path:
+        ages = [float(age) for age in range(18, 70)]
+        frame = pd.DataFrame({"age": ages, "embed_0": 0.0, "embed_1": 0.0})
+        pipeline = Pipeline(
+            [
+                (
+                    "preprocessor",
+                    ColumnTransformer(
+                        [
+                            ("num", "passthrough", ["age"]),
+                            ("embed", "passthrough", ["embed_0", "embed_1"]),
+                        ]
+                    ),
+                ),
+                ("regressor", LinearRegression()),
+            ]
+        )
+        pipeline.fit(frame, [scale * age / 10 for age in ages])
+        path = tmp_path / TINY_MODEL_FILENAME
+        joblib.dump(pipeline, path)
+        return path
+
+    return write
+
+
+@pytest.fixture
+def local_rating_service(tmp_path, write_tiny_model):
+    """RatingModelService in local mode over the tiny pipeline, with the memo enabled."""
+    pytest.importorskip("fastapi")
+    from app.config import get_settings
+    from app.services.embedding import EmbeddingService
+    from app.services.model import RatingModelService
+
+    write_tiny_model(1.0)
+    settings = get_settings().model_copy(
+        update={
+            "rating_model_dir": tmp_path,
+            "rating_model_filename": TINY_MODEL_FILENAME,
+            "enable_local_model": True,
+            "sidecar_socket": None,
+            "prediction_cache_size": 64,
+        }
+    )
+    return RatingModelService(
+        settings=settings, embedding_service=EmbeddingService(model_name="unused")
+    )
+
+
+@pytest.fixture
+def tiny_transformer(tmp_path):
+    """
+    Factory for the body of a SentenceTransformer: a one-layer BERT with a word-level
+    vocabulary, saved under tmp_path so nothing is downloaded.
+    """
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    pytest.importorskip("sentence_transformers")
+    pytest.importorskip("fastapi")
+    from sentence_transformers import models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    from app.services.onnx_embedding import PARITY_TEXTS
+
+    words = sorted({w.strip(".,!").lower() for text in PARITY_TEXTS for w in text.split()})
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words
+    body = tmp_path / "tiny-bert"
+    body.mkdir()
+    (tmp_path / "vocab.txt").write_text("\n".join(vocab))
+    BertTokenizerFast(vocab_file=str(tmp_path / "vocab.txt")).save_pretrained(str(body))
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=16,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=32,
+        max_position_embeddings=64,
+    )
+    torch.manual_seed(0)
+    BertModel(config).save_pretrained(str(body))
+
+    def build():
+        return models.Transformer(str(body), max_seq_length=32)
+
+    return build
+
+
+@pytest.fixture
+def tiny_sentence_transformer(tmp_path, tiny_transformer):
+    """Path of a saved Transformer -> mean Pooling -> Normalize model, like all-MiniLM."""
+    from sentence_transformers import SentenceTransformer, models
+
+    transformer = tiny_transformer()
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), "mean")
+    path = tmp_path / "tiny-st"
+    SentenceTransformer(modules=[transformer, pooling, models.Normalize()]).save(str(path))
+    return str(path)
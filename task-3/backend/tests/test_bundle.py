@@ -0,0 +1,54 @@
+"""
+Model bundles stay byte-for-byte as built, so their size check passes on every start.
+"""
+import sqlite3
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.bundle import (  # noqa: E402
+    CHROMA_SQLITE,
+    OFFLINE_ENV_VARS,
+    BundleError,
+    apply_bundle,
+    build_bundle,
+    open_bundle,
+)
+from app.config import Settings  # noqa: E402
+
+
+@pytest.fixture
+def bundle_root(tmp_path, monkeypatch):
+    for name in OFFLINE_ENV_VARS:
+        monkeypatch.setenv(name, "1")
+    chroma = tmp_path / "db"
+    (chroma / "segment").mkdir(parents=True)
+    (chroma / "segment" / "data_level0.bin").write_bytes(b"\0" * 64)
+    with sqlite3.connect(chroma / CHROMA_SQLITE) as db:
+        db.execute("CREATE TABLE embeddings (id INTEGER PRIMARY KEY, doc TEXT)")
+        db.execute("INSERT INTO embeddings (doc) VALUES ('hello')")
+    settings = Settings(chroma_db_dir=chroma)
+    return build_bundle(settings, tmp_path / "bundles", skip=["embedding", "rating"])
+
+
+def test_chroma_writes_do_not_touch_the_bundle(bundle_root, tmp_path):
+    bundle = open_bundle(bundle_root, verify=True)
+    settings = Settings()
+    apply_bundle(settings, bundle, scratch_root=tmp_path / "scratch")
+
+    assert settings.chroma_db_dir != bundle.component("chroma")
+    assert settings.chroma_db_dir.is_relative_to(tmp_path / "scratch")
+    # Stand-in for what Chroma does to its sqlite file once the API is serving.
+    with sqlite3.connect(settings.chroma_db_dir / CHROMA_SQLITE) as db:
+        db.executemany("INSERT INTO embeddings (doc) VALUES (?)", [("x" * 512,)] * 200)
+
+    # The next start still sees the bundle exactly as built.
+    assert open_bundle(bundle_root, verify=True).version == bundle.version
+
+
+def test_size_mismatch_is_rejected(bundle_root):
+    with (bundle_root / "chroma" / CHROMA_SQLITE).open("ab") as handle:
+        handle.write(b"\0" * 4096)
+    with pytest.raises(BundleError):
+        open_bundle(bundle_root)
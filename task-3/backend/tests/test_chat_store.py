@@ -0,0 +1,34 @@
+import uuid
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from app.services.chat_store import InMemoryChatStore  # noqa: E402
+
+
+def test_max_history_below_one_is_rejected():
+    store = InMemoryChatStore()
+    with pytest.raises(ValueError):
+        store.append(uuid.uuid4(), "User: hi", "AI: hello", max_history=0)
+
+
+def test_size_counts_utf8_bytes():
+    store = InMemoryChatStore(num_shards=1)
+    store.append(uuid.uuid4(), "é", "日本")
+    assert store.stats()["bytes"] == 2 + 6
+
+
+def test_history_change_keeps_lru_position():
+    # One shard, room for 60 bytes: six 10-byte turns.
+    store = InMemoryChatStore(num_shards=1, max_bytes=60)
+    first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    store.append(first, "a" * 10, "b" * 10, max_history=2)
+    store.append(second, "a" * 10, "b" * 10, max_history=2)
+    # Touching `first` with a new max_history must still make it most recently used.
+    store.append(first, "c" * 10, "d" * 10, max_history=4)
+    store.append(third, "a" * 10, "b" * 10, max_history=2)
+
+    assert store.fetch(second) == []
+    assert store.fetch(first, limit=4) == ["a" * 10, "b" * 10, "c" * 10, "d" * 10]
+    assert store.stats()["evicted_memory"] >= 1
@@ -0,0 +1,52 @@
+"""
+Redis-backed chat history: capped lists, TTL refresh on every append and fetch limits.
+"""
+import uuid
+
+import pytest
+
+pytest.importorskip("fastapi")
+fakeredis = pytest.importorskip("fakeredis")
+
+from app.services.chat_store import RedisChatStore  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def store(client):
+    return RedisChatStore(url="redis://unused", ttl_seconds=600, client=client)
+
+
+def test_history_is_capped(store):
+    conversation = uuid.uuid4()
+    for i in range(5):
+        store.append(conversation, f"User: {i}", f"AI: {i}", max_history=4)
+    assert store.fetch(conversation, limit=10) == ["User: 3", "AI: 3", "User: 4", "AI: 4"]
+
+
+def test_fetch_limit_returns_newest_turns(store):
+    conversation = uuid.uuid4()
+    store.append(conversation, "User: a", "AI: a")
+    store.append(conversation, "User: b", "AI: b")
+    assert store.fetch(conversation, limit=2) == ["User: b", "AI: b"]
+    assert store.fetch(conversation) == ["User: a", "AI: a", "User: b", "AI: b"]
+    assert store.fetch(uuid.uuid4()) == []
+
+
+def test_append_refreshes_ttl(store, client):
+    conversation = uuid.uuid4()
+    key = f"chat:{conversation}"
+    store.append(conversation, "User: a", "AI: a")
+    assert 0 < client.ttl(key) <= 600
+    client.expire(key, 5)
+    store.append(conversation, "User: b", "AI: b")
+    assert client.ttl(key) > 5
+
+
+def test_max_history_below_one_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.append(uuid.uuid4(), "User: a", "AI: a", max_history=0)
@@ -0,0 +1,79 @@
+"""
+Adaptive concurrency limiting: each class is shed by its own limit, and priority only
+orders who gets the next worker thread.
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.middleware import AdaptiveConcurrencyLimiter, PriorityGate  # noqa: E402
+
+
+def _limiter():
+    return AdaptiveConcurrencyLimiter(
+        {"/ratings/predict": 2, "/restaurants/search": 2}, initial_limit=2, min_limit=1
+    )
+
+
+def test_saturated_higher_class_does_not_shed_lower_class():
+    limiter = _limiter()
+    assert limiter.try_acquire("/ratings/predict")
+    assert limiter.try_acquire("/ratings/predict")
+    assert not limiter.try_acquire("/ratings/predict")
+    # Searches still have their own headroom.
+    assert limiter.try_acquire("/restaurants/search")
+    assert limiter.try_acquire("/restaurants/search")
+    assert not limiter.try_acquire("/restaurants/search")
+
+    limiter.release("/ratings/predict", 0.01, failed=False)
+    assert limiter.try_acquire("/ratings/predict")
+
+
+def test_priority_follows_route_order():
+    limiter = _limiter()
+    assert limiter.priority("/ratings/predict") < limiter.priority("/restaurants/search")
+
+
+def test_gate_serves_higher_priority_waiters_first():
+    async def scenario():
+        gate = PriorityGate(capacity=1)
+        await gate.acquire(1)  # a search holds the only thread
+        order = []
+
+        async def waiter(name, priority):
+            await gate.acquire(priority)
+            order.append(name)
+            gate.release()
+
+        tasks = [
+            asyncio.ensure_future(waiter("search-1", 1)),
+            asyncio.ensure_future(waiter("search-2", 1)),
+            asyncio.ensure_future(waiter("predict", 0)),
+        ]
+        await asyncio.sleep(0)
+        assert gate.waiting == 3
+        gate.release()
+        await asyncio.gather(*tasks)
+        return order, gate
+
+    order, gate = asyncio.run(scenario())
+    assert order == ["predict", "search-1", "search-2"]
+    assert gate._busy == 0
+
+
+def test_gate_timeout_does_not_leak_a_slot():
+    async def scenario():
+        gate = PriorityGate(capacity=1)
+        await gate.acquire(0)
+        with pytest.raises(asyncio.TimeoutError):
+            await gate.acquire(0, timeout=0.01)
+        assert gate.waiting == 0
+        gate.release()
+        # The abandoned waiter neither kept the slot nor blocks the next caller.
+        await asyncio.wait_for(gate.acquire(1), timeout=1)
+        return gate
+
+    gate = asyncio.run(scenario())
+    assert gate._busy == 1
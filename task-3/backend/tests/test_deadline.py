@@ -0,0 +1,130 @@
+"""
+Request deadlines: an expired deadline answers 504 and stops the worker at its next
+checkpoint; a client disconnect cancels the wait the same way.
+"""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.deadline import (  # noqa: E402
+    CLIENT_CLOSED_REQUEST,
+    Deadline,
+    DeadlineExceeded,
+    bind_deadline,
+    check_deadline,
+    deadline_exceeded_handler,
+    reset_deadline,
+    run_with_deadline,
+)
+from app.middleware import make_deadline_middleware, request_timeout  # noqa: E402
+
+
+class _Worker:
+    """Blocking job that checks the deadline every few milliseconds, like the services."""
+
+    def __init__(self) -> None:
+        self.stopped_at = None
+        self.done = threading.Event()
+
+    def __call__(self, seconds: float) -> str:
+        try:
+            end = time.monotonic() + seconds
+            while time.monotonic() < end:
+                check_deadline("worker_step")
+                time.sleep(0.005)
+            return "finished"
+        except DeadlineExceeded as exc:
+            self.stopped_at = exc.stage
+            raise
+        finally:
+            self.done.set()
+
+
+def test_request_timeout_header_is_capped_by_route():
+    caps = {"/predict": 2.0}
+    assert request_timeout("/v1/ratings/predict", "500", 30.0, caps) == 0.5
+    assert request_timeout("/v1/ratings/predict", "60000", 30.0, caps) == 2.0
+    assert request_timeout("/v1/ratings/predict", "bogus", 30.0, caps) == 2.0
+    assert request_timeout("/v1/healthz", None, 30.0, caps) == 30.0
+
+
+def test_check_deadline_outside_request_is_a_no_op():
+    check_deadline("script")
+
+
+def test_expired_deadline_returns_504_and_stops_worker():
+    worker = _Worker()
+    app = FastAPI()
+    app.add_exception_handler(DeadlineExceeded, deadline_exceeded_handler)
+    app.middleware("http")(make_deadline_middleware())
+
+    @app.get("/slow")
+    async def slow(request: Request):
+        return {"result": await run_with_deadline(request, worker, 5.0, poll_seconds=0.01)}
+
+    @app.get("/fast")
+    async def fast(request: Request):
+        return {"result": await run_with_deadline(request, _Worker(), 0.0)}
+
+    with TestClient(app) as client:
+        start = time.perf_counter()
+        response = client.get("/slow", headers={"x-request-timeout-ms": "100"})
+        elapsed = time.perf_counter() - start
+        assert client.get("/fast").json() == {"result": "finished"}
+
+    assert response.status_code == 504
+    detail = response.json()["detail"]
+    assert detail["code"] == "DEADLINE_EXCEEDED"
+    assert detail["stage"] == "request"
+    assert "0.1s" in detail["message"]
+    assert elapsed < 2.0
+    assert worker.done.wait(2)
+    assert worker.stopped_at == "worker_step"
+
+
+def test_disconnect_cancels_the_wait():
+    worker = _Worker()
+    polls = []
+
+    async def is_disconnected():
+        polls.append(time.monotonic())
+        return len(polls) >= 3
+
+    deadline = Deadline(30.0)
+    request = SimpleNamespace(state=SimpleNamespace(deadline=deadline))
+    request.is_disconnected = is_disconnected
+
+    async def scenario():
+        token = bind_deadline(deadline)
+        try:
+            await run_with_deadline(request, worker, 5.0, poll_seconds=0.01)
+        finally:
+            reset_deadline(token)
+
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded) as excinfo:
+        asyncio.run(scenario())
+    assert time.perf_counter() - start < 2.0
+    assert excinfo.value.reason == "disconnect"
+    assert deadline.cancelled and deadline.reason == "disconnect"
+    assert worker.done.wait(2)
+    assert worker.stopped_at == "worker_step"
+
+
+def test_disconnect_is_reported_as_client_closed():
+    request = SimpleNamespace(state=SimpleNamespace(deadline=None, trace_id="t-1"))
+    response = asyncio.run(
+        deadline_exceeded_handler(request, DeadlineExceeded("request", "disconnect"))
+    )
+    assert response.status_code == CLIENT_CLOSED_REQUEST
+    assert b"CLIENT_DISCONNECTED" in response.body
+    assert b"t-1" in response.body
@@ -0,0 +1,113 @@
+"""
+Embedding coalescer: lone callers skip the window, leaders run one round, waits are bounded.
+"""
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.deadline import DeadlineExceeded  # noqa: E402
+from app.services.embedding import _EmbedCoalescer  # noqa: E402
+
+
+def _vector(text):
+    return [float(len(text))]
+
+
+def _run(target, *args):
+    outcome = {}
+
+    def runner():
+        try:
+            outcome["value"] = target(*args)
+        except BaseException as exc:  # surfaced by the assertions below
+            outcome["error"] = exc
+
+    thread = threading.Thread(target=runner, name=f"caller-{args[0]}" if args else None)
+    thread.start()
+    return thread, outcome
+
+
+def _wait_for_pending(coalescer, count):
+    for _ in range(200):
+        if coalescer.pending >= count:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"only {coalescer.pending} callers queued")
+
+
+def test_lone_caller_skips_window():
+    coalescer = _EmbedCoalescer(lambda texts: [_vector(t) for t in texts], 8, 5.0)
+    start = time.perf_counter()
+    assert coalescer.submit("abc") == [3.0]
+    assert time.perf_counter() - start < 1.0
+
+
+def test_leader_hands_off_after_one_round():
+    release = threading.Event()
+    encoders = []
+
+    def encode(texts):
+        encoders.append((threading.current_thread().name, list(texts)))
+        if len(encoders) == 1:
+            release.wait(5)
+        return [_vector(t) for t in texts]
+
+    coalescer = _EmbedCoalescer(encode, max_batch=1, window_seconds=0.0)
+    leader, first = _run(coalescer.submit, "a")
+    while not encoders:
+        time.sleep(0.01)
+    followers = []
+    for count, text in enumerate(("bb", "ccc"), start=1):
+        followers.append(_run(coalescer.submit, text))
+        _wait_for_pending(coalescer, count)
+    release.set()
+    for thread, _ in [(leader, first)] + followers:
+        thread.join(5)
+
+    assert first["value"] == [1.0]
+    assert [outcome["value"] for _, outcome in followers] == [[2.0], [3.0]]
+    # Each queued caller encoded its own round instead of the first leader doing them all.
+    assert encoders == [("caller-a", ["a"]), ("caller-bb", ["bb"]), ("caller-ccc", ["ccc"])]
+    assert coalescer.pending == 0 and not coalescer._leader_active
+
+
+def test_failed_encode_releases_leadership():
+    calls = []
+
+    def encode(texts):
+        calls.append(texts)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return [_vector(t) for t in texts]
+
+    coalescer = _EmbedCoalescer(encode, 8, 0.0)
+    with pytest.raises(RuntimeError):
+        coalescer.submit("a")
+    assert not coalescer._leader_active
+    assert coalescer.submit("bb") == [2.0]
+
+
+def test_follower_without_deadline_gives_up():
+    release = threading.Event()
+
+    def encode(texts):
+        release.wait(5)
+        return [_vector(t) for t in texts]
+
+    coalescer = _EmbedCoalescer(encode, max_batch=1, window_seconds=0.0, wait_timeout_seconds=0.2)
+    leader, first = _run(coalescer.submit, "a")
+    time.sleep(0.05)
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded) as excinfo:
+        coalescer.submit("bb")
+    assert excinfo.value.reason == "timeout"
+    assert time.perf_counter() - start < 2.0
+    # The abandoned entry is dropped, so the leader stands down after its own round.
+    assert coalescer.pending == 0
+    release.set()
+    leader.join(5)
+    assert first["value"] == [1.0]
+    assert not coalescer._leader_active
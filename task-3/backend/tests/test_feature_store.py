@@ -0,0 +1,146 @@
+"""
+The feature store must produce the rows Task 2 trained on, without Task 2's training stack.
+"""
+import datetime as dt
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+pytest.importorskip("fastapi")
+
+from app.config import BASE_DIR, BACKEND_DIR, TASK2_DIR  # noqa: E402
+from app.services.feature_store import build_snapshot, feature_block  # noqa: E402
+from app.services.model import _ensure_task2_on_path  # noqa: E402
+
+DATA_DIR = BASE_DIR / "engagetest" / "data"
+
+# Every column the Task 2 pipeline reads (task-2/src/model.py), embeddings aside.
+NUMERIC = (
+    "helpful_count", "age", "avg_rating_given", "total_reviews_written",
+    "popularity_score", "avg_price", "booking_lead_time_days",
+    "popularity_7_day_avg", "popularity_30_day_avg", "popularity_lag_1",
+    "avg_price_7_day_avg", "popularity_7_day_growth",
+    "price_avg", "price_alignment_score", "user_cuisine_match", "is_local_resident",
+    "review_month", "review_day_of_week", "is_holiday",
+)
+CATEGORICAL = (
+    "resto_location", "resto_cuisine", "resto_price_bucket",
+    "home_location", "preferred_price_range", "dietary_restrictions", "dining_frequency",
+    "season", "day_type", "weather_impact_category",
+    "resto_description", "resto_amenities", "resto_attributes",
+)
+
+
+@pytest.fixture(scope="module")
+def snapshot():
+    return build_snapshot(DATA_DIR, TASK2_DIR)
+
+
+@pytest.fixture(scope="module")
+def training_frame():
+    _ensure_task2_on_path(TASK2_DIR)
+    from src.features import engineer_merged_features
+
+    with open(DATA_DIR / "restaurant.json") as handle:
+        restaurants = pd.DataFrame(json.load(handle))
+    reviews = pd.read_csv(DATA_DIR / "reviews.csv")
+    users = pd.read_csv(DATA_DIR / "user_data.csv")
+    trends = pd.read_csv(DATA_DIR / "dining_trends.csv")
+    df = engineer_merged_features(restaurants, reviews, users, trends)
+    # Rows without a same-day trend are NaN in training and as-of in serving; skip them.
+    return df[df["popularity_score"].notna()].reset_index(drop=True)
+
+
+def _same(expected, actual) -> bool:
+    if pd.isna(expected):
+        return pd.isna(actual)
+    return expected == actual
+
+
+def test_feature_block_matches_training(snapshot, training_frame):
+    assert len(training_frame) > 0
+    index = snapshot.restaurants.index
+    mismatches = []
+    for record in training_frame.to_dict("records"):
+        date = record["date"].date()
+        block = feature_block(
+            snapshot,
+            int(record["user_id"]),
+            date,
+            np.array([index[int(record["restaurant_id"])]]),
+            int(record["helpful_count"]),
+        )
+        for col in NUMERIC:
+            if not np.isclose(float(block[col][0]), float(record[col]), equal_nan=True):
+                mismatches.append((record["review_id"], col, record[col], block[col][0]))
+        for col in CATEGORICAL:
+            if not _same(record[col], block[col][0]):
+                mismatches.append((record["review_id"], col, record[col], block[col][0]))
+    assert mismatches == []
+
+
+def test_feature_row_matches_block(snapshot):
+    from app.services.feature_store import FeatureStore
+
+    store = FeatureStore(DATA_DIR, TASK2_DIR)
+    user_id = next(iter(snapshot.users.index))
+    restaurant_id = next(iter(snapshot.restaurants.index))
+    date = dt.date(2024, 6, 1)
+    row = store.feature_row(user_id, restaurant_id, date, helpful_count=3)
+    block = feature_block(
+        snapshot, user_id, date, np.array([snapshot.restaurants.index[restaurant_id]]), 3
+    )
+    assert row.keys() == block.keys()
+    for col, values in block.items():
+        assert _same(values[0], row[col]), col
+
+
+def test_build_snapshot_skips_task2_training_stack():
+    probe = (
+        "import sys\n"
+        "from app.config import BASE_DIR, TASK2_DIR\n"
+        "from app.services.feature_store import build_snapshot\n"
+        "build_snapshot(BASE_DIR / 'engagetest' / 'data', TASK2_DIR)\n"
+        "print(sorted(m for m in ('torch', 'config', 'src.data_utils') if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_refresh_swaps_snapshot_only_on_source_change(tmp_path):
+    import shutil
+    import threading
+
+    from app.services.feature_store import FeatureStore
+
+    data_dir = tmp_path / "data"
+    shutil.copytree(DATA_DIR, data_dir)
+    store = FeatureStore(data_dir, TASK2_DIR)
+    first = store.current()
+    threads = threading.active_count()
+    assert store.current() is first
+    assert threading.active_count() == threads  # the request path never spawns threads
+    assert store.check_for_update() is False
+
+    users = data_dir / "user_data.csv"
+    users.write_text(users.read_text())
+    stat = users.stat()
+    os.utime(users, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert store.check_for_update() is True
+    assert store.current() is not first
+
+    second = store.current()
+    (data_dir / "restaurant.json").write_text("{not json")
+    assert store.check_for_update() is False
+    assert store.current() is second
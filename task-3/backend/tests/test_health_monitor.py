@@ -0,0 +1,93 @@
+"""
+Background health snapshot: probes only loaded services, refreshes on an interval and
+/healthz serves the cached result without probing.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.routers.health import router as health_router  # noqa: E402
+from app.services.health_monitor import HealthMonitor  # noqa: E402
+
+
+class _Rag:
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.heartbeats = 0
+
+    def heartbeat(self) -> None:
+        self.heartbeats += 1
+        if self.fail:
+            raise RuntimeError("chroma unreachable")
+
+
+def _monitor(rag=None, rating=None, interval: float = 60.0) -> HealthMonitor:
+    return HealthMonitor(
+        rag_getter=lambda: rag, rating_getter=lambda: rating, interval_seconds=interval
+    )
+
+
+def test_unloaded_services_are_reported_not_probed():
+    monitor = _monitor()
+    assert monitor.snapshot.status == "starting"
+    payload = monitor.collect()
+    assert payload.status == "ok"
+    assert payload.chroma.status == "not_loaded"
+    assert payload.rag_graph.status == "not_loaded"
+    assert payload.rating_model.status == "not_loaded"
+
+
+def test_loaded_services_are_probed():
+    rag = _Rag()
+    payload = _monitor(rag, SimpleNamespace(model_version="xgb@3")).collect()
+    assert rag.heartbeats == 1
+    assert payload.status == "ok"
+    assert payload.chroma.latency_ms is not None
+    assert payload.rating_model.detail == "xgb@3"
+
+
+def test_failed_heartbeat_degrades_snapshot():
+    payload = _monitor(_Rag(fail=True)).collect()
+    assert payload.status == "degraded"
+    assert payload.chroma.status == "degraded"
+    assert "unreachable" in payload.chroma.detail
+    assert payload.rag_graph.status == "ok"
+
+
+def test_background_task_refreshes_snapshot():
+    rag = _Rag()
+
+    async def scenario():
+        monitor = _monitor(rag, interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.2)
+        await monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(scenario())
+    assert rag.heartbeats >= 2
+    assert monitor.snapshot.status == "ok"
+    assert monitor.checked_at is not None
+
+
+def test_healthz_serves_cached_snapshot_without_probing():
+    rag = _Rag()
+    monitor = _monitor(rag, SimpleNamespace(model_version="xgb@3"))
+    asyncio.run(monitor.refresh())
+    app = FastAPI()
+    app.include_router(health_router)
+    app.state.health_monitor = monitor
+
+    with TestClient(app) as client:
+        bodies = [client.get("/healthz").json() for _ in range(3)]
+
+    assert rag.heartbeats == 1
+    assert all(body["data"] == monitor.snapshot.model_dump() for body in bodies)
+    assert len({body["trace_id"] for body in bodies}) == 3
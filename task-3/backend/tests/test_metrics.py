@@ -0,0 +1,99 @@
+"""
+Prometheus exposition: histogram buckets, scrape-time gauges and the /metrics endpoint
+labelling requests by route template.
+"""
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.metrics import (  # noqa: E402
+    CONTENT_TYPE,
+    Counter,
+    GaugeCallback,
+    Histogram,
+    Registry,
+    stage_timer,
+)
+from app.middleware import make_metrics_middleware  # noqa: E402
+from app.routers.metrics import install_gauges  # noqa: E402
+from app.routers.metrics import router as metrics_router  # noqa: E402
+
+
+def _samples(text):
+    """Sample lines as {'name{labels}': value}, skipping HELP/TYPE comments."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            key, value = line.rsplit(" ", 1)
+            samples[key] = float(value)
+    return samples
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    histogram = registry.register(Histogram("latency", "Latency.", ("stage",), (0.1, 1.0)))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "encode")
+
+    samples = _samples(registry.render())
+    assert samples['latency_bucket{stage="encode",le="0.1"}'] == 2
+    assert samples['latency_bucket{stage="encode",le="1.0"}'] == 3
+    assert samples['latency_bucket{stage="encode",le="+Inf"}'] == 4
+    assert samples['latency_count{stage="encode"}'] == 4
+    assert samples['latency_sum{stage="encode"}'] == pytest.approx(3.65)
+
+
+def test_counter_escapes_label_values():
+    registry = Registry()
+    counter = registry.register(Counter("hits", "Hits.", ("route",)))
+    counter.inc('/a"b')
+    counter.inc('/a"b', amount=2)
+    assert _samples(registry.render()) == {'hits{route="/a\\"b"}': 3.0}
+
+
+def test_gauges_are_evaluated_at_scrape_time():
+    registry = Registry()
+    depth = {"value": 1}
+    registry.register(
+        GaugeCallback("depth", "Depth.", lambda: {("queue",): depth["value"]}, ("name",))
+    )
+    registry.register(GaugeCallback("broken", "Broken.", lambda: 1 / 0))
+    assert _samples(registry.render()) == {'depth{name="queue"}': 1.0}
+    depth["value"] = 7
+    text = registry.render()
+    assert _samples(text) == {'depth{name="queue"}': 7.0}
+    assert "# TYPE broken gauge" in text
+
+
+def test_metrics_endpoint_labels_by_route_template():
+    app = FastAPI()
+    app.middleware("http")(make_metrics_middleware())
+    app.include_router(metrics_router)
+    install_gauges()
+
+    @app.get("/metrics-test/{item_id}")
+    async def item(item_id: int):
+        with stage_timer("metrics_test_stage"):
+            return {"id": item_id}
+
+    with TestClient(app) as client:
+        assert client.get("/metrics-test/1").status_code == 200
+        assert client.get("/metrics-test/2").status_code == 200
+        assert client.get("/metrics-test/x").status_code == 422
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == CONTENT_TYPE
+    samples = _samples(response.text)
+    route = 'method="GET",route="/metrics-test/{item_id}"'
+    assert samples[f'engage_http_requests_total{{{route},status="200"}}'] == 2
+    assert samples[f'engage_http_requests_total{{{route},status="422"}}'] == 1
+    assert samples[f'engage_http_request_duration_seconds_count{{{route},status="200"}}'] == 2
+    assert samples['engage_stage_duration_seconds_count{stage="metrics_test_stage"}'] == 2
+    # The scrape itself is in flight while the gauges are evaluated.
+    assert samples["engage_in_flight_requests"] == 1
+    assert 'engage_threadpool_tokens{state="busy"}' in samples
@@ -0,0 +1,90 @@
+"""
+Hot reload of the rating model: a settled artifact swaps the generation, and a corrupt one
+keeps the current model serving.
+"""
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.services.model_reloader import ModelReloader  # noqa: E402
+from app.warmup import _sample_rating_request  # noqa: E402
+
+
+def _bump_mtime(path, seconds: int = 1) -> None:
+    # Coarse filesystem timestamps could otherwise hide a rewrite within the same tick.
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 10**9))
+
+
+def _rating(service) -> float:
+    request = _sample_rating_request(service.embedding_dim)
+    return service.predict(request).payload.rating_prediction
+
+
+def test_settled_artifact_swaps_generation(local_rating_service, write_tiny_model):
+    service = local_rating_service
+    old = service.active_model
+    old_rating = _rating(service)
+
+    _bump_mtime(write_tiny_model(scale=0.5))
+    # The first poll only notices the change; the artifact has to hold still for one more.
+    assert service.check_for_update() is None
+    assert service.active_model is old
+
+    new_version = service.check_for_update()
+    assert new_version == service.model_version != old.version
+    assert service.active_model is not old
+    assert _rating(service) != old_rating
+    # Nothing changed since the swap, so further polls are no-ops.
+    assert service.check_for_update() is None
+
+
+@pytest.mark.parametrize("payload", [b"not a pickle", None], ids=["garbage", "not_a_pipeline"])
+def test_corrupt_artifact_keeps_current_generation(
+    local_rating_service, write_tiny_model, payload
+):
+    import joblib
+
+    service = local_rating_service
+    old = service.active_model
+    old_rating = _rating(service)
+    path = write_tiny_model()
+    if payload is None:
+        joblib.dump({"not": "a pipeline"}, path)
+    else:
+        path.write_bytes(payload)
+    _bump_mtime(path)
+
+    assert service.check_for_update() is None
+    with pytest.raises(Exception):
+        service.check_for_update()
+    assert service.active_model is old
+    assert _rating(service) == old_rating
+    # The failed artifact is not retried until it changes again.
+    assert service.check_for_update() is None
+
+    _bump_mtime(write_tiny_model(scale=0.5), seconds=2)
+    assert service.check_for_update() is None
+    assert service.check_for_update() != old.version
+    assert _rating(service) != old_rating
+
+
+def test_reloader_logs_failures_and_forces_reloads(local_rating_service, write_tiny_model):
+    service = local_rating_service
+    reloader = ModelReloader(rating_getter=lambda: service, interval_seconds=0)
+    old_version = service.model_version
+
+    path = write_tiny_model()
+    path.write_bytes(b"truncated")
+    assert asyncio.run(reloader.reload_now(force=True)) is None
+    assert service.model_version == old_version
+
+    write_tiny_model(scale=0.5)
+    assert asyncio.run(reloader.reload_now(force=True)) != old_version
+    assert service.model_version != old_version
+
+    unloaded = ModelReloader(rating_getter=lambda: None, interval_seconds=0)
+    assert asyncio.run(unloaded.reload_now(force=True)) is None
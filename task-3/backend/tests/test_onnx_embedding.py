@@ -0,0 +1,57 @@
+"""
+ONNX export of a tiny local SentenceTransformer: parity with torch and rejected module stacks.
+"""
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("torch")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("fastapi")
+
+from sentence_transformers import SentenceTransformer, models  # noqa: E402
+
+from app.services.onnx_embedding import (  # noqa: E402
+    MANIFEST_NAME,
+    _module_stack,
+    compare_backends,
+    export_onnx,
+)
+
+
+def test_compare_backends_reports_parity(tiny_sentence_transformer, tmp_path):
+    report = compare_backends(tiny_sentence_transformer, tmp_path / "onnx", rounds=2)
+    assert report["model_name"] == tiny_sentence_transformer
+    assert report["quantized"] is False
+    assert report["parity"]["cosine_min"] > 0.999
+    for backend in ("torch", "onnx"):
+        assert "embeddings" not in report[backend]
+        assert report[backend]["single_p50_ms"] > 0
+        assert report[backend]["batch_p50_ms"] > 0
+
+
+def test_module_stack_keeps_normalize(tiny_sentence_transformer):
+    stack = _module_stack(SentenceTransformer(tiny_sentence_transformer, device="cpu"))
+    assert stack == {"pooling": "mean", "normalize": True}
+
+
+@pytest.mark.parametrize("pooling_mode", ["max", "weightedmean"])
+def test_unsupported_pooling_is_rejected(tiny_transformer, pooling_mode):
+    transformer = tiny_transformer()
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), pooling_mode)
+    with pytest.raises(ValueError, match="Unsupported pooling"):
+        _module_stack(SentenceTransformer(modules=[transformer, pooling]))
+
+
+def test_dense_head_is_rejected_before_export(tiny_transformer, tmp_path):
+    transformer = tiny_transformer()
+    dim = transformer.get_word_embedding_dimension()
+    model = SentenceTransformer(
+        modules=[transformer, models.Pooling(dim, "mean"), models.Dense(dim, 8)]
+    )
+    path = tmp_path / "dense-st"
+    model.save(str(path))
+    out_dir = tmp_path / "export"
+    with pytest.raises(ValueError, match="module stack"):
+        export_onnx(str(path), out_dir)
+    assert not (out_dir / MANIFEST_NAME).exists()
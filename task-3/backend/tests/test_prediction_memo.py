@@ -0,0 +1,55 @@
+"""
+Prediction memo: repeated rows skip the model, and a hot swap never serves old scores.
+"""
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.warmup import _sample_rating_request  # noqa: E402
+
+
+@pytest.fixture
+def counted(local_rating_service, monkeypatch):
+    calls = []
+    predict_local = local_rating_service._predict_local
+
+    def counting(df, trace_id, model):
+        calls.append(model.version)
+        return predict_local(df, trace_id, model)
+
+    monkeypatch.setattr(local_rating_service, "_predict_local", counting)
+    return local_rating_service, calls
+
+
+def test_memo_hit_skips_the_model(counted):
+    service, calls = counted
+    request = _sample_rating_request(service.embedding_dim)
+
+    first = service.predict(request)
+    second = service.predict(request)
+
+    assert len(calls) == 1
+    assert second.payload == first.payload
+    stats = service.prediction_cache_stats()
+    assert stats["hits"] == 1 and stats["size"] == 1
+    assert stats["saved_ms"] > 0
+
+    # A different row is a miss.
+    other = request.model_copy(update={"user": request.user.model_copy(update={"age": 60})})
+    service.predict(other)
+    assert len(calls) == 2
+
+
+def test_hot_swap_invalidates_the_memo(counted, write_tiny_model):
+    service, calls = counted
+    request = _sample_rating_request(service.embedding_dim)
+    before = service.predict(request)
+    old_version = service.model_version
+
+    write_tiny_model(scale=0.5)
+    assert service.reload() != old_version
+
+    after = service.predict(request)
+    assert calls == [old_version, service.model_version]
+    assert after.payload.rating_prediction != before.payload.rating_prediction
+    assert service.prediction_cache_stats()["size"] == 1
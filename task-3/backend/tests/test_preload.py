@@ -0,0 +1,138 @@
+"""
+Pre-fork launcher: preload steps run once in order, and forked workers get their torch
+thread counts back after the parent pinned them to one.
+"""
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app import preload  # noqa: E402
+from app.config import BACKEND_DIR  # noqa: E402
+from app.cpu_budget import CpuBudget  # noqa: E402
+
+
+def _budget(torch_threads: int) -> CpuBudget:
+    return CpuBudget(
+        cores=4,
+        workers=1,
+        per_worker=4,
+        xgboost_threads=1,
+        torch_intra_op_threads=torch_threads,
+        torch_inter_op_threads=1,
+        blas_threads=1,
+        threadpool_size=None,
+    )
+
+
+@pytest.fixture
+def torch_threads(monkeypatch):
+    """torch with its intra-op thread count put back after the test."""
+    torch = pytest.importorskip("torch")
+    before = torch.get_num_threads()
+    monkeypatch.setattr(preload, "_torch_threads_before_fork", None)
+    yield torch
+    torch.set_num_threads(before)
+
+
+def test_preload_runs_steps_in_order_and_skips(monkeypatch):
+    calls = []
+    steps = {name: (lambda name=name: calls.append(name)) for name in ("a", "b", "c")}
+    monkeypatch.setattr(preload, "PRELOAD_STEPS", steps)
+
+    timings = preload.preload(skip=["b"])
+
+    assert calls == ["a", "c"]
+    assert list(timings) == ["a", "c"]
+    assert all(isinstance(ms, int) and ms >= 0 for ms in timings.values())
+
+
+def test_non_torch_embedding_backend_is_left_to_workers(monkeypatch):
+    service = SimpleNamespace(backend="onnx", load=lambda: pytest.fail("loaded in the parent"))
+    monkeypatch.setattr(preload, "get_embedding_service", lambda: service)
+    preload._preload_embedding_model()
+
+
+def test_torch_weights_are_shared_with_threads_pinned(monkeypatch, torch_threads):
+    torch = torch_threads
+    torch.set_num_threads(3)
+    shared = []
+    model = SimpleNamespace(share_memory=lambda: shared.append(torch.get_num_threads()))
+    service = SimpleNamespace(backend="torch", load=lambda: model)
+    monkeypatch.setattr(preload, "get_embedding_service", lambda: service)
+
+    preload._preload_embedding_model()
+
+    assert shared == [1]
+    assert preload._torch_threads_before_fork == 3
+    assert torch.get_num_threads() == 1
+
+
+def test_worker_without_budget_restores_torch_default(monkeypatch, torch_threads):
+    torch = torch_threads
+    monkeypatch.setattr(preload, "cpu_budget", lambda: None)
+    monkeypatch.setattr(preload, "_torch_threads_before_fork", 3)
+    torch.set_num_threads(1)
+
+    preload._restore_torch_threads()
+
+    assert torch.get_num_threads() == 3
+
+
+def test_worker_with_budget_uses_its_share(monkeypatch, torch_threads):
+    torch = torch_threads
+    monkeypatch.setattr(preload, "cpu_budget", lambda: _budget(2))
+    monkeypatch.setattr(preload, "_torch_threads_before_fork", 3)
+    torch.set_num_threads(1)
+
+    preload._restore_torch_threads()
+
+    assert torch.get_num_threads() == 2
+
+
+# Runs in a fresh interpreter: OpenMP state from earlier tests must not leak into fork().
+_FORK_PROBE = """
+import os
+from types import SimpleNamespace
+
+import torch
+
+from app import preload
+
+torch.set_num_threads(3)
+model = SimpleNamespace(share_memory=lambda: None)
+preload.get_embedding_service = lambda: SimpleNamespace(backend="torch", load=lambda: model)
+preload.cpu_budget = lambda: None
+preload._preload_embedding_model()
+
+read_fd, write_fd = os.pipe()
+pid = os.fork()
+if pid == 0:
+    preload._restore_torch_threads()
+    os.write(write_fd, str(torch.get_num_threads()).encode())
+    os._exit(0)
+os.close(write_fd)
+child = os.read(read_fd, 16).decode()
+os.waitpid(pid, 0)
+print(child, torch.get_num_threads())
+"""
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_forked_worker_restores_threads():
+    pytest.importorskip("torch")
+    result = subprocess.run(
+        [sys.executable, "-c", _FORK_PROBE],
+        cwd=BACKEND_DIR,
+        env=dict(os.environ, ENABLE_WARMUP="false"),
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=120,
+    )
+    # The worker gets torch's threads back; the parent keeps its pin.
+    assert result.stdout.split() == ["3", "1"]
@@ -0,0 +1,78 @@
+"""
+Catalog ranking: request filters become the right candidate mask, and the argpartition
+top-k agrees with a full sort.
+"""
+import datetime as dt
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("fastapi")
+
+from app.schemas import TopRatingsRequest  # noqa: E402
+from app.services.ranking import RestaurantRanker  # noqa: E402
+
+
+def _snapshot(count: int = 6):
+    cuisines = ["Italian", "Indian", "Italian", "Japanese", "Indian", "Italian"] * (count // 6 + 1)
+    locations = ["Dubai Marina", "Deira", "JBR, Dubai Marina", "Sharjah", "Marina Walk", "Deira"]
+    locations = (locations * (count // 6 + 1))[:count]
+    columns = {
+        "id": np.arange(100, 100 + count),
+        "name": np.array([f"resto-{i}" for i in range(count)], dtype=object),
+        "cuisine": np.array(cuisines[:count], dtype=object),
+        "cuisine_key": np.array([c.lower() for c in cuisines[:count]], dtype=object),
+        "location": np.array(locations, dtype=object),
+        "price_avg": np.array(([75.0, 125.0, np.nan, 250.0, 175.0, 125.0] * count)[:count]),
+        "price_range": np.array((["AED 50 - 100", np.nan] * count)[:count], dtype=object),
+    }
+    return SimpleNamespace(restaurants=SimpleNamespace(columns=columns))
+
+
+def _request(**filters):
+    return TopRatingsRequest(user_id=1, date=dt.date(2024, 6, 1), **filters)
+
+
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        ({}, [0, 1, 2, 3, 4, 5]),
+        ({"cuisine": " ITALIAN "}, [0, 2, 5]),
+        ({"location": "marina"}, [0, 2, 4]),
+        ({"max_price": 125.0}, [0, 1, 5]),  # unknown prices never pass a price cap
+        ({"cuisine": "italian", "location": "deira", "max_price": 200.0}, [5]),
+        ({"cuisine": "thai"}, []),
+    ],
+)
+def test_candidate_masks(filters, expected):
+    rows = RestaurantRanker._candidates(_snapshot(), _request(**filters))
+    assert rows.tolist() == expected
+
+
+@pytest.mark.parametrize("k", [1, 3, 10, 60])
+def test_top_k_matches_full_sort(k):
+    snapshot = _snapshot(60)
+    rows = np.arange(5, 55)
+    scores = np.random.default_rng(k).uniform(1.0, 5.0, size=len(rows))
+
+    ranked = RestaurantRanker._top_k(snapshot, rows, scores, k)
+
+    expected = np.argsort(-scores, kind="stable")[: min(k, len(rows))]
+    ids = snapshot.restaurants.columns["id"]
+    assert [r.restaurant_id for r in ranked] == ids[rows[expected]].tolist()
+    assert [r.rating_prediction for r in ranked] == scores[expected].tolist()
+
+
+def test_top_k_with_ties_keeps_best_scores():
+    snapshot = _snapshot(12)
+    rows = np.arange(12)
+    scores = np.array([3.0, 4.5, 4.5, 2.0, 4.5, 1.0, 3.0, 5.0, 4.5, 2.0, 3.0, 1.5])
+
+    ranked = RestaurantRanker._top_k(snapshot, rows, scores, 4)
+
+    assert [r.rating_prediction for r in ranked] == [5.0, 4.5, 4.5, 4.5]
+    assert {r.restaurant_id for r in ranked} <= {101, 102, 104, 107, 108}
+    assert ranked[0].restaurant_id == 107
+    # Missing price ranges are reported as None rather than "nan".
+    assert {r.price_range for r in ranked} <= {"AED 50 - 100", None}
@@ -0,0 +1,181 @@
+"""
+Shared (Redis) GCRA limiter: burst, refill, per-route cost, Retry-After and fail-open.
+
+Runs against fakeredis (with its Lua support) by default; set TEST_REDIS_URL to run the
+same tests against a real redis-server.
+"""
+import asyncio
+import os
+import time
+import uuid
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("redis")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.config import get_settings  # noqa: E402
+from app.middleware import (  # noqa: E402
+    RedisRateLimiter,
+    check_route_costs,
+    make_rate_limit_middleware,
+)
+
+
+def _client():
+    url = os.environ.get("TEST_REDIS_URL")
+    if url:
+        from redis import asyncio as aioredis
+
+        return aioredis.from_url(url)
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return fakeredis.FakeAsyncRedis()
+
+
+@pytest.fixture
+def make_limiter():
+    """Build a limiter over a fresh key prefix, so tests never share a budget."""
+
+    def factory(limit: int, window: int = 60) -> RedisRateLimiter:
+        return RedisRateLimiter(
+            url="redis://unused",
+            limit_per_minute=limit,
+            window_seconds=window,
+            key_prefix=f"test:{uuid.uuid4().hex}:",
+            client=_client(),
+        )
+
+    return factory
+
+
+def test_burst_then_reject(make_limiter):
+    limiter = make_limiter(limit=5)
+
+    async def scenario():
+        allowed = [await limiter.acquire("key") for _ in range(5)]
+        return allowed, await limiter.acquire("key"), await limiter.acquire("other")
+
+    allowed, rejected, other = asyncio.run(scenario())
+    assert allowed == [0.0] * 5
+    # One unit refills every 60 / 5 = 12 seconds.
+    assert 11 < rejected <= 12
+    assert other == 0.0
+
+
+def test_refill(make_limiter):
+    # Burst of 10, one unit back every 0.1 s.
+    limiter = make_limiter(limit=10, window=1)
+
+    async def scenario():
+        for _ in range(10):
+            assert await limiter.acquire("key") == 0.0
+        wait = await limiter.acquire("key")
+        assert wait > 0
+        await asyncio.sleep(wait + 0.05)
+        return await limiter.acquire("key")
+
+    assert asyncio.run(scenario()) == 0.0
+
+
+def test_cost_spends_several_units(make_limiter):
+    limiter = make_limiter(limit=10)
+
+    async def scenario():
+        assert await limiter.acquire("key", cost=5) == 0.0
+        assert await limiter.acquire("key", cost=5) == 0.0
+        return await limiter.acquire("key", cost=1)
+
+    assert asyncio.run(scenario()) > 0
+
+
+def test_unreachable_store_fails_open():
+    from redis import asyncio as aioredis
+
+    limiter = RedisRateLimiter(
+        url="redis://127.0.0.1:1",
+        limit_per_minute=1,
+        window_seconds=60,
+        client=aioredis.from_url("redis://127.0.0.1:1", socket_connect_timeout=0.5),
+    )
+
+    async def scenario():
+        return [await limiter.acquire("key") for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [0.0, 0.0, 0.0]
+
+
+def test_route_cost_above_burst_is_rejected():
+    check_route_costs({"/search": 5.0}, burst=5)
+    with pytest.raises(ValueError):
+        check_route_costs({"/search": 6.0}, burst=5)
+
+
+@pytest.fixture
+def app_with(monkeypatch):
+    settings = get_settings()
+
+    def build(limiter, costs) -> TestClient:
+        monkeypatch.setattr(settings, "rate_limit_route_costs", costs)
+        app = FastAPI()
+        app.middleware("http")(make_rate_limit_middleware(limiter))
+
+        @app.get("/v1/search")
+        def search():
+            return {"ok": True}
+
+        @app.get("/v1/predict")
+        def predict():
+            return {"ok": True}
+
+        @app.get("/v1/readyz")
+        def readyz():
+            return {"ok": True}
+
+        return TestClient(app)
+
+    return build
+
+
+def test_middleware_route_costs_and_retry_after(make_limiter, app_with):
+    limiter = make_limiter(limit=6)
+    costs = {"/search": 5.0, "/predict": 1.0, "/readyz": 0.0}
+    with app_with(limiter, costs) as client:
+        headers = {"x-api-key": "caller"}
+        assert client.get("/v1/search", headers=headers).status_code == 200
+        assert client.get("/v1/predict", headers=headers).status_code == 200
+
+        response = client.get("/v1/search", headers=headers)
+        assert response.status_code == 429
+        assert response.json()["code"] == "RATE_LIMIT_EXCEEDED"
+        # 6 of 6 units spent, one back every 10 s: the search fits again in 50 s.
+        assert 49 <= int(response.headers["Retry-After"]) <= 50
+
+        # Free routes are never charged, even with the budget spent.
+        assert client.get("/v1/readyz", headers=headers).status_code == 200
+        # Another key has its own budget.
+        assert client.get("/v1/search", headers={"x-api-key": "other"}).status_code == 200
+
+
+def test_middleware_rejects_unpayable_route_cost(make_limiter, app_with):
+    with pytest.raises(ValueError):
+        app_with(make_limiter(limit=4), {"/search": 5.0})
+
+
+def test_middleware_fails_open(app_with):
+    from redis import asyncio as aioredis
+
+    limiter = RedisRateLimiter(
+        url="redis://127.0.0.1:1",
+        limit_per_minute=1,
+        window_seconds=60,
+        client=aioredis.from_url("redis://127.0.0.1:1", socket_connect_timeout=0.5),
+    )
+    start = time.perf_counter()
+    with app_with(limiter, {"/predict": 1.0}) as client:
+        for _ in range(3):
+            assert client.get("/v1/predict").status_code == 200
+    assert time.perf_counter() - start < 10
@@ -0,0 +1,80 @@
+"""
+The npz batch wire format must score exactly like the in-process pipeline.
+"""
+import threading
+import urllib.request
+import uuid
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+pytest.importorskip("joblib")
+pytest.importorskip("fastapi")
+
+from app.config import get_settings  # noqa: E402
+from app.services.embedding import EmbeddingService  # noqa: E402
+from app.services.feature_codec import (  # noqa: E402
+    NPZ_CONTENT_TYPE,
+    decode_predictions,
+    encode_features,
+)
+from app.services.model import (  # noqa: E402
+    RatingModelService,
+    build_feature_row,
+    load_local_model,
+)
+from app.warmup import _sample_rating_request  # noqa: E402
+from benchmarks.sagemaker_stub import serve  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    server = serve("127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    yield f"http://{host}:{port}/endpoints/stub/invocations"
+    server.shutdown()
+    server.server_close()
+
+
+def _rows(count: int):
+    rows = []
+    for i in range(count):
+        row = build_feature_row(_sample_rating_request(0))
+        row.update(
+            age=22 + 3 * i,
+            helpful_count=i,
+            avg_rating_given=2.5 + 0.2 * i,
+            popularity_score=40.0 + 5 * i,
+            resto_cuisine=("Italian", "Indian", "Japanese")[i % 3],
+        )
+        rows.append(row)
+    return rows
+
+
+def test_npz_round_trip_matches_local(stub_url):
+    settings = get_settings()
+    model = load_local_model(settings.rating_model_dir / settings.rating_model_filename)
+    service = RatingModelService(
+        settings=settings,
+        embedding_service=EmbeddingService(model_name=settings.rating_embedding_model),
+    )
+    rows = _rows(6)
+    vectors = np.random.default_rng(0).normal(size=(len(rows), len(model.embedding_cols)))
+
+    request = urllib.request.Request(
+        stub_url,
+        data=encode_features(rows, vectors),
+        headers={"Content-Type": NPZ_CONTENT_TYPE},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        remote = decode_predictions(response.read())
+
+    local = service._predict_local(
+        service._rows_to_dataframe(rows, vectors, model), uuid.uuid4(), model
+    )
+    assert len(remote) == len(rows)
+    assert np.allclose(remote, local)
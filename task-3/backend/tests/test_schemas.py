@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip("pydantic")
+pytest.importorskip("numpy")
+
+from app.schemas import RatingByIdRequest  # noqa: E402
+
+BASE = {"user_id": 1, "restaurant_id": 2, "date": "2026-01-01", "review_text": "Great ramen"}
+
+
+@pytest.mark.parametrize(
+    "embeddings",
+    [
+        {},
+        {"review_text_embedding": []},
+        {"review_text_embedding": None, "review_text_embedding_b64": ""},
+        {"tokenizer_version": "v1"},
+    ],
+)
+def test_empty_embeddings_count_as_absent(embeddings):
+    request = RatingByIdRequest(**BASE, embeddings=embeddings)
+    assert request.embeddings is None
+
+
+def test_populated_embeddings_are_kept():
+    request = RatingByIdRequest(**BASE, embeddings={"review_text_embedding": [0.1, 0.2]})
+    assert list(request.embeddings.vector()) == [0.1, 0.2]
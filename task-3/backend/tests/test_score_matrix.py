@@ -0,0 +1,199 @@
+"""
+Score matrix: the reader follows `CURRENT` to new generations (and keeps the old one when
+a new one is broken), and Task 2's incremental plan reuses every unchanged cell.
+"""
+import datetime as dt
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+pytest.importorskip("fastapi")
+
+from app.config import TASK2_DIR  # noqa: E402
+from app.services.model import _ensure_task2_on_path  # noqa: E402
+from app.services.score_matrix import (  # noqa: E402
+    LAYOUT_VERSION,
+    SCORES_FILE,
+    ScoreMatrix,
+)
+
+USERS = [1, 2, 3]
+RESTAURANTS = [10, 11, 12, 13]
+
+
+def _hashes(ids, changed=()):
+    return {str(i): f"h{i}" + ("-new" if i in changed else "") for i in ids}
+
+
+def _manifest(users=USERS, restaurants=RESTAURANTS, **overrides):
+    manifest = {
+        "layout_version": LAYOUT_VERSION,
+        "dtype": "float16",
+        "shape": [len(users), len(restaurants)],
+        "date": "2024-06-01",
+        "model_version": "model@abc",
+        "embedding": "zeros",
+        "trends_hash": "trends",
+        "user_hashes": _hashes(users),
+        "restaurant_hashes": _hashes(restaurants),
+    }
+    manifest.update(overrides)
+    return manifest
+
+
+def _write_generation(root, name, scores, users=USERS, restaurants=RESTAURANTS, **overrides):
+    gen_dir = root / name
+    gen_dir.mkdir(parents=True)
+    mapped = np.memmap(gen_dir / SCORES_FILE, dtype="<f2", mode="w+", shape=scores.shape)
+    mapped[:] = scores
+    mapped.flush()
+    del mapped
+    np.save(gen_dir / "user_ids.npy", np.asarray(users, dtype=np.int64))
+    np.save(gen_dir / "restaurant_ids.npy", np.asarray(restaurants, dtype=np.int64))
+    manifest = _manifest(users, restaurants, **overrides)
+    (gen_dir / "manifest.json").write_text(json.dumps(manifest))
+
+
+def _point(root, name):
+    # The batch job swaps CURRENT with os.replace, which gives it a new inode.
+    tmp = root / ".CURRENT.tmp"
+    tmp.write_text(name)
+    os.replace(tmp, root / "CURRENT")
+
+
+def _grid(offset=0.0):
+    return (np.arange(12, dtype=np.float32).reshape(3, 4) / 4 + 1 + offset).astype(np.float16)
+
+
+def test_missing_pointer_means_no_generation(tmp_path):
+    matrix = ScoreMatrix(tmp_path, check_interval_seconds=0)
+    assert matrix.current() is None
+    assert matrix.stats() == {"loaded": False}
+
+
+def test_follows_current_to_new_generation(tmp_path):
+    _write_generation(tmp_path, "gen-a", _grid())
+    _point(tmp_path, "gen-a")
+    matrix = ScoreMatrix(tmp_path, check_interval_seconds=60)
+    first = matrix.current()
+    assert first.name == "gen-a"
+    assert first.date == dt.date(2024, 6, 1)
+    assert first.score(2, 11) == float(_grid()[1, 1])
+    assert first.score(9, 11) is None
+    assert first.columns(np.array([13, 99, 10])).tolist() == [3, -1, 0]
+    assert first.user_row(3).tolist() == _grid()[2].tolist()
+
+    _write_generation(tmp_path, "gen-b", _grid(offset=1.0), model_version="model@def")
+    _point(tmp_path, "gen-b")
+    # Not re-checked before the interval elapses.
+    assert matrix.current() is first
+    matrix._next_check = 0.0
+    second = matrix.current()
+    assert second.name == "gen-b" and second.model_version == "model@def"
+    assert matrix.stats()["generation"] == "gen-b"
+    # The old mapping stays readable for requests that already hold it.
+    assert first.score(1, 10) == float(_grid()[0, 0])
+
+
+def test_broken_generation_keeps_previous(tmp_path):
+    _write_generation(tmp_path, "gen-a", _grid())
+    _point(tmp_path, "gen-a")
+    matrix = ScoreMatrix(tmp_path, check_interval_seconds=0)
+    first = matrix.current()
+
+    _write_generation(tmp_path, "gen-b", _grid(), layout_version=LAYOUT_VERSION + 1)
+    _point(tmp_path, "gen-b")
+    assert matrix.current() is first
+    _point(tmp_path, "gen-missing")
+    assert matrix.current() is first
+
+    _write_generation(tmp_path, "gen-c", _grid(offset=1.0))
+    _point(tmp_path, "gen-c")
+    assert matrix.current().name == "gen-c"
+
+
+@pytest.fixture(scope="module")
+def task2_score_matrix():
+    _ensure_task2_on_path(TASK2_DIR)
+    import score_matrix
+
+    return score_matrix
+
+
+def _args(output_dir, incremental=True, users=(), restaurants=()):
+    return SimpleNamespace(
+        output_dir=str(output_dir),
+        incremental=incremental,
+        chunk_users=2,
+        users=list(users),
+        restaurants=list(restaurants),
+    )
+
+
+def _plan(module, args, manifest, users, restaurants):
+    scores = np.zeros((len(users), len(restaurants)), dtype=np.float16)
+    blocks = module._plan(
+        args,
+        manifest,
+        np.asarray(users, dtype=np.int64),
+        np.asarray(restaurants, dtype=np.int64),
+        scores,
+    )
+    return blocks, scores
+
+
+def test_incremental_plan_reuses_unchanged_cells(tmp_path, task2_score_matrix):
+    old = _grid()
+    _write_generation(tmp_path, "gen-a", old)
+    _point(tmp_path, "gen-a")
+    users, restaurants = USERS + [4], RESTAURANTS
+    manifest = _manifest(
+        users,
+        restaurants,
+        user_hashes=_hashes(users, changed={2}),
+        restaurant_hashes=_hashes(restaurants, changed={12}),
+    )
+
+    blocks, scores = _plan(task2_score_matrix, _args(tmp_path), manifest, users, restaurants)
+
+    # Changed user 2 and new user 4 get full rows; the rest only the changed restaurant.
+    assert blocks == [([2, 4], restaurants), ([1, 3], [12])]
+    keep_rows, keep_cols = [0, 2], [0, 1, 3]
+    assert np.array_equal(scores[np.ix_(keep_rows, keep_cols)], old[np.ix_(keep_rows, keep_cols)])
+    scored = [(u, r) for us, rs in blocks for u in us for r in rs]
+    reused = [(users[i], restaurants[j]) for i in keep_rows for j in keep_cols]
+    assert len(scored) + len(reused) == len(users) * len(restaurants)
+    assert not set(scored) & set(reused)
+
+
+def test_forced_ids_are_rescored(tmp_path, task2_score_matrix):
+    _write_generation(tmp_path, "gen-a", _grid())
+    _point(tmp_path, "gen-a")
+    args = _args(tmp_path, users=[3], restaurants=[10])
+
+    blocks, _ = _plan(task2_score_matrix, args, _manifest(), USERS, RESTAURANTS)
+
+    assert blocks == [([3], RESTAURANTS), ([1, 2], [10])]
+
+
+@pytest.mark.parametrize(
+    "incremental, overrides",
+    [(True, {"model_version": "model@new"}), (True, {"date": "2024-06-02"}), (False, {})],
+)
+def test_incompatible_previous_rescores_everything(
+    tmp_path, task2_score_matrix, incremental, overrides
+):
+    _write_generation(tmp_path, "gen-a", _grid())
+    _point(tmp_path, "gen-a")
+    manifest = _manifest(**overrides)
+
+    blocks, scores = _plan(
+        task2_score_matrix, _args(tmp_path, incremental), manifest, USERS, RESTAURANTS
+    )
+
+    assert blocks == [([1, 2], RESTAURANTS), ([3], RESTAURANTS)]
+    assert not scores.any()
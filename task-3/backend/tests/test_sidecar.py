@@ -0,0 +1,150 @@
+"""
+Sidecar protocol over a real Unix socket: every opcode, error frames and SCORE coalescing.
+"""
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+pytest.importorskip("fastapi")
+
+from app.services.feature_codec import (  # noqa: E402
+    INTEGER_FEATURES,
+    NUMERIC_FEATURES,
+    TEXT_FEATURES,
+    decode_predictions,
+    encode_features,
+)
+from app.services.sidecar import (  # noqa: E402
+    OP_EMBED,
+    OP_INFO,
+    OP_SCORE,
+    SidecarClient,
+    SidecarError,
+    SidecarServer,
+    _FrameCoalescer,
+    encode_texts,
+)
+
+
+class _Pipeline:
+    def __init__(self, scale: float) -> None:
+        self.scale = scale
+
+    def predict(self, frame):
+        if (frame["age"] < 0).any():
+            raise ValueError("negative age")
+        return frame["age"].to_numpy() * self.scale
+
+
+def _model(scale: float = 2.0, version: str = "stub@1"):
+    return SimpleNamespace(
+        pipeline=_Pipeline(scale),
+        version=version,
+        fingerprint=version,
+        embedding_cols=["e0", "e1"],
+        residual_std=0.3,
+    )
+
+
+class _Embeddings:
+    def embed(self, text):
+        return [float(len(text)), 1.0]
+
+    def embed_many(self, texts):
+        return [[float(len(text)), 2.0] for text in texts]
+
+
+def _rows(ages):
+    rows = []
+    for age in ages:
+        row = {col: 1.0 for col in NUMERIC_FEATURES}
+        row.update({col: 1 for col in INTEGER_FEATURES})
+        row.update({col: "x" for col in TEXT_FEATURES})
+        row["age"] = age
+        rows.append(row)
+    return rows
+
+
+@pytest.fixture
+def sidecar():
+    # AF_UNIX paths are short (~104 bytes), so stay out of pytest's deep tmp_path.
+    root = tempfile.mkdtemp(prefix="sc-")
+    path = str(Path(root) / "s.sock")
+    rating = SimpleNamespace(active_model=_model())
+    server = SidecarServer(path, rating, _Embeddings(), score_window_ms=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield SidecarClient(path, timeout_seconds=5), rating
+    server.shutdown()
+    server.server_close()
+    shutil.rmtree(root, ignore_errors=True)
+
+
+def test_info(sidecar):
+    client, _ = sidecar
+    info = client.info()
+    assert info["model_version"] == "stub@1"
+    assert info["embedding_cols"] == ["e0", "e1"]
+    assert info["residual_std"] == 0.3
+
+
+def test_embed_single_and_batch(sidecar):
+    client, _ = sidecar
+    assert client.embed(["abc"]).tolist() == [[3.0, 1.0]]
+    assert client.embed(["a", "bb"]).tolist() == [[1.0, 2.0], [2.0, 2.0]]
+    # The raw op agrees with the helper.
+    assert len(client.call(OP_EMBED, encode_texts(["a", "bb"]))) == 8 + 2 * 2 * 4
+
+
+def test_score(sidecar):
+    client, _ = sidecar
+    body = encode_features(_rows([30, 41]), np.zeros((2, 2)))
+    assert decode_predictions(client.score(body)) == [60.0, 82.0]
+    assert decode_predictions(client.call(OP_SCORE, body)) == [60.0, 82.0]
+
+
+def test_unknown_op_returns_error_frame(sidecar):
+    client, _ = sidecar
+    with pytest.raises(SidecarError) as excinfo:
+        client.call(99)
+    assert excinfo.value.code == "UNKNOWN_OP"
+    # The connection survives an error frame.
+    assert client.call(OP_INFO)
+
+
+def test_inference_failure_returns_error_frame(sidecar):
+    client, _ = sidecar
+    with pytest.raises(SidecarError) as excinfo:
+        client.score(encode_features(_rows([-1]), np.zeros((1, 2))))
+    assert excinfo.value.code == "SIDECAR_INFERENCE_ERROR"
+    assert "negative age" in excinfo.value.message
+
+
+def test_lone_frame_skips_window():
+    import pandas as pd
+
+    coalescer = _FrameCoalescer(lambda model, frame: model.pipeline.predict(frame), 5.0)
+    start = time.perf_counter()
+    preds = coalescer.submit(_model(), pd.DataFrame({"age": [1.0, 2.0]}))
+    assert time.perf_counter() - start < 1.0
+    assert preds.tolist() == [2.0, 4.0]
+
+
+def test_queued_frames_keep_their_generation():
+    import pandas as pd
+
+    coalescer = _FrameCoalescer(lambda model, frame: model.pipeline.predict(frame), 0.01)
+    # A frame decoded against the old generation is still queued when the swap lands.
+    queued: Future = Future()
+    coalescer._pending.append((_model(scale=2.0), pd.DataFrame({"age": [10.0]}), queued))
+    preds = coalescer.submit(_model(scale=3.0), pd.DataFrame({"age": [10.0]}))
+    assert preds.tolist() == [30.0]
+    assert queued.result(timeout=1).tolist() == [20.0]
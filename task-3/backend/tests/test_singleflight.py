@@ -0,0 +1,113 @@
+"""
+SingleFlight followers: bounded waits, counted once, and only good answers are cached.
+"""
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.services.cache import SingleFlight, TTLCache  # noqa: E402
+
+
+class _LeaderGone(Exception):
+    pass
+
+
+def _follow(flight, key, **kwargs):
+    outcome = {}
+
+    def run():
+        try:
+            outcome["value"] = flight.do(key, lambda: "own", **kwargs)
+        except BaseException as exc:
+            outcome["error"] = exc
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread, outcome
+
+
+def _wait_for(predicate):
+    for _ in range(500):
+        if predicate():
+            return
+        time.sleep(0.01)
+    raise AssertionError("condition never became true")
+
+
+def test_follower_gives_up_after_timeout():
+    flight = SingleFlight()
+    flight._inflight["k"] = Future()  # a leader that never finishes
+
+    start = time.perf_counter()
+    with pytest.raises(FutureTimeout):
+        flight.do("k", lambda: "unused", timeout=0.1)
+    assert time.perf_counter() - start < 1.0
+
+
+def test_follower_is_counted_once_across_retries():
+    flight = SingleFlight(retry_on=(_LeaderGone,))
+    first, second = Future(), Future()
+    flight._inflight["k"] = first
+    follower, outcome = _follow(flight, "k")
+    _wait_for(lambda: flight.coalesced == 1)
+
+    # The first leader is abandoned by its caller while a second run is already in flight.
+    with flight._lock:
+        flight._inflight["k"] = second
+    first.set_exception(_LeaderGone())
+    time.sleep(0.05)
+    second.set_result("answer")
+    follower.join(5)
+
+    assert outcome["value"] == ("answer", True)
+    assert flight.coalesced == 1
+
+
+def test_retry_timeout_spans_all_attempts():
+    flight = SingleFlight(retry_on=(_LeaderGone,))
+    first = Future()
+    flight._inflight["k"] = first
+    follower, outcome = _follow(flight, "k", timeout=0.3)
+    time.sleep(0.2)
+    with flight._lock:
+        flight._inflight["k"] = Future()  # the retry finds another slow leader
+    first.set_exception(_LeaderGone())
+    follower.join(5)
+    assert isinstance(outcome["error"], FutureTimeout)
+
+
+def test_rag_does_not_cache_fallback_answers(monkeypatch):
+    from app.schemas import AppliedFilters, RestaurantSearchPayload
+    from app.services.rag import RAGService
+
+    service = RAGService.__new__(RAGService)
+    service._response_cache = TTLCache(maxsize=8, ttl_seconds=60)
+
+    def payload(answer, documents, fallback=False):
+        return RestaurantSearchPayload(
+            answer=answer,
+            applied_filters=AppliedFilters(),
+            documents=[
+                {"id": str(i), "score": None, "snippet": doc, "metadata": None}
+                for i, doc in enumerate(documents)
+            ],
+            fallback=fallback,
+        )
+
+    results = {
+        "fallback": payload("closest match", ["[NOTE: Semantically similar] x"], True),
+        "empty": payload("", []),
+        "good": payload("Try Bait Al Mandi", ["Bait Al Mandi, Emirati"]),
+    }
+    monkeypatch.setattr(service, "_run_graph", lambda question, *_: results[question])
+    for question in results:
+        assert service._run_graph_and_cache((question, 0), question, None) is results[question]
+
+    assert service._response_cache.get(("fallback", 0)) is None
+    assert service._response_cache.get(("empty", 0)) is None
+    assert service._response_cache.get(("good", 0)) is results["good"]
@@ -0,0 +1,108 @@
+"""
+Cold-start regression guard: importing the app must not drag in the heavy ML/cloud stacks,
+which are only loaded once their mode is configured or first used (see benchmarks/startup.py).
+"""
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from benchmarks.startup import BACKEND_DIR, LAZY_MODULES, measure  # noqa: E402
+
+MAX_RSS_MB = float(os.environ.get("STARTUP_MAX_RSS_MB", "300"))
+
+
+@pytest.fixture(scope="module")
+def report():
+    return measure()
+
+
+def _lazy_modules_after(code: str, env: Dict[str, str]) -> List[str]:
+    """Run `code` in a fresh interpreter with `env`; return the lazy modules it loaded."""
+    probe = (
+        "import json, sys\n"
+        f"{code}"
+        "loaded = {name.split('.')[0] for name in sys.modules}\n"
+        f"print(json.dumps(sorted(loaded & set({list(LAZY_MODULES)!r}))))\n"
+    )
+    proc_env = dict(os.environ, ENABLE_WARMUP="false", SIDECAR_SOCKET="", AWS_PROFILE="")
+    proc_env.update(env)
+    result = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=BACKEND_DIR,
+        env=proc_env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_no_lazy_module_imported_eagerly(report):
+    assert report["eager_heavy_modules"] == []
+
+
+def test_import_rss_within_budget(report):
+    assert report["peak_rss_mb"] <= MAX_RSS_MB
+
+
+def test_local_mode_leaves_other_backends_unimported(write_tiny_model):
+    model_path = write_tiny_model()
+    code = (
+        "from app.config import get_settings\n"
+        "from app.services.embedding import EmbeddingService\n"
+        "from app.services.model import RatingModelService\n"
+        f"settings = get_settings().model_copy(update={{'rating_model_filename': "
+        f"{model_path.name!r}}})\n"
+        "RatingModelService(settings, EmbeddingService(model_name='unused'))\n"
+    )
+    loaded = _lazy_modules_after(
+        code, {"ENABLE_LOCAL_MODEL": "true", "RATING_MODEL_DIR": str(model_path.parent)}
+    )
+    assert "joblib" in loaded
+    assert not {"boto3", "botocore", "onnxruntime", "sentence_transformers"} & set(loaded)
+
+
+def test_sagemaker_mode_leaves_other_backends_unimported():
+    pytest.importorskip("boto3")
+    code = "from app.dependencies import get_rating_service\nget_rating_service()\n"
+    loaded = _lazy_modules_after(
+        code,
+        {
+            "ENABLE_LOCAL_MODEL": "false",
+            "SAGEMAKER_ENDPOINT_NAME": "stub",
+            "AWS_ACCESS_KEY_ID": "test",
+            "AWS_SECRET_ACCESS_KEY": "test",
+        },
+    )
+    assert "boto3" in loaded
+    local = {"joblib", "sklearn", "xgboost", "pandas"}
+    embeddings = {"torch", "sentence_transformers", "onnxruntime"}
+    assert not (local | embeddings) & set(loaded)
+
+
+def test_onnx_mode_leaves_other_backends_unimported(tiny_sentence_transformer, tmp_path):
+    pytest.importorskip("onnxruntime")
+    from app.services.onnx_embedding import ensure_onnx_artifact
+
+    cache = tmp_path / "onnx"
+    ensure_onnx_artifact(tiny_sentence_transformer, cache)
+    code = (
+        "from app.dependencies import get_embedding_service\n"
+        "get_embedding_service().embed('great food')\n"
+    )
+    loaded = _lazy_modules_after(
+        code,
+        {
+            "RATING_EMBED_BACKEND": "onnx",
+            "RATING_EMBED_MODEL": tiny_sentence_transformer,
+            "RATING_EMBED_ONNX_DIR": str(cache),
+        },
+    )
+    assert "onnxruntime" in loaded
+    assert not {"sentence_transformers", "boto3", "botocore", "joblib"} & set(loaded)
@@ -0,0 +1,82 @@
+"""
+Warm-up readiness: required steps gate /readyz, optional ones only degrade it.
+"""
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app import warmup  # noqa: E402
+from app.config import get_settings  # noqa: E402
+from app.warmup import WarmupState, warm_up_services  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "warmup_retry_initial_seconds", 0.01)
+    monkeypatch.setattr(settings, "warmup_retry_max_seconds", 0.01)
+    monkeypatch.setattr(settings, "warmup_optional_steps", ["rag_graph"])
+    monkeypatch.setattr(settings, "warmup_optional_max_attempts", 3)
+    monkeypatch.setattr(warmup, "get_embedding_service", lambda: None)
+
+
+def _steps(monkeypatch, **steps):
+    monkeypatch.setattr(warmup, "WARMUP_STEPS", steps)
+
+
+def _ok():
+    pass
+
+
+def _missing_key():
+    raise RuntimeError("GOOGLE_API_KEY is not set")
+
+
+def test_failed_optional_step_is_ready_but_degraded(monkeypatch):
+    calls = []
+
+    def rag():
+        calls.append(1)
+        _missing_key()
+
+    _steps(monkeypatch, rag_graph=rag, rating_model=_ok)
+    state = warm_up_services(WarmupState())
+
+    assert state.ready and state.degraded
+    assert len(calls) == 3
+    rag_state = state.components["rag_graph"]
+    assert rag_state.status == "failed" and not rag_state.required
+    assert "GOOGLE_API_KEY" in rag_state.detail
+
+
+def test_required_step_is_retried_until_it_loads(monkeypatch):
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 5:
+            raise RuntimeError("sidecar not up yet")
+
+    _steps(monkeypatch, rag_graph=_ok, rating_model=flaky)
+    state = warm_up_services(WarmupState())
+
+    # More attempts than the optional bound: required steps never give up.
+    assert len(attempts) == 5
+    assert state.ready and not state.degraded
+    assert state.components["rating_model"].status == "ok"
+
+
+def test_not_ready_before_required_steps_load():
+    state = WarmupState()
+    assert not state.ready
+    state.record("rating_model", warmup.ComponentWarmup("retrying"))
+    state.record("rag_graph", warmup.ComponentWarmup("ok", required=False))
+    assert not state.ready
+    state.record("rating_model", warmup.ComponentWarmup("ok"))
+    assert state.ready and not state.degraded
+
+
+def test_disabled_warmup_is_ready():
+    state = WarmupState()
+    state.finished = True
+    assert state.ready